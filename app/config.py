@@ -16,6 +16,83 @@ DATABASE_PATH = Path(__file__).parent.parent / "data" / DATABASE_NAME
 # Ensure data directory exists
 DATABASE_PATH.parent.mkdir(exist_ok=True)
 
+# SQLite performance profiles (PRAGMAs applied to every pooled connection)
+# cache_size is negative for KiB, mmap_size is in bytes, busy_timeout in milliseconds
+DATABASE_PROFILES = {
+    # Rollback journal with full fsync on every commit (original SQLite defaults)
+    'safe': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+    # WAL lets readers proceed while a write commits; NORMAL syncs only at checkpoints
+    'balanced': {
+        'auto_vacuum': 'INCREMENTAL',  # Free pages can be returned to the OS in batches
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,  # ~20 MB page cache
+        'mmap_size': 268435456,  # 256 MB memory-mapped I/O
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # Larger caches for big practices on machines with plenty of RAM
+    'performance': {
+        'auto_vacuum': 'INCREMENTAL',  # Free pages can be returned to the OS in batches
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,  # ~64 MB page cache
+        'mmap_size': 1073741824,  # 1 GB memory-mapped I/O
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,
+    },
+}
+DATABASE_PROFILE = "balanced"
+
+# Connection pool (SQLite allows one writer, so a small pool is enough for the UI plus workers)
+DATABASE_POOL_SIZE = 5
+DATABASE_POOL_MAX_OVERFLOW = 5
+DATABASE_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+DATABASE_CONNECTION_LEAK_THRESHOLD = 60  # seconds a connection may stay checked out before it is reported
+# Capture the caller's stack on every pool checkout so leak reports say where a connection was taken
+# (costly: walks and formats the stack on every query; enable only while hunting a leak)
+DATABASE_TRACE_CONNECTION_CHECKOUTS = False
+
+# Restore: seconds to wait for checked-out connections to be returned before swapping files
+DATABASE_RESTORE_DRAIN_TIMEOUT = 10
+
+# Compaction: pages released per incremental_vacuum step (writers can run between steps)
+DATABASE_COMPACT_BATCH_PAGES = 256
+
+# Online backups: pages copied per backup step and pause between steps (seconds)
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_DELAY = 0.005
+
+# Incremental backup store: chunk size (a multiple of the SQLite page size) and snapshots kept
+BACKUP_CHUNK_SIZE = 65536
+BACKUP_RETAINED_SNAPSHOTS = 10
+
+# Exports: rows fetched from the database per round trip while streaming
+EXPORT_BATCH_SIZE = 1000
+# Tables exported in parallel (each worker holds one pooled connection) and tables never exported
+EXPORT_MAX_WORKERS = 4
+EXPORT_EXCLUDED_TABLES = {'users'}  # Password hashes stay in the database
+
+# Imports: rows inserted per transaction and bytes read to detect the delimiter
+IMPORT_BATCH_SIZE = 1000
+IMPORT_SNIFF_BYTES = 65536
+
+# Visit statistics: read the trigger-maintained daily rollup instead of scanning visit_records
+VISIT_STATISTICS_USE_ROLLUP = True
+
+# Dashboard statistics: seconds a cached result stays valid without data changes, and the check interval
+DASHBOARD_STATS_TTL = 300
+DASHBOARD_REFRESH_INTERVAL_MS = 30000
+
+# Backup archives: 'zlib' (fast) or 'lzma' (smaller), streamed in chunks of this many bytes
+BACKUP_ARCHIVE_COMPRESSION = 'zlib'
+BACKUP_STREAM_CHUNK_SIZE = 1048576
+
 # UI Configuration
 WINDOW_MIN_WIDTH = 1024
 WINDOW_MIN_HEIGHT = 600
@@ -40,6 +117,10 @@ TEETH_PER_QUADRANT = 7
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 LOG_FILE = Path(__file__).parent.parent / "logs" / "dental_app.log"
+LOG_MAX_BYTES = 2 * 1024 * 1024  # Rotate the log file at 2 MB
+LOG_BACKUP_COUNT = 5  # Rotated files kept (dental_app.log.1 ... .5)
+LOG_RATE_LIMIT_PER_SECOND = 20  # Sustained records per second per logger (below ERROR)
+LOG_RATE_LIMIT_BURST = 100  # Records a logger may emit at once before rate limiting applies
 
 # Ensure logs directory exists
 LOG_FILE.parent.mkdir(exist_ok=True)
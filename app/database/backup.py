@@ -0,0 +1,589 @@
+"""
+Online database backups built on the SQLite backup API.
+
+Copying the live file with ``shutil.copy2`` can capture a half-written
+transaction and, in WAL mode, misses pages that have not been checkpointed
+yet. ``sqlite3.Connection.backup`` copies a consistent snapshot page by page;
+copying in small steps and sleeping between them lets the clinic keep writing
+while a backup runs. In WAL mode the copy reads from a pinned snapshot;
+otherwise SQLite restarts it if another connection changes the source.
+
+``IncrementalBackupStore`` keeps many snapshots in the space of roughly one
+full copy plus the data that changed between them. ``create_backup_archive``
+writes a single compressed file with a checksum manifest for off-site copies.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from ..config import (
+    BACKUP_PAGES_PER_STEP, BACKUP_STEP_DELAY, BACKUP_CHUNK_SIZE, BACKUP_RETAINED_SNAPSHOTS,
+    BACKUP_ARCHIVE_COMPRESSION, BACKUP_STREAM_CHUNK_SIZE
+)
+from ..utils.progress import CancelToken, check_cancelled
+
+logger = logging.getLogger(__name__)
+
+# One lock per incremental store root, shared by every IncrementalBackupStore of that root
+_store_locks: Dict[Path, threading.Lock] = {}
+_store_locks_guard = threading.Lock()
+
+
+def _store_lock(root: Path) -> threading.Lock:
+    """Get the process-wide lock for an incremental store directory."""
+    key = root.resolve()
+    with _store_locks_guard:
+        return _store_locks.setdefault(key, threading.Lock())
+
+
+def _holding_store_lock(method):
+    """Run an IncrementalBackupStore method while holding its store's lock."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def quick_check(database_path: Union[str, Path]) -> str:
+    """
+    Run PRAGMA quick_check on a database file.
+
+    Returns:
+        'ok' if the file is sound, otherwise the first problem reported
+    """
+    connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def integrity_check(database_path: Union[str, Path]) -> str:
+    """
+    Run the full PRAGMA integrity_check on a database file.
+
+    Slower than quick_check (it also verifies index contents), so it is used
+    before a file replaces the live database.
+
+    Returns:
+        'ok' if the file is sound, otherwise the first problem reported
+    """
+    connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    try:
+        return connection.execute("PRAGMA integrity_check(1)").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def backup_database_file(source_path: Union[str, Path], backup_path: Union[str, Path],
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         pages_per_step: int = BACKUP_PAGES_PER_STEP,
+                         step_delay: float = BACKUP_STEP_DELAY,
+                         cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+    """
+    Copy a consistent snapshot of a live database to another file.
+
+    The copy is written next to the destination and only renamed into place
+    after it passes a quick_check, so a failed run never leaves a truncated
+    file under the final name.
+
+    Args:
+        source_path: Database file to back up
+        backup_path: Destination file (replaced if it exists)
+        progress_callback: Optional callable receiving (pages_copied, pages_total)
+        pages_per_step: Pages copied per backup step
+        step_delay: Seconds to sleep between steps so writers are not starved
+        cancel_token: Optional token checked after every step
+
+    Returns:
+        Dictionary with the backup path, page count and size in bytes
+
+    Raises:
+        FileNotFoundError: If the source database does not exist
+        sqlite3.DatabaseError: If the copy fails or does not pass quick_check
+        OperationCancelled: If the token was cancelled (the partial copy is removed)
+    """
+    source_path = Path(source_path)
+    backup_path = Path(backup_path)
+    if not source_path.exists():
+        raise FileNotFoundError(f"Database file not found: {source_path}")
+
+    backup_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = backup_path.with_name(backup_path.name + ".partial")
+    if temp_path.exists():
+        temp_path.unlink()
+
+    def on_step(status, remaining, total):
+        if progress_callback:
+            progress_callback(total - remaining, total)
+        # An exception raised here aborts Connection.backup and propagates to the caller
+        check_cancelled(cancel_token)
+        if remaining and step_delay:
+            time.sleep(step_delay)
+
+    try:
+        source = sqlite3.connect(str(source_path), isolation_level=None)
+        target = sqlite3.connect(str(temp_path))
+        try:
+            # Under WAL, pin a read snapshot so concurrent commits don't force the copy to restart
+            pinned = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+            if pinned:
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=pages_per_step, progress=on_step)
+            if pinned:
+                source.execute("COMMIT")
+            page_count = target.execute("PRAGMA page_count").fetchone()[0]
+            # A backup is a standalone file; keep it in rollback-journal mode so it has no -wal sidecar
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+
+        result = quick_check(temp_path)
+        if result != 'ok':
+            raise sqlite3.DatabaseError(f"Backup failed integrity check: {result}")
+        os.replace(temp_path, backup_path)
+    except Exception:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+    size_bytes = backup_path.stat().st_size
+    logger.info(f"Backed up {source_path} to {backup_path} ({page_count} pages, {size_bytes} bytes)")
+    return {
+        'backup_path': str(backup_path),
+        'pages': page_count,
+        'size_bytes': size_bytes
+    }
+
+
+class IncrementalBackupStore:
+    """
+    Content-addressed store of database snapshots.
+
+    Each snapshot is split into fixed-size chunks (a whole number of SQLite
+    pages) named by their SHA-256, so a chunk shared by several snapshots is
+    stored once and each new snapshot only adds the chunks that changed since
+    the ones already retained. Layout::
+
+        <root>/snapshots/<snapshot_id>.json   ordered chunk list and metadata
+        <root>/chunks/<ab>/<sha256>           raw chunk contents
+
+    Snapshots, restores and pruning of one store are serialized: a snapshot
+    references chunks before its manifest exists, so prune must never run
+    while one is being taken.
+    """
+
+    def __init__(self, root: Union[str, Path], chunk_size: int = BACKUP_CHUNK_SIZE):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.snapshots_dir = self.root / "snapshots"
+        self.chunks_dir = self.root / "chunks"
+        self._lock = _store_lock(self.root)
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.chunks_dir / digest[:2] / digest
+
+    def _manifest_path(self, snapshot_id: str) -> Path:
+        return self.snapshots_dir / f"{snapshot_id}.json"
+
+    @staticmethod
+    def _pin_database_file(connection: sqlite3.Connection, database_path: Path) -> Optional[int]:
+        """
+        Start a read transaction under which the database file itself is a consistent image.
+
+        Only possible in WAL mode: the log is checkpointed and truncated, then a
+        read transaction is started. A reader that starts on an empty log reads
+        only the database file and blocks further checkpoints, so the file
+        cannot change under it while writers keep appending to the log.
+
+        Returns:
+            Size in bytes of the pinned image, or None if the file cannot be pinned
+            (rollback journal mode, or log frames that could not be checkpointed)
+        """
+        if connection.execute("PRAGMA journal_mode").fetchone()[0].lower() != 'wal':
+            return None
+        busy, _, _ = connection.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        if busy:
+            return None
+
+        connection.execute("BEGIN")
+        connection.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        # A commit between the checkpoint and BEGIN would put part of our snapshot in the log
+        wal_path = Path(f"{database_path}-wal")
+        if wal_path.exists() and wal_path.stat().st_size > 0:
+            connection.execute("ROLLBACK")
+            return None
+        page_size = connection.execute("PRAGMA page_size").fetchone()[0]
+        page_count = connection.execute("PRAGMA page_count").fetchone()[0]
+        return page_size * page_count
+
+    def _store_chunks(self, image, size_bytes: int,
+                      progress_callback: Optional[Callable[[int, int], None]],
+                      cancel_token: Optional[CancelToken]) -> Dict[str, Any]:
+        """Hash size_bytes of a database image chunk by chunk, writing only chunks not yet stored."""
+        chunks = []
+        new_chunks = 0
+        new_bytes = 0
+        file_hash = hashlib.sha256()
+        done = 0
+        while done < size_bytes:
+            check_cancelled(cancel_token)
+            data = image.read(min(self.chunk_size, size_bytes - done))
+            if not data:
+                raise sqlite3.DatabaseError("Database file is shorter than its page count")
+            if done == 0 and data[18:20] == b'\x02\x02':
+                # Store a rollback-journal database (as the backup API copy is), not a WAL one
+                data = data[:18] + b'\x01\x01' + data[20:]
+            done += len(data)
+            file_hash.update(data)
+            digest = hashlib.sha256(data).hexdigest()
+            chunk_path = self._chunk_path(digest)
+            if not chunk_path.exists():
+                chunk_path.parent.mkdir(exist_ok=True)
+                temp_chunk = chunk_path.with_name(digest + ".partial")
+                temp_chunk.write_bytes(data)
+                os.replace(temp_chunk, chunk_path)
+                new_chunks += 1
+                new_bytes += len(data)
+            chunks.append(digest)
+            if progress_callback:
+                progress_callback(done, size_bytes)
+        return {'chunks': chunks, 'sha256': file_hash.hexdigest(),
+                'new_chunks': new_chunks, 'new_bytes': new_bytes}
+
+    @_holding_store_lock
+    def create_snapshot(self, source_path: Union[str, Path],
+                        progress_callback: Optional[Callable[[int, int], None]] = None,
+                        cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+        """
+        Add a snapshot of a live database to the store.
+
+        In WAL mode the live file is read in place under a pinned read
+        transaction (see _pin_database_file), so nothing but the changed chunks
+        is written. If the file cannot be pinned (rollback journal mode, busy
+        checkpoint) a consistent copy is staged with the online backup API
+        first. Either way every chunk is read and hashed: write I/O follows the
+        amount of changed data, read I/O still follows the database size.
+
+        Args:
+            source_path: Database file to snapshot
+            progress_callback: Optional callable receiving (bytes_done, bytes_total)
+            cancel_token: Optional token checked between chunks; chunks already
+                written stay in the store and are reused by the next snapshot
+
+        Returns:
+            Snapshot manifest plus 'new_chunks' and 'new_bytes' written by this run
+            and 'staged' (whether a staging copy was needed)
+        """
+        source_path = Path(source_path)
+        if not source_path.exists():
+            raise FileNotFoundError(f"Database file not found: {source_path}")
+        self.snapshots_dir.mkdir(parents=True, exist_ok=True)
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+
+        snapshot_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        staging_path = self.root / f"{snapshot_id}.staging.db"
+        try:
+            connection = sqlite3.connect(str(source_path), isolation_level=None)
+            try:
+                size_bytes = self._pin_database_file(connection, source_path)
+                if size_bytes is not None:
+                    with open(source_path, 'rb') as image:
+                        stored = self._store_chunks(image, size_bytes, progress_callback, cancel_token)
+                    connection.execute("COMMIT")
+            finally:
+                connection.close()
+
+            staged = size_bytes is None
+            if staged:
+                backup_database_file(source_path, staging_path, cancel_token=cancel_token)
+                size_bytes = staging_path.stat().st_size
+                with open(staging_path, 'rb') as image:
+                    stored = self._store_chunks(image, size_bytes, progress_callback, cancel_token)
+        finally:
+            if staging_path.exists():
+                staging_path.unlink()
+
+        manifest = {
+            'snapshot_id': snapshot_id,
+            'created_at': datetime.now().isoformat(),
+            'source': str(source_path),
+            'size_bytes': size_bytes,
+            'chunk_size': self.chunk_size,
+            'sha256': stored['sha256'],
+            'chunks': stored['chunks']
+        }
+        # The manifest is written last, so a snapshot only exists once all its chunks do
+        manifest_path = self._manifest_path(snapshot_id)
+        temp_manifest = manifest_path.with_name(manifest_path.name + ".partial")
+        temp_manifest.write_text(json.dumps(manifest), encoding='utf-8')
+        os.replace(temp_manifest, manifest_path)
+
+        logger.info(f"Incremental snapshot {snapshot_id}: {len(stored['chunks'])} chunks, "
+                    f"{stored['new_chunks']} new ({stored['new_bytes']} of {size_bytes} bytes written"
+                    f"{', staged copy' if staged else ''})")
+        return {**manifest, 'new_chunks': stored['new_chunks'], 'new_bytes': stored['new_bytes'],
+                'staged': staged}
+
+    def list_snapshots(self) -> List[Dict[str, Any]]:
+        """Get the retained snapshots (without chunk lists), oldest first."""
+        snapshots = []
+        for manifest_path in sorted(self.snapshots_dir.glob("*.json")):
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable snapshot manifest {manifest_path}: {e}")
+                continue
+            manifest.pop('chunks', None)
+            manifest['manifest_path'] = str(manifest_path)
+            snapshots.append(manifest)
+        return snapshots
+
+    @_holding_store_lock
+    def restore_snapshot(self, snapshot_id: str, target_path: Union[str, Path],
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Reconstruct a retained snapshot as a standalone database file.
+
+        The file is assembled next to the target, checked against the recorded
+        SHA-256 and PRAGMA quick_check, and only then renamed into place.
+
+        Raises:
+            FileNotFoundError: If the snapshot or one of its chunks is missing
+            sqlite3.DatabaseError: If the reconstructed file fails verification
+        """
+        manifest_path = self._manifest_path(snapshot_id)
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Snapshot not found: {snapshot_id}")
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+
+        target_path = Path(target_path)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target_path.with_name(target_path.name + ".partial")
+        try:
+            file_hash = hashlib.sha256()
+            total = len(manifest['chunks'])
+            with open(temp_path, 'wb') as target:
+                for done, digest in enumerate(manifest['chunks'], start=1):
+                    data = self._chunk_path(digest).read_bytes()
+                    file_hash.update(data)
+                    target.write(data)
+                    if progress_callback:
+                        progress_callback(done, total)
+
+            if file_hash.hexdigest() != manifest['sha256']:
+                raise sqlite3.DatabaseError(f"Snapshot {snapshot_id} failed checksum verification")
+            result = quick_check(temp_path)
+            if result != 'ok':
+                raise sqlite3.DatabaseError(f"Snapshot {snapshot_id} failed integrity check: {result}")
+            os.replace(temp_path, target_path)
+        except Exception:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+        logger.info(f"Restored snapshot {snapshot_id} to {target_path}")
+        return {'snapshot_id': snapshot_id, 'target_path': str(target_path), 'size_bytes': manifest['size_bytes']}
+
+    @_holding_store_lock
+    def prune(self, keep: int = BACKUP_RETAINED_SNAPSHOTS) -> int:
+        """
+        Drop all but the newest snapshots and delete chunks no snapshot references.
+
+        Returns:
+            Number of snapshots removed
+        """
+        manifests = sorted(self.snapshots_dir.glob("*.json"))
+        expired = manifests[:-keep] if keep > 0 else manifests
+        for manifest_path in expired:
+            manifest_path.unlink()
+            logger.info(f"Deleted old snapshot: {manifest_path.stem}")
+
+        if expired:
+            referenced = set()
+            for manifest_path in self.snapshots_dir.glob("*.json"):
+                referenced.update(json.loads(manifest_path.read_text(encoding='utf-8'))['chunks'])
+            for chunk_path in self.chunks_dir.glob("*/*"):
+                if chunk_path.name not in referenced:
+                    chunk_path.unlink()
+
+        return len(expired)
+
+
+ARCHIVE_FORMAT_VERSION = 1
+ARCHIVE_EXTENSION = ".dpbak"
+ARCHIVE_DATABASE_MEMBER = "database.db"
+ARCHIVE_MANIFEST_MEMBER = "manifest.json"
+ARCHIVE_COMPRESSION = {
+    'zlib': zipfile.ZIP_DEFLATED,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+
+def _database_manifest(database_path: Union[str, Path]) -> Dict[str, Any]:
+    """Collect schema version and per-table row counts from a database file."""
+    connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    try:
+        tables = [row[0] for row in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        return {
+            'schema_version': connection.execute("PRAGMA user_version").fetchone()[0],
+            'row_counts': {
+                table: connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                for table in tables
+            }
+        }
+    finally:
+        connection.close()
+
+
+def create_backup_archive(source_path: Union[str, Path], archive_path: Union[str, Path],
+                          progress_callback: Optional[Callable[[int, int], None]] = None,
+                          compression: str = BACKUP_ARCHIVE_COMPRESSION,
+                          cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+    """
+    Write a compressed backup archive of a live database.
+
+    The archive is a zip file holding the database (streamed through the
+    compressor in BACKUP_STREAM_CHUNK_SIZE pieces, so memory use does not grow
+    with the database) and a manifest with the schema version, row counts per
+    table and the SHA-256 of the uncompressed database.
+
+    Args:
+        source_path: Database file to back up
+        archive_path: Destination archive (replaced if it exists)
+        progress_callback: Optional callable receiving (bytes_done, bytes_total)
+        compression: 'zlib' or 'lzma'
+        cancel_token: Optional token checked between chunks
+
+    Returns:
+        The archive manifest
+    """
+    if compression not in ARCHIVE_COMPRESSION:
+        raise ValueError(f"Unknown archive compression: {compression}")
+
+    archive_path = Path(archive_path)
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
+    staging_path = archive_path.with_name(archive_path.name + ".staging.db")
+    temp_path = archive_path.with_name(archive_path.name + ".partial")
+    try:
+        backup_database_file(source_path, staging_path, cancel_token=cancel_token)
+        size_bytes = staging_path.stat().st_size
+        manifest = {
+            'format_version': ARCHIVE_FORMAT_VERSION,
+            'created_at': datetime.now().isoformat(),
+            'compression': compression,
+            'size_bytes': size_bytes,
+            **_database_manifest(staging_path)
+        }
+
+        content_hash = hashlib.sha256()
+        with zipfile.ZipFile(temp_path, 'w', compression=ARCHIVE_COMPRESSION[compression]) as archive:
+            with open(staging_path, 'rb') as staging, \
+                    archive.open(ARCHIVE_DATABASE_MEMBER, 'w', force_zip64=True) as member:
+                while True:
+                    check_cancelled(cancel_token)
+                    data = staging.read(BACKUP_STREAM_CHUNK_SIZE)
+                    if not data:
+                        break
+                    content_hash.update(data)
+                    member.write(data)
+                    if progress_callback:
+                        progress_callback(staging.tell(), size_bytes)
+            manifest['sha256'] = content_hash.hexdigest()
+            archive.writestr(ARCHIVE_MANIFEST_MEMBER, json.dumps(manifest, indent=2))
+
+        os.replace(temp_path, archive_path)
+    finally:
+        for path in (staging_path, temp_path):
+            if path.exists():
+                path.unlink()
+
+    logger.info(f"Backup archive created: {archive_path} ({size_bytes} bytes -> "
+                f"{archive_path.stat().st_size} bytes, {compression})")
+    return manifest
+
+
+def read_archive_manifest(archive_path: Union[str, Path]) -> Dict[str, Any]:
+    """Read the manifest of a backup archive without touching the database member."""
+    with zipfile.ZipFile(archive_path) as archive:
+        return json.loads(archive.read(ARCHIVE_MANIFEST_MEMBER).decode('utf-8'))
+
+
+def verify_backup_archive(archive_path: Union[str, Path], extract_to: Optional[Union[str, Path]] = None,
+                          progress_callback: Optional[Callable[[int, int], None]] = None,
+                          cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
+    """
+    Check a backup archive against its manifest, optionally extracting it.
+
+    The database member is streamed through SHA-256 in chunks. When
+    ``extract_to`` is given the database is written there in the same pass,
+    checked with PRAGMA quick_check and against the manifest's per-table row
+    counts, and renamed into place only if everything matches.
+
+    Returns:
+        The archive manifest
+
+    Raises:
+        zipfile.BadZipFile, KeyError: If the file is not a backup archive
+        sqlite3.DatabaseError: If the content does not match the manifest
+        OperationCancelled: If the token was cancelled
+    """
+    manifest = read_archive_manifest(archive_path)
+    target_path = Path(extract_to) if extract_to else None
+    temp_path = target_path.with_name(target_path.name + ".partial") if target_path else None
+
+    try:
+        content_hash = hashlib.sha256()
+        done = 0
+        output = open(temp_path, 'wb') if temp_path else None
+        try:
+            with zipfile.ZipFile(archive_path) as archive, archive.open(ARCHIVE_DATABASE_MEMBER) as member:
+                while True:
+                    check_cancelled(cancel_token)
+                    data = member.read(BACKUP_STREAM_CHUNK_SIZE)
+                    if not data:
+                        break
+                    content_hash.update(data)
+                    if output:
+                        output.write(data)
+                    done += len(data)
+                    if progress_callback:
+                        progress_callback(done, manifest['size_bytes'])
+        finally:
+            if output:
+                output.close()
+
+        if done != manifest['size_bytes'] or content_hash.hexdigest() != manifest['sha256']:
+            raise sqlite3.DatabaseError(f"Backup archive {archive_path} does not match its manifest checksum")
+
+        if temp_path:
+            result = quick_check(temp_path)
+            if result != 'ok':
+                raise sqlite3.DatabaseError(f"Backup archive {archive_path} failed integrity check: {result}")
+            row_counts = _database_manifest(temp_path)['row_counts']
+            if row_counts != manifest['row_counts']:
+                mismatched = sorted(table for table in set(row_counts) | set(manifest['row_counts'])
+                                    if row_counts.get(table) != manifest['row_counts'].get(table))
+                raise sqlite3.DatabaseError(f"Backup archive {archive_path} does not match its manifest "
+                                            f"row counts: {', '.join(mismatched)}")
+            os.replace(temp_path, target_path)
+    finally:
+        if temp_path and temp_path.exists():
+            temp_path.unlink()
+
+    logger.info(f"Verified backup archive {archive_path}")
+    return manifest
@@ -2,12 +2,28 @@
 Database connection and setup utilities.
 """
 import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Iterator, List, Dict, Any, Optional, Callable
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 from .models import Base, User
-from ..config import DATABASE_PATH
+from .migrations import run_migrations, get_schema_version
+from .backup import backup_database_file, integrity_check
+from ..config import (
+    DATABASE_PATH, DATABASE_PROFILES, DATABASE_PROFILE,
+    DATABASE_POOL_SIZE, DATABASE_POOL_MAX_OVERFLOW, DATABASE_POOL_TIMEOUT,
+    DATABASE_CONNECTION_LEAK_THRESHOLD, DATABASE_TRACE_CONNECTION_CHECKOUTS,
+    DATABASE_COMPACT_BATCH_PAGES, DATABASE_RESTORE_DRAIN_TIMEOUT
+)
 import bcrypt
 
 logger = logging.getLogger(__name__)
@@ -16,38 +32,96 @@ logger = logging.getLogger(__name__)
 class DatabaseManager:
     """Manages database connections and operations."""
     
-    def __init__(self, database_path: Path = DATABASE_PATH):
+    # Order matters: busy_timeout first so switching journal mode can wait on other connections
+    PRAGMA_ORDER = ['busy_timeout', 'auto_vacuum', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store']
+    
+    def __init__(self, database_path: Path = DATABASE_PATH, profile: str = DATABASE_PROFILE):
         self.database_path = database_path
+        self.profile = profile
         self.engine = None
         self.SessionLocal = None
         
+        # Record the caller's stack on checkout (leak hunting only; costs a stack walk per query)
+        self.trace_checkouts = DATABASE_TRACE_CONNECTION_CHECKOUTS
+        
+        # Checked-out connections: id(dbapi connection) -> (checkout time, caller stack or None)
+        self._checked_out: Dict[int, tuple] = {}
+        self._checked_out_lock = threading.Lock()
+        self._peak_checked_out = 0
+        self._reported_leaks = set()
+        
+        # Callables run after the database file is replaced (cache invalidation)
+        self._reload_listeners: List[Callable[[], None]] = []
+    
+    def get_profile_pragmas(self) -> dict:
+        """Get the PRAGMA settings of the configured performance profile."""
+        if self.profile not in DATABASE_PROFILES:
+            logger.warning(f"Unknown database profile '{self.profile}', using '{DATABASE_PROFILE}'")
+            return DATABASE_PROFILES[DATABASE_PROFILE]
+        return DATABASE_PROFILES[self.profile]
+    
+    def _apply_pragmas(self, dbapi_connection, connection_record):
+        """Apply foreign keys and the performance profile to a new pooled connection."""
+        pragmas = self.get_profile_pragmas()
+        cursor = dbapi_connection.cursor()
+        try:
+            # Enable foreign key constraints for SQLite
+            cursor.execute("PRAGMA foreign_keys=ON")
+            for name in self.PRAGMA_ORDER:
+                if name in pragmas:
+                    cursor.execute(f"PRAGMA {name}={pragmas[name]}")
+        finally:
+            cursor.close()
+    
+    def get_connection_settings(self) -> dict:
+        """Read back the effective PRAGMA values from a live connection."""
+        settings = {}
+        if not self.engine:
+            return settings
+        with self.engine.connect() as connection:
+            for name in ['foreign_keys'] + self.PRAGMA_ORDER:
+                settings[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        return settings
+        
     def initialize_database(self):
         """Initialize database connection and create tables."""
         try:
+            # Re-initializing replaces the engine; release the old pool and its listeners
+            if self.engine:
+                self.engine.dispose()
+            
             # Create SQLite database connection
             self.engine = create_engine(
                 f"sqlite:///{self.database_path}",
                 echo=False,  # Set to True for SQL debugging
-                connect_args={"check_same_thread": False}
+                connect_args={"check_same_thread": False},
+                poolclass=QueuePool,
+                pool_size=DATABASE_POOL_SIZE,
+                max_overflow=DATABASE_POOL_MAX_OVERFLOW,
+                pool_timeout=DATABASE_POOL_TIMEOUT
             )
             
-            # Enable foreign key constraints for SQLite
-            @event.listens_for(Engine, "connect")
-            def set_sqlite_pragma(dbapi_connection, connection_record):
-                cursor = dbapi_connection.cursor()
-                cursor.execute("PRAGMA foreign_keys=ON")
-                cursor.close()
+            # Apply foreign keys and the performance profile on every pooled connection
+            event.listen(self.engine, "connect", self._apply_pragmas)
+            
+            # Track checked-out connections for pool status and leak detection
+            event.listen(self.engine, "checkout", self._on_checkout)
+            event.listen(self.engine, "checkin", self._on_checkin)
             
             # Create all tables
             Base.metadata.create_all(bind=self.engine)
             
+            # Bring existing databases up to the current schema version
+            schema_version = run_migrations(self.engine)
+            logger.info(f"Database schema version {schema_version}")
+            
             # Create session factory
             self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
             
             # Create default admin user if none exists
             self._create_default_user()
             
-            logger.info(f"Database initialized successfully at {self.database_path}")
+            logger.info(f"Database initialized successfully at {self.database_path} (profile: {self.profile})")
             return True
             
         except Exception as e:
@@ -60,6 +134,91 @@ class DatabaseManager:
             raise RuntimeError("Database not initialized. Call initialize_database() first.")
         return self.SessionLocal()
     
+    @contextmanager
+    def session_scope(self) -> Iterator[Session]:
+        """
+        Provide a unit of work: commit on success, roll back on error, always close.
+        
+        Usage:
+            with db_manager.session_scope() as session:
+                session.add(obj)
+        """
+        session = self.get_session()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+    
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        """Record when (and, if tracing is enabled, where) a pooled connection was checked out."""
+        stack = self._checkout_stack() if self.trace_checkouts else None
+        with self._checked_out_lock:
+            self._checked_out[id(dbapi_connection)] = (time.monotonic(), stack)
+            self._peak_checked_out = max(self._peak_checked_out, len(self._checked_out))
+    
+    @staticmethod
+    def _checkout_stack() -> str:
+        """Format the application frames of the current stack (skips SQLAlchemy internals)."""
+        frames = [frame for frame in traceback.extract_stack()[:-2]
+                  if 'sqlalchemy' not in frame.filename and '<sqlalchemy' not in frame.filename]
+        return ''.join(traceback.format_list(frames[-8:]))
+    
+    def _on_checkin(self, dbapi_connection, connection_record):
+        """Forget a connection returned to the pool."""
+        with self._checked_out_lock:
+            self._checked_out.pop(id(dbapi_connection), None)
+            self._reported_leaks.discard(id(dbapi_connection))
+    
+    def get_pool_status(self) -> Dict[str, Any]:
+        """Get connection pool usage counters."""
+        if not self.engine:
+            return {}
+        pool = self.engine.pool
+        with self._checked_out_lock:
+            checked_out = len(self._checked_out)
+            peak = self._peak_checked_out
+        return {
+            'pool_size': pool.size(),
+            'max_overflow': DATABASE_POOL_MAX_OVERFLOW,
+            'checked_out': checked_out,
+            'checked_in': pool.checkedin(),
+            'overflow': max(0, pool.overflow()),
+            'peak_checked_out': peak
+        }
+    
+    def check_for_leaks(self, threshold_seconds: float = DATABASE_CONNECTION_LEAK_THRESHOLD) -> List[Dict[str, Any]]:
+        """
+        Report connections held longer than the threshold (usually a session that was never closed).
+        
+        Returns:
+            List of dictionaries with the held duration and the checkout stack
+            (None unless trace_checkouts is enabled)
+        """
+        now = time.monotonic()
+        leaks = []
+        newly_leaked = []
+        with self._checked_out_lock:
+            for key, (checked_out_at, stack) in self._checked_out.items():
+                held_seconds = now - checked_out_at
+                if held_seconds > threshold_seconds:
+                    leaks.append({'held_seconds': held_seconds, 'stack': stack})
+                    if key not in self._reported_leaks:
+                        self._reported_leaks.add(key)
+                        newly_leaked.append((held_seconds, stack))
+        
+        # Warn once per leaked connection
+        for held_seconds, stack in newly_leaked:
+            if stack:
+                logger.warning(f"Database connection held for {held_seconds:.0f}s, checked out at:\n{stack}")
+            else:
+                logger.warning(f"Database connection held for {held_seconds:.0f}s "
+                               f"(set DATABASE_TRACE_CONNECTION_CHECKOUTS to record where it was checked out)")
+        return leaks
+    
     def _create_default_user(self):
         """Create default admin user if none exists."""
         try:
@@ -89,17 +248,206 @@ class DatabaseManager:
         except Exception as e:
             logger.error(f"Failed to create default user: {str(e)}")
     
-    def backup_database(self, backup_path: Path):
-        """Create a backup of the database."""
+    def backup_database(self, backup_path: Path,
+                        progress_callback: Optional[Callable[[int, int], None]] = None):
+        """Create a consistent online backup of the database."""
         try:
-            import shutil
-            shutil.copy2(self.database_path, backup_path)
-            logger.info(f"Database backed up to {backup_path}")
+            backup_database_file(self.database_path, backup_path, progress_callback)
             return True
         except Exception as e:
             logger.error(f"Failed to backup database: {str(e)}")
             return False
     
+    def add_reload_listener(self, callback: Callable[[], None]):
+        """Register a callable to run after restore_database swaps in a new file."""
+        self._reload_listeners.append(callback)
+    
+    def _wait_for_connections(self, timeout: float) -> bool:
+        """Wait until every pooled connection has been returned."""
+        deadline = time.time() + timeout
+        while True:
+            with self._checked_out_lock:
+                if not self._checked_out:
+                    return True
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.05)
+    
+    def restore_database(self, candidate_path: Path,
+                         drain_timeout: float = DATABASE_RESTORE_DRAIN_TIMEOUT,
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Replace the live database with a backup without restarting the application.
+        
+        The candidate is staged next to the database and must pass PRAGMA
+        integrity_check. A safety backup of the current data is taken, the pool
+        is drained and disposed, stale WAL files are removed, and the staged
+        file is renamed over the database in one step. The engine is then
+        re-opened (migrating older backups) and reload listeners are notified.
+        If re-opening fails the previous database is put back.
+        
+        Blocks for as long as the copies, the integrity check and the pool drain
+        take; call it from a worker thread so the event loop can keep releasing
+        connections.
+        
+        Args:
+            candidate_path: Database file to restore (left untouched)
+            drain_timeout: Seconds to wait for checked-out connections
+            progress_callback: Optional callable receiving (steps_done, steps_total)
+            
+        Returns:
+            Dictionary with the safety backup path and the restored schema version
+            
+        Raises:
+            sqlite3.DatabaseError: If the candidate fails the integrity check
+            RuntimeError: If connections stay checked out or the restored file cannot be opened
+        """
+        database_path = Path(self.database_path)
+        staged_path = database_path.with_name(database_path.name + ".restore")
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        safety_path = database_path.with_name(f"pre_restore_backup_{timestamp}.db")
+        
+        def report(step):
+            if progress_callback:
+                progress_callback(step, 5)
+        
+        # Stage on the same file system so the final rename is atomic, then validate the staged copy
+        report(0)
+        shutil.copyfile(candidate_path, staged_path)
+        try:
+            report(1)
+            result = integrity_check(staged_path)
+            if result != 'ok':
+                raise sqlite3.DatabaseError(f"Backup failed integrity check: {result}")
+            
+            report(2)
+            if database_path.exists():
+                backup_database_file(database_path, safety_path)
+            
+            report(3)
+            if self.engine:
+                if not self._wait_for_connections(drain_timeout):
+                    raise RuntimeError("Database is still in use; close open records and try again")
+                self.engine.dispose()
+                self.engine = None
+                self.SessionLocal = None
+            
+            # A leftover WAL belongs to the old file and must not be replayed into the restored one
+            for suffix in ("-wal", "-shm"):
+                sidecar = database_path.with_name(database_path.name + suffix)
+                if sidecar.exists():
+                    sidecar.unlink()
+            
+            os.replace(staged_path, database_path)
+        except Exception:
+            # Nothing was swapped; make sure the current database is open again
+            if self.engine is None:
+                self.initialize_database()
+            raise
+        finally:
+            if staged_path.exists():
+                staged_path.unlink()
+        
+        report(4)
+        if not self.initialize_database():
+            if safety_path.exists():
+                logger.error(f"Restored database could not be opened; putting back {safety_path}")
+                shutil.copyfile(safety_path, database_path)
+                self.initialize_database()
+            raise RuntimeError("Restored database could not be opened")
+        
+        for callback in self._reload_listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Reload listener failed after restore: {str(e)}")
+        report(5)
+        
+        logger.info(f"Database restored from {candidate_path} (safety backup: {safety_path})")
+        return {
+            'safety_backup': str(safety_path) if safety_path.exists() else None,
+            'schema_version': self.get_schema_version()
+        }
+    
+    def compact_database(self, progress_callback: Optional[Callable[[int, int], None]] = None,
+                         batch_pages: int = DATABASE_COMPACT_BATCH_PAGES) -> Dict[str, Any]:
+        """
+        Return free pages to the file system.
+        
+        The first run on a database without incremental auto-vacuum performs a full VACUUM
+        that also switches it to auto_vacuum=INCREMENTAL. Later runs release free pages with
+        PRAGMA incremental_vacuum in bounded batches, committing between batches so other
+        connections can write. Safe to call from a worker thread.
+        
+        Args:
+            progress_callback: Optional callable receiving (pages_done, pages_total)
+            batch_pages: Number of pages released per incremental step
+            
+        Returns:
+            Dictionary with the mode used and file sizes before and after
+        """
+        if not self.engine:
+            raise RuntimeError("Database not initialized. Call initialize_database() first.")
+        
+        raw_connection = self.engine.raw_connection()
+        sqlite_connection = raw_connection.driver_connection
+        previous_isolation = sqlite_connection.isolation_level
+        try:
+            # VACUUM and incremental_vacuum must run outside an explicit transaction
+            sqlite_connection.isolation_level = None
+            
+            def pragma(statement):
+                return sqlite_connection.execute(f"PRAGMA {statement}").fetchone()
+            
+            page_size = pragma("page_size")[0]
+            bytes_before = pragma("page_count")[0] * page_size
+            free_pages = pragma("freelist_count")[0]
+            
+            if pragma("auto_vacuum")[0] != 2:  # 2 = INCREMENTAL
+                mode = 'full'
+                if progress_callback:
+                    progress_callback(0, 1)
+                pragma("auto_vacuum=INCREMENTAL")
+                sqlite_connection.execute("VACUUM")
+                if progress_callback:
+                    progress_callback(1, 1)
+            else:
+                mode = 'incremental'
+                released = 0
+                while True:
+                    remaining = pragma("freelist_count")[0]
+                    if progress_callback:
+                        progress_callback(free_pages - remaining, free_pages)
+                    if remaining == 0 or released >= free_pages:
+                        break
+                    # executescript steps the pragma to completion; execute() frees a single page
+                    sqlite_connection.executescript(f"PRAGMA incremental_vacuum({int(batch_pages)});")
+                    released += batch_pages
+            
+            # Fold the WAL back into the main file so the size change is visible on disk
+            pragma("wal_checkpoint(TRUNCATE)")
+            bytes_after = pragma("page_count")[0] * page_size
+        finally:
+            sqlite_connection.isolation_level = previous_isolation
+            raw_connection.close()
+        
+        result = {
+            'mode': mode,
+            'free_pages': free_pages,
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_reclaimed': max(0, bytes_before - bytes_after)
+        }
+        logger.info(f"Database compacted ({mode}): reclaimed {result['bytes_reclaimed']} bytes")
+        return result
+    
+    def get_schema_version(self) -> int:
+        """Get the schema version recorded in the database file."""
+        if not self.engine:
+            return 0
+        with self.engine.connect() as connection:
+            return get_schema_version(connection)
+    
     def get_database_path(self) -> str:
         """Get the database file path."""
         return str(self.database_path)
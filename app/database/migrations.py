@@ -0,0 +1,366 @@
+"""
+Versioned schema migrations for existing databases.
+
+``Base.metadata.create_all`` only creates missing tables, so anything added to
+an existing table (indexes, new columns, backfills) is applied here. The applied
+version is stored in SQLite's ``PRAGMA user_version``.
+"""
+import json
+import logging
+from datetime import date
+from typing import Any, Callable, List, Tuple
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from .models import Base, IdSequence, Patient, ToothHistory, ToothHistoryEvent, VisitDailyStats
+from .sequences import PATIENT_ID_SEQUENCE
+from ..utils.constants import PATIENT_ID_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+def get_schema_version(connection: Connection) -> int:
+    """Get the schema version recorded in the database file."""
+    return connection.exec_driver_sql("PRAGMA user_version").scalar() or 0
+
+
+def _set_schema_version(connection: Connection, version: int):
+    """Record the schema version in the database file."""
+    connection.exec_driver_sql(f"PRAGMA user_version={int(version)}")
+
+
+def _create_model_indexes(connection: Connection):
+    """Create every index declared on the models that does not exist yet."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=connection, checkfirst=True)
+            logger.debug(f"Ensured index {index.name} on {table.name}")
+
+
+def _create_id_sequences(connection: Connection):
+    """Create the ID sequence table and start the patient sequence after the highest existing patient ID."""
+    IdSequence.__table__.create(bind=connection, checkfirst=True)
+    
+    highest = 0
+    for (patient_id,) in connection.execute(select(Patient.patient_id)):
+        suffix = patient_id[len(PATIENT_ID_PREFIX):]
+        if patient_id.startswith(PATIENT_ID_PREFIX) and suffix.isdigit():
+            highest = max(highest, int(suffix))
+    
+    sequence = IdSequence.__table__
+    if connection.execute(select(sequence.c.name).where(sequence.c.name == PATIENT_ID_SEQUENCE)).first() is None:
+        connection.execute(insert(sequence).values(name=PATIENT_ID_SEQUENCE, next_value=highest + 1))
+
+
+def _json_list(value: Any) -> list:
+    """Parse a legacy JSON history column, treating bad or missing values as empty."""
+    try:
+        parsed = json.loads(value) if value else []
+    except (TypeError, ValueError):
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def _create_tooth_history_events(connection: Connection):
+    """
+    Copy the JSON history lists of tooth_history into one tooth_history_events row per entry.
+    
+    The legacy columns are left in place (no longer written or read), so the
+    conversion can be checked or redone from the original data. The copy is
+    verified per record before the migration commits.
+    
+    Raises:
+        RuntimeError: If the events written do not match the legacy lists (nothing is committed)
+    """
+    ToothHistoryEvent.__table__.create(bind=connection, checkfirst=True)
+    
+    history = ToothHistory.__table__
+    events = []
+    expected_counts = {}
+    for row in connection.execute(select(history)):
+        statuses = _json_list(row.status_history)
+        descriptions = _json_list(row.description_history)
+        dates = _json_list(row.date_history)
+        if not statuses:
+            # Records written without lists still have their latest state
+            statuses = [row.status.split(',') if row.status else []]
+            descriptions = [row.description]
+            dates = [row.date_recorded.isoformat() if row.date_recorded else None]
+        
+        expected_counts[row.id] = len(statuses)
+        for index, entry_statuses in enumerate(statuses):
+            try:
+                recorded = date.fromisoformat(dates[index])
+            except (IndexError, TypeError, ValueError):
+                recorded = row.date_recorded
+            events.append({
+                'history_id': row.id,
+                'patient_id': row.patient_id,
+                'tooth_number': row.tooth_number,
+                'record_type': row.record_type,
+                'status': ",".join(entry_statuses) if isinstance(entry_statuses, list) else entry_statuses,
+                'description': descriptions[index] if index < len(descriptions) else None,
+                'date_recorded': recorded or date.today(),
+                'created_at': row.created_at
+            })
+    
+    if events:
+        connection.execute(insert(ToothHistoryEvent.__table__), events)
+    
+    event_table = ToothHistoryEvent.__table__
+    written_counts = dict(connection.execute(
+        select(event_table.c.history_id, func.count()).group_by(event_table.c.history_id)
+    ).all())
+    mismatched = [history_id for history_id, count in expected_counts.items()
+                  if written_counts.get(history_id, 0) != count]
+    if mismatched:
+        raise RuntimeError(f"Tooth history conversion mismatch for records {mismatched[:10]}")
+    logger.info(f"Migrated {len(events)} tooth history entries to tooth_history_events")
+
+
+# Triggers keeping visit_daily_stats in step with visit_records. Totals are rounded
+# to cents on every change, so repeated float additions and subtractions on the
+# NUMERIC column cannot drift, and only the decremented row is checked for removal.
+VISIT_DAILY_STATS_TRIGGER_NAMES = ['visit_daily_stats_insert', 'visit_daily_stats_delete', 'visit_daily_stats_update']
+VISIT_DAILY_STATS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS visit_daily_stats_insert AFTER INSERT ON visit_records BEGIN
+        INSERT INTO visit_daily_stats (visit_date, status, visit_type, visit_count, total_cost)
+        VALUES (NEW.visit_date, COALESCE(NEW.status, ''), COALESCE(NEW.visit_type, ''), 1,
+                ROUND(COALESCE(NEW.cost, 0), 2))
+        ON CONFLICT (visit_date, status, visit_type) DO UPDATE SET
+            visit_count = visit_count + 1, total_cost = ROUND(total_cost + excluded.total_cost, 2);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS visit_daily_stats_delete AFTER DELETE ON visit_records BEGIN
+        UPDATE visit_daily_stats
+        SET visit_count = visit_count - 1, total_cost = ROUND(total_cost - COALESCE(OLD.cost, 0), 2)
+        WHERE visit_date = OLD.visit_date AND status = COALESCE(OLD.status, '')
+          AND visit_type = COALESCE(OLD.visit_type, '');
+        DELETE FROM visit_daily_stats
+        WHERE visit_date = OLD.visit_date AND status = COALESCE(OLD.status, '')
+          AND visit_type = COALESCE(OLD.visit_type, '') AND visit_count <= 0;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS visit_daily_stats_update
+    AFTER UPDATE OF visit_date, status, visit_type, cost ON visit_records BEGIN
+        UPDATE visit_daily_stats
+        SET visit_count = visit_count - 1, total_cost = ROUND(total_cost - COALESCE(OLD.cost, 0), 2)
+        WHERE visit_date = OLD.visit_date AND status = COALESCE(OLD.status, '')
+          AND visit_type = COALESCE(OLD.visit_type, '');
+        DELETE FROM visit_daily_stats
+        WHERE visit_date = OLD.visit_date AND status = COALESCE(OLD.status, '')
+          AND visit_type = COALESCE(OLD.visit_type, '') AND visit_count <= 0;
+        INSERT INTO visit_daily_stats (visit_date, status, visit_type, visit_count, total_cost)
+        VALUES (NEW.visit_date, COALESCE(NEW.status, ''), COALESCE(NEW.visit_type, ''), 1,
+                ROUND(COALESCE(NEW.cost, 0), 2))
+        ON CONFLICT (visit_date, status, visit_type) DO UPDATE SET
+            visit_count = visit_count + 1, total_cost = ROUND(total_cost + excluded.total_cost, 2);
+    END
+    """,
+]
+
+
+def rebuild_visit_daily_stats(connection: Connection):
+    """Recompute visit_daily_stats from visit_records."""
+    connection.exec_driver_sql("DELETE FROM visit_daily_stats")
+    connection.exec_driver_sql("""
+        INSERT INTO visit_daily_stats (visit_date, status, visit_type, visit_count, total_cost)
+        SELECT visit_date, COALESCE(status, ''), COALESCE(visit_type, ''), COUNT(*), ROUND(COALESCE(SUM(cost), 0), 2)
+        FROM visit_records
+        GROUP BY visit_date, COALESCE(status, ''), COALESCE(visit_type, '')
+    """)
+
+
+def _create_visit_daily_stats(connection: Connection):
+    """Create the daily visit rollup, fill it from existing visits and install its triggers."""
+    VisitDailyStats.__table__.create(bind=connection, checkfirst=True)
+    rebuild_visit_daily_stats(connection)
+    for trigger in VISIT_DAILY_STATS_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+
+
+def _replace_visit_daily_stats_triggers(connection: Connection):
+    """Reinstall the visit rollup triggers and recompute the rollup, removing accumulated float drift."""
+    for name in VISIT_DAILY_STATS_TRIGGER_NAMES:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    for trigger in VISIT_DAILY_STATS_TRIGGERS:
+        connection.exec_driver_sql(trigger)
+    rebuild_visit_daily_stats(connection)
+
+
+# Trailing digits indexed as a second phone token, so numbers stored with a
+# country code are also found by their national number
+PHONE_NATIONAL_DIGITS = 10
+
+
+def _phone_digits_sql(row: str) -> str:
+    """
+    SQL expression for the phone tokens of row.phone_number.
+    
+    The digits only (SQLite has no regex replace), followed by the last
+    PHONE_NATIONAL_DIGITS digits when the number is longer than that.
+    """
+    digits = f"COALESCE({row}.phone_number, '')"
+    for separator in (' ', '-', '+', '(', ')', '.', '/'):
+        digits = f"replace({digits}, '{separator}', '')"
+    return (f"CASE WHEN length({digits}) > {PHONE_NATIONAL_DIGITS} "
+            f"THEN {digits} || ' ' || substr({digits}, -{PHONE_NATIONAL_DIGITS}) ELSE {digits} END")
+
+
+# Full-text index over patients (rowid = patients.id) and the triggers keeping it in sync
+PATIENT_SEARCH_TABLE = "patients_fts"
+PATIENT_SEARCH_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {PATIENT_SEARCH_TABLE} USING fts5(
+        full_name, patient_id, phone_digits, email,
+        tokenize = "unicode61 remove_diacritics 2", prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_insert AFTER INSERT ON patients BEGIN
+        INSERT INTO {PATIENT_SEARCH_TABLE} (rowid, full_name, patient_id, phone_digits, email)
+        VALUES (NEW.id, NEW.full_name, NEW.patient_id, {_phone_digits_sql('NEW')}, NEW.email);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_delete AFTER DELETE ON patients BEGIN
+        DELETE FROM {PATIENT_SEARCH_TABLE} WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_fts_update
+    AFTER UPDATE OF full_name, patient_id, phone_number, email ON patients BEGIN
+        DELETE FROM {PATIENT_SEARCH_TABLE} WHERE rowid = OLD.id;
+        INSERT INTO {PATIENT_SEARCH_TABLE} (rowid, full_name, patient_id, phone_digits, email)
+        VALUES (NEW.id, NEW.full_name, NEW.patient_id, {_phone_digits_sql('NEW')}, NEW.email);
+    END
+    """,
+]
+
+
+def rebuild_patient_search_index(connection: Connection):
+    """Recompute the patient full-text index from the patients table."""
+    connection.exec_driver_sql(f"DELETE FROM {PATIENT_SEARCH_TABLE}")
+    connection.exec_driver_sql(f"""
+        INSERT INTO {PATIENT_SEARCH_TABLE} (rowid, full_name, patient_id, phone_digits, email)
+        SELECT id, full_name, patient_id, {_phone_digits_sql('patients')}, email FROM patients
+    """)
+
+
+def _create_virtual_table(connection: Connection, table: str, ddl: List[str]) -> bool:
+    """
+    Create a virtual table and its triggers (ddl[0] creates the table).
+    
+    SQLite builds without FTS5, or older than 3.34 for the trigram tokenizer,
+    reject the table. That is logged and nothing else is created, so the
+    migration still completes and patient search falls back to a substring scan.
+    
+    Returns:
+        True if the table was created
+    """
+    try:
+        connection.exec_driver_sql(ddl[0])
+    except OperationalError as e:
+        logger.warning(f"Search index {table} unavailable in this SQLite build ({e.orig}); "
+                       f"patient search will scan the patients table instead")
+        return False
+    for statement in ddl[1:]:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+def _create_patient_search_index(connection: Connection):
+    """Create the FTS5 patient search index, fill it and install its triggers."""
+    if _create_virtual_table(connection, PATIENT_SEARCH_TABLE, PATIENT_SEARCH_DDL):
+        rebuild_patient_search_index(connection)
+
+
+# Trigram index answering the substring searches of the former ILIKE '%term%' scan
+# (name, patient ID, phone number as entered and as digits, email), kept in sync the same way
+PATIENT_SUBSTRING_TABLE = "patients_trigram"
+PATIENT_SUBSTRING_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {PATIENT_SUBSTRING_TABLE} USING fts5(
+        full_name, patient_id, phone_number, phone_digits, email, tokenize = 'trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_trigram_insert AFTER INSERT ON patients BEGIN
+        INSERT INTO {PATIENT_SUBSTRING_TABLE} (rowid, full_name, patient_id, phone_number, phone_digits, email)
+        VALUES (NEW.id, NEW.full_name, NEW.patient_id, NEW.phone_number, {_phone_digits_sql('NEW')}, NEW.email);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_trigram_delete AFTER DELETE ON patients BEGIN
+        DELETE FROM {PATIENT_SUBSTRING_TABLE} WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS patients_trigram_update
+    AFTER UPDATE OF full_name, patient_id, phone_number, email ON patients BEGIN
+        DELETE FROM {PATIENT_SUBSTRING_TABLE} WHERE rowid = OLD.id;
+        INSERT INTO {PATIENT_SUBSTRING_TABLE} (rowid, full_name, patient_id, phone_number, phone_digits, email)
+        VALUES (NEW.id, NEW.full_name, NEW.patient_id, NEW.phone_number, {_phone_digits_sql('NEW')}, NEW.email);
+    END
+    """,
+]
+
+
+def rebuild_patient_substring_index(connection: Connection):
+    """Recompute the patient trigram index from the patients table."""
+    connection.exec_driver_sql(f"DELETE FROM {PATIENT_SUBSTRING_TABLE}")
+    connection.exec_driver_sql(f"""
+        INSERT INTO {PATIENT_SUBSTRING_TABLE} (rowid, full_name, patient_id, phone_number, phone_digits, email)
+        SELECT id, full_name, patient_id, phone_number, {_phone_digits_sql('patients')}, email FROM patients
+    """)
+
+
+def _create_patient_substring_index(connection: Connection):
+    """Create the trigram patient index, fill it and install its triggers."""
+    if _create_virtual_table(connection, PATIENT_SUBSTRING_TABLE, PATIENT_SUBSTRING_DDL):
+        rebuild_patient_substring_index(connection)
+
+
+# Ordered (version, description, step) list; append new steps, never reorder
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Create query indexes declared on the models", _create_model_indexes),
+    (2, "Create ID sequences for block allocation of patient IDs", _create_id_sequences),
+    (3, "Move tooth history JSON lists into tooth_history_events", _create_tooth_history_events),
+    (4, "Create the daily visit statistics rollup", _create_visit_daily_stats),
+    (5, "Index examination dates for the dashboard statistics", _create_model_indexes),
+    (6, "Create the FTS5 patient search index", _create_patient_search_index),
+    (7, "Create the trigram index for substring patient search", _create_patient_substring_index),
+    (8, "Scope and round the daily visit statistics triggers", _replace_visit_daily_stats_triggers),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Apply all pending migrations, each in its own transaction.
+    
+    Args:
+        engine: Engine bound to the application database
+        
+    Returns:
+        The schema version after migrating
+    """
+    with engine.connect() as connection:
+        current_version = get_schema_version(connection)
+    
+    for version, description, step in MIGRATIONS:
+        if version <= current_version:
+            continue
+        
+        logger.info(f"Applying schema migration {version}: {description}")
+        with engine.begin() as connection:
+            step(connection)
+            _set_schema_version(connection, version)
+        current_version = version
+    
+    return current_version
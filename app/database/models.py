@@ -3,7 +3,7 @@ Database models for the Dental Practice Management System.
 """
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, ForeignKey, Boolean, DECIMAL
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, ForeignKey, Boolean, DECIMAL, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -31,6 +31,11 @@ class User(Base):
 class Patient(Base):
     """Patient model for patient management."""
     __tablename__ = "patients"
+    __table_args__ = (
+        Index('ix_patients_phone_number', 'phone_number'),
+        Index('ix_patients_full_name', 'full_name'),
+        Index('ix_patients_created_at', 'created_at'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(String(20), unique=True, nullable=False)
@@ -56,6 +61,10 @@ class Patient(Base):
 class DentalExamination(Base):
     """Dental examination model for recording examination sessions."""
     __tablename__ = "dental_examinations"
+    __table_args__ = (
+        Index('ix_dental_examinations_patient_date', 'patient_id', 'examination_date'),
+        Index('ix_dental_examinations_examination_date', 'examination_date'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -87,6 +96,9 @@ class DentalExamination(Base):
 class ToothHistory(Base):
     """Tooth history model for tracking tooth-specific changes over time."""
     __tablename__ = "tooth_history"
+    __table_args__ = (
+        Index('ix_tooth_history_patient_tooth_type', 'patient_id', 'tooth_number', 'record_type'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -94,12 +106,13 @@ class ToothHistory(Base):
     tooth_number = Column(Integer, nullable=False)  # Full tooth number (11-18, 21-28, 31-38, 41-48)
     record_type = Column(String(20), nullable=False)  # 'patient_problem' or 'doctor_finding'
     
-    # JSON fields for storing history as lists
-    status_history = Column(Text)  # JSON list of status entries
-    description_history = Column(Text)  # JSON list of description entries  
-    date_history = Column(Text)  # JSON list of date entries
+    # Legacy JSON history lists; copied to tooth_history_events by migration 3 and kept
+    # as the original data, but no longer written or read
+    status_history = Column(Text)
+    description_history = Column(Text)
+    date_history = Column(Text)
     
-    # Keep single fields for backward compatibility
+    # Latest-state projection of the newest event, maintained on every append/delete
     status = Column(String(50))  # Current/latest status
     description = Column(Text)  # Current/latest description
     date_recorded = Column(Date, nullable=False)  # Current/latest date
@@ -109,14 +122,46 @@ class ToothHistory(Base):
     # Relationships
     patient = relationship("Patient", back_populates="tooth_histories")
     examination = relationship("DentalExamination", back_populates="tooth_histories")
+    events = relationship("ToothHistoryEvent", back_populates="history", order_by="ToothHistoryEvent.id",
+                          cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<ToothHistory(patient_id={self.patient_id}, tooth={self.tooth_number}, type='{self.record_type}')>"
 
 
+class ToothHistoryEvent(Base):
+    """One append-only entry in a tooth's history (one row per recorded status)."""
+    __tablename__ = "tooth_history_events"
+    __table_args__ = (
+        Index('ix_tooth_history_events_patient_tooth_date', 'patient_id', 'tooth_number', 'date_recorded'),
+        Index('ix_tooth_history_events_history', 'history_id'),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    history_id = Column(Integer, ForeignKey("tooth_history.id", ondelete="CASCADE"), nullable=False)
+    # Copied from the parent record so timelines are a range scan on one index
+    patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
+    tooth_number = Column(Integer, nullable=False)
+    record_type = Column(String(20), nullable=False)
+    
+    status = Column(String(50))  # Comma-separated statuses, as in ToothHistory.status
+    description = Column(Text)
+    date_recorded = Column(Date, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    history = relationship("ToothHistory", back_populates="events")
+    
+    def __repr__(self):
+        return f"<ToothHistoryEvent(history_id={self.history_id}, date={self.date_recorded}, status='{self.status}')>"
+
+
 class VisitRecord(Base):
     """Visit record model for tracking patient visits and treatments."""
     __tablename__ = "visit_records"
+    __table_args__ = (
+        Index('ix_visit_records_patient_date', 'patient_id', 'visit_date'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -149,6 +194,25 @@ class VisitRecord(Base):
         return f"<VisitRecord(patient_id={self.patient_id}, date='{self.visit_date}', type='{self.visit_type}')>"
 
 
+class VisitDailyStats(Base):
+    """
+    Per-day visit counts and cost totals by status and visit type.
+    
+    Maintained by triggers on visit_records (see migrations), so every write
+    path, including cascading deletes, keeps it current.
+    """
+    __tablename__ = "visit_daily_stats"
+    
+    visit_date = Column(Date, primary_key=True)
+    status = Column(String(20), primary_key=True)  # '' when the visit has no status
+    visit_type = Column(String(50), primary_key=True)  # '' when the visit has no type
+    visit_count = Column(Integer, nullable=False, default=0)
+    total_cost = Column(DECIMAL(12, 2), nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<VisitDailyStats(date='{self.visit_date}', status='{self.status}', type='{self.visit_type}')>"
+
+
 class CustomStatus(Base):
     """Custom status model for user-defined tooth statuses."""
     __tablename__ = "custom_statuses"
@@ -179,6 +243,9 @@ class CustomStatus(Base):
 class DentalChartRecord(Base):
     """Dental chart record model for individual tooth data."""
     __tablename__ = "dental_chart_records"
+    __table_args__ = (
+        Index('ix_dental_chart_records_patient_exam_tooth', 'patient_id', 'examination_id', 'quadrant', 'tooth_number'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -201,3 +268,14 @@ class DentalChartRecord(Base):
     
     def __repr__(self):
         return f"<DentalChartRecord(patient_id={self.patient_id}, quadrant='{self.quadrant}', tooth={self.tooth_number})>"
+
+
+class IdSequence(Base):
+    """Named counter for generated identifiers (see database/sequences.py)."""
+    __tablename__ = "id_sequences"
+    
+    name = Column(String(50), primary_key=True)
+    next_value = Column(Integer, nullable=False, default=1)  # Next value to hand out
+    
+    def __repr__(self):
+        return f"<IdSequence(name='{self.name}', next_value={self.next_value})>"
@@ -0,0 +1,46 @@
+"""
+Block allocation of generated identifiers.
+
+Each named sequence is one row in ``id_sequences``. Reserving a block is a
+single UPDATE inside the caller's transaction: SQLite allows one writer at a
+time, so two workers can never receive overlapping blocks, and the cost does
+not depend on how many rows already exist.
+"""
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import IdSequence
+
+# Sequence behind the numeric part of Patient.patient_id ("P00042" -> 42)
+PATIENT_ID_SEQUENCE = "patient_id"
+
+
+def reserve_block(session: Session, name: str, count: int = 1) -> int:
+    """
+    Reserve ``count`` consecutive values from a sequence.
+
+    Must run inside the transaction that uses the values, so a rollback
+    also releases the write lock without handing out the block.
+
+    Returns:
+        The first value of the block
+    """
+    sequence = IdSequence.__table__
+    updated = session.execute(
+        update(sequence).where(sequence.c.name == name).values(next_value=sequence.c.next_value + count)
+    )
+    if updated.rowcount == 0:
+        session.execute(insert(sequence).values(name=name, next_value=1 + count))
+        return 1
+    return session.execute(select(sequence.c.next_value).where(sequence.c.name == name)).scalar() - count
+
+
+def advance_to(session: Session, name: str, minimum: int):
+    """Make sure the next value handed out is at least ``minimum`` (e.g. after importing explicit IDs)."""
+    sequence = IdSequence.__table__
+    updated = session.execute(
+        update(sequence).where(sequence.c.name == name)
+        .values(next_value=func.max(sequence.c.next_value, minimum))
+    )
+    if updated.rowcount == 0:
+        session.execute(insert(sequence).values(name=name, next_value=minimum))
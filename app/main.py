@@ -12,21 +12,15 @@ from PySide6.QtGui import QIcon
 from .database.database import db_manager
 from .ui.login_dialog import LoginDialog
 from .ui.main_window import MainWindow
-from .config import APP_NAME, LOG_LEVEL, LOG_FORMAT, LOG_FILE
+from .config import APP_NAME, LOG_LEVEL, LOG_FILE
 from .utils.error_handler import error_handler
+from .utils.log_setup import configure_logging
 from .utils.performance import performance_monitor, optimize_application_performance
 
 
 def setup_logging():
-    """Set up application logging."""
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL),
-        format=LOG_FORMAT,
-        handlers=[
-            logging.FileHandler(LOG_FILE),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
+    """Set up application logging (queued, size-rotated and rate limited)."""
+    configure_logging(LOG_LEVEL, LOG_FILE)
 
 
 def handle_exception(exc_type, exc_value, exc_traceback):
@@ -85,10 +79,6 @@ class DentalManagementApp:
             else:
                 logger.warning(f"Application icon not found: {icon_path}")
             
-            # Run initial performance optimization
-            logger.info("Running startup optimizations...")
-            optimize_application_performance()
-            
             # Initialize database
             logger.info("Initializing database...")
             if not db_manager.initialize_database():
@@ -99,6 +89,10 @@ class DentalManagementApp:
                 )
                 return 1
             
+            # Run initial performance optimization (logs the database summary, so after initialization)
+            logger.info("Running startup optimizations...")
+            optimize_application_performance()
+            
             # Show login dialog
             logger.info("Showing login dialog...")
             login_dialog = LoginDialog()
@@ -3,9 +3,10 @@ Service for managing custom dental status definitions.
 """
 import logging
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, or_
+from PySide6.QtCore import QObject, Signal
 
 from ..database.database import db_manager
 from ..database.models import CustomStatus
@@ -13,9 +14,80 @@ from ..database.models import CustomStatus
 logger = logging.getLogger(__name__)
 
 
+class CustomStatusRegistry(QObject):
+    """In-memory registry of status definitions, keyed by name and by category."""
+    
+    statuses_changed = Signal()
+    
+    def __init__(self, service: "CustomStatusService"):
+        super().__init__()
+        self._service = service
+        self._by_name: Optional[Dict[str, Dict[str, Any]]] = None
+        self._by_category: Dict[str, List[Dict[str, Any]]] = {}
+        self.version = 0  # Incremented on every invalidation so derived caches can detect staleness
+    
+    def _ensure_loaded(self) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[Dict[str, Any]]]]:
+        """
+        Load all status definitions with a single query on first use.
+        
+        An empty result (no statuses, or a failed query - the service logs and
+        returns []) is used for this call but not cached, so the next access
+        queries again instead of rendering fallback colours until invalidation.
+        
+        Returns:
+            (statuses by name, active statuses by category)
+        """
+        if self._by_name is not None:
+            return self._by_name, self._by_category
+        
+        all_statuses = self._service.get_all_custom_statuses()
+        
+        by_name = {}
+        by_category = {}
+        for status in all_statuses:
+            by_name[status['status_name']] = status
+            if status['is_active']:
+                by_category.setdefault(status['category'], []).append(status)
+        
+        if not by_name:
+            logger.debug("Status registry load returned no statuses; retrying on next access")
+            return by_name, by_category
+        
+        self._by_name = by_name
+        self._by_category = by_category
+        logger.debug(f"Status registry loaded {len(by_name)} statuses")
+        return by_name, by_category
+    
+    def get_by_name(self, status_name: str) -> Optional[Dict[str, Any]]:
+        """Get a status definition (active or not) by name."""
+        by_name, _ = self._ensure_loaded()
+        return by_name.get(status_name)
+    
+    def get_color(self, status_name: str) -> Optional[str]:
+        """Get the display color for a status, or None if it is unknown."""
+        status = self.get_by_name(status_name)
+        return status['color'] if status else None
+    
+    def get_statuses_by_category(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Get active statuses grouped by category (same shape as the service method)."""
+        _, by_category = self._ensure_loaded()
+        return by_category
+    
+    def invalidate(self):
+        """Drop the cached definitions and notify listeners; the next read reloads them."""
+        self._by_name = None
+        self._by_category = {}
+        self.version += 1
+        self.statuses_changed.emit()
+
+
 class CustomStatusService:
     """Service for managing custom dental status definitions."""
     
+    def __init__(self):
+        self.registry = CustomStatusRegistry(self)
+        db_manager.add_reload_listener(self.registry.invalidate)
+    
     def create_custom_status(self, status_data: Dict[str, Any]) -> Optional[CustomStatus]:
         """
         Create a new custom status definition.
@@ -26,6 +98,7 @@ class CustomStatusService:
         Returns:
             Created CustomStatus object or None if failed
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -59,6 +132,8 @@ class CustomStatusService:
             status_id = custom_status.id
             session.close()
             
+            self.registry.invalidate()
+            
             logger.info(f"Created custom status '{status_data.get('status_name')}' with ID {status_id}")
             return self.get_custom_status_by_id(status_id)
             
@@ -79,6 +154,7 @@ class CustomStatusService:
         Returns:
             Dictionary containing custom status data or None if not found
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -124,6 +200,7 @@ class CustomStatusService:
         Returns:
             Dictionary containing custom status data or None if not found
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -169,6 +246,7 @@ class CustomStatusService:
         Returns:
             List of custom status dictionaries
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -242,6 +320,7 @@ class CustomStatusService:
         Returns:
             True if successful, False otherwise
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -276,6 +355,8 @@ class CustomStatusService:
             session.commit()
             session.close()
             
+            self.registry.invalidate()
+            
             logger.info(f"Updated custom status {status_id}")
             return True
             
@@ -297,6 +378,7 @@ class CustomStatusService:
         Returns:
             True if successful, False otherwise
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -313,6 +395,8 @@ class CustomStatusService:
             session.commit()
             session.close()
             
+            self.registry.invalidate()
+            
             logger.info(f"Deleted custom status {status_id}")
             return True
             
@@ -333,6 +417,7 @@ class CustomStatusService:
         Returns:
             True if successful, False otherwise
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -343,11 +428,14 @@ class CustomStatusService:
                 return False
             
             status.is_active = not status.is_active
+            is_active = status.is_active
             status.updated_at = datetime.now()
             session.commit()
             session.close()
             
-            logger.info(f"Toggled active status for custom status {status_id} to {status.is_active}")
+            self.registry.invalidate()
+            
+            logger.info(f"Toggled active status for custom status {status_id} to {is_active}")
             return True
             
         except Exception as e:
@@ -367,6 +455,7 @@ class CustomStatusService:
         Returns:
             List of matching custom status dictionaries
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -510,12 +599,22 @@ class CustomStatusService:
             predefined = self.get_predefined_statuses()
             created_count = 0
             
-            for status_data in predefined:
-                existing = self.get_custom_status_by_name(status_data['status_name'])
-                if not existing:
-                    result = self.create_custom_status(status_data)
-                    if result:
-                        created_count += 1
+            # Load existing names once instead of querying per predefined status
+            existing_names = {status['status_name'] for status in self.get_all_custom_statuses()}
+            
+            # Notify registry listeners once for the whole batch
+            self.registry.blockSignals(True)
+            try:
+                for status_data in predefined:
+                    if status_data['status_name'] not in existing_names:
+                        result = self.create_custom_status(status_data)
+                        if result:
+                            created_count += 1
+            finally:
+                self.registry.blockSignals(False)
+            
+            if created_count:
+                self.registry.invalidate()
             
             logger.info(f"Initialized {created_count} predefined statuses")
             return True
@@ -568,3 +667,4 @@ class CustomStatusService:
 
 # Global service instance
 custom_status_service = CustomStatusService()
+custom_status_registry = custom_status_service.registry
@@ -0,0 +1,132 @@
+"""
+Service for the dashboard's patient and examination counters.
+"""
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+from sqlalchemy import select, func
+from PySide6.QtCore import QObject, Signal
+
+from ..database.database import db_manager
+from ..database.models import Patient, DentalExamination
+from ..config import DASHBOARD_STATS_TTL
+
+logger = logging.getLogger(__name__)
+
+# Counters returned when the statistics cannot be loaded
+EMPTY_DASHBOARD_STATS = {
+    'total': 0, 'this_month': 0, 'this_week': 0, 'today': 0,
+    'total_examinations': 0, 'examinations_this_month': 0
+}
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month_start(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+class DashboardStatsService(QObject):
+    """
+    Dashboard counters computed in one query and cached.
+    
+    The cache is dropped when patients or examinations are created or
+    deleted (services call invalidate()) and otherwise expires after
+    DASHBOARD_STATS_TTL seconds, so date-based counters roll over.
+    stats_invalidated is emitted so views can schedule a background refresh.
+    """
+    
+    stats_invalidated = Signal()
+    
+    def __init__(self):
+        super().__init__()
+        self._stats: Optional[Dict[str, int]] = None
+        self._loaded_at = 0.0
+        self._generation = 0  # Incremented on every invalidation
+        self._lock = threading.Lock()
+        db_manager.add_reload_listener(self.invalidate)
+    
+    def _stats_query(self, now: datetime):
+        """
+        Build the single statement behind the counters.
+        
+        Each counter is a scalar subquery with a half-open range on
+        created_at/examination_date, so SQLite answers it from the column's index.
+        """
+        today = now.date()
+        month_start = datetime.combine(_month_start(today), datetime.min.time())
+        next_month_start = datetime.combine(_next_month_start(today), datetime.min.time())
+        day_start = datetime.combine(today, datetime.min.time())
+        
+        def count_patients(*conditions):
+            return select(func.count()).select_from(Patient).where(*conditions).scalar_subquery()
+        
+        def count_examinations(*conditions):
+            return select(func.count()).select_from(DentalExamination).where(*conditions).scalar_subquery()
+        
+        return select(
+            count_patients().label('total'),
+            count_patients(Patient.created_at >= month_start,
+                           Patient.created_at < next_month_start).label('this_month'),
+            count_patients(Patient.created_at >= now - timedelta(days=7)).label('this_week'),
+            count_patients(Patient.created_at >= day_start,
+                           Patient.created_at < day_start + timedelta(days=1)).label('today'),
+            count_examinations().label('total_examinations'),
+            count_examinations(DentalExamination.examination_date >= _month_start(today),
+                               DentalExamination.examination_date < _next_month_start(today)
+                               ).label('examinations_this_month')
+        )
+    
+    def compute_stats(self) -> Dict[str, int]:
+        """Run the counters query (uncached)."""
+        with db_manager.session_scope() as session:
+            row = session.execute(self._stats_query(datetime.now())).one()
+        return dict(row._mapping)
+    
+    def is_fresh(self) -> bool:
+        """True if a cached result exists, nothing changed since, and it is younger than the TTL."""
+        with self._lock:
+            return self._stats is not None and time.monotonic() - self._loaded_at < DASHBOARD_STATS_TTL
+    
+    def get_dashboard_stats(self) -> Dict[str, int]:
+        """
+        Get the dashboard counters, from the cache when it is fresh.
+        
+        Safe to call from worker threads.
+        
+        Returns:
+            Dictionary with 'total', 'this_month', 'this_week', 'today',
+            'total_examinations' and 'examinations_this_month'
+        """
+        with self._lock:
+            if self._stats is not None and time.monotonic() - self._loaded_at < DASHBOARD_STATS_TTL:
+                return dict(self._stats)
+            generation = self._generation
+        
+        try:
+            stats = self.compute_stats()
+        except Exception as e:
+            logger.error(f"Error getting dashboard statistics: {str(e)}")
+            return dict(EMPTY_DASHBOARD_STATS)
+        
+        with self._lock:
+            # Do not cache a result that an invalidation raced with
+            if generation == self._generation:
+                self._stats = stats
+                self._loaded_at = time.monotonic()
+        return dict(stats)
+    
+    def invalidate(self):
+        """Drop the cached counters after patients or examinations changed."""
+        with self._lock:
+            self._stats = None
+            self._generation += 1
+        self.stats_invalidated.emit()
+
+
+# Global service instance
+dashboard_stats_service = DashboardStatsService()
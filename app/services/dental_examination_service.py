@@ -10,6 +10,7 @@ from sqlalchemy import desc, and_
 
 from ..database.database import db_manager
 from ..database.models import DentalExamination, Patient, User
+from .dashboard_stats_service import dashboard_stats_service
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,7 @@ class DentalExaminationService:
         Returns:
             Dictionary with success status and examination data
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -70,6 +72,7 @@ class DentalExaminationService:
             examination_id = examination.id
             session.close()
             
+            dashboard_stats_service.invalidate()
             logger.info(f"Created examination {examination_id} for patient {patient_id}")
             
             # Get the created examination data
@@ -97,6 +100,7 @@ class DentalExaminationService:
         Returns:
             Dictionary containing examination data or None if not found
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -155,6 +159,7 @@ class DentalExaminationService:
         Returns:
             List of examination dictionaries
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -228,6 +233,7 @@ class DentalExaminationService:
         Returns:
             Dictionary with success status and examination data
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -293,6 +299,7 @@ class DentalExaminationService:
         Returns:
             Dictionary with success status
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -308,6 +315,7 @@ class DentalExaminationService:
             session.commit()
             session.close()
             
+            dashboard_stats_service.invalidate()
             logger.info(f"Deleted examination {examination_id}")
             return {'success': True}
             
@@ -328,6 +336,7 @@ class DentalExaminationService:
         Returns:
             Dictionary containing examination statistics
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -8,6 +8,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from ..database.models import Patient, DentalChartRecord, DentalExamination
 from ..database.database import db_manager
+from ..utils.log_setup import StructuredMessage
+from .dashboard_stats_service import dashboard_stats_service
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +22,7 @@ class DentalService:
 
     def create_examination(self, patient_id: str, examination_data: Dict[str, Any]) -> Optional[Dict]:
         """Create a new dental examination for a patient."""
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -59,7 +62,8 @@ class DentalService:
             }
             
             session.close()
-            logger.info(f"Created new examination {new_exam.id} for patient {patient_id}")
+            dashboard_stats_service.invalidate()
+            logger.info(f"Created new examination {exam_dict['id']} for patient {patient_id}")
             return exam_dict
 
         except Exception as e:
@@ -117,11 +121,9 @@ class DentalService:
             query = session.query(DentalChartRecord).filter(DentalChartRecord.patient_id == patient.id)
             
             if examination_id:
-                logger.info(f"Filtering chart by examination_id: {examination_id}")
                 query = query.filter(DentalChartRecord.examination_id == examination_id)
             
             chart_records = query.all()
-            logger.info(f"Found {len(chart_records)} chart records for patient {patient_id}, exam {examination_id}")
             
             chart_data = {
                 'upper_right': [], 'upper_left': [],
@@ -136,7 +138,8 @@ class DentalService:
             for quadrant in chart_data:
                 chart_data[quadrant].sort(key=lambda x: x['tooth_number'])
             
-            logger.info(f"Returning chart data: {chart_data}")
+            logger.debug(StructuredMessage("dental chart loaded", patient=patient_id,
+                                           examination=examination_id, records=len(chart_records)))
             session.close()
             return chart_data
             
@@ -147,6 +150,7 @@ class DentalService:
     def update_tooth_record(self, patient_id: str, examination_id: int, quadrant: str, tooth_number: int, 
                            tooth_data: Dict[str, Any]) -> bool:
         """Update a specific tooth record for a given examination."""
+        session = None
         try:
             session = db_manager.get_session()
             
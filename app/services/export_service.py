@@ -3,17 +3,31 @@ Export service for data export and backup operations.
 """
 import logging
 import csv
+import io
 import json
 import os
-import shutil
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from pathlib import Path
+from sqlalchemy import select, insert, case, and_, func
 from sqlalchemy.orm import Session
-from ..database.models import Patient, DentalChartRecord, DentalExamination
+from ..database.models import Base, Patient, DentalChartRecord, DentalExamination
 from ..database.database import db_manager
+from ..database.sequences import advance_to, PATIENT_ID_SEQUENCE
+from ..database.backup import (
+    backup_database_file, IncrementalBackupStore, create_backup_archive, verify_backup_archive
+)
+from ..config import (
+    BACKUP_RETAINED_SNAPSHOTS, EXPORT_BATCH_SIZE, EXPORT_MAX_WORKERS, EXPORT_EXCLUDED_TABLES,
+    IMPORT_BATCH_SIZE, IMPORT_SNIFF_BYTES
+)
+from ..utils.constants import PATIENT_ID_PREFIX
+from ..utils.progress import CancelToken, OperationCancelled, check_cancelled
+from .exporters import get_exporter
 from .patient_service import patient_service
-from .dental_service import dental_service
+from .dashboard_stats_service import dashboard_stats_service
 
 logger = logging.getLogger(__name__)
 
@@ -24,104 +38,217 @@ class ExportService:
     def __init__(self):
         pass
     
-    def _flatten_data(self, patient: Dict, examination: Dict, chart_data: Dict) -> List[Dict]:
-        """Flatten patient, examination, and chart data into a list of dictionaries for CSV export."""
-        rows = []
-        
-        # Basic patient and examination data
-        base_info = {
-            'Patient ID': patient.get('patient_id', ''),
-            'Full Name': patient.get('full_name', ''),
-            'Phone Number': patient.get('phone_number', ''),
-            'Email': patient.get('email', ''),
-            'Date of Birth': patient.get('date_of_birth', ''),
-            'Address': patient.get('address', ''),
-            'Examination ID': examination.get('id', ''),
-            'Examination Date': examination.get('examination_date', ''),
-            'Chief Complaint': examination.get('chief_complaint', ''),
-            'History of Presenting Illness': examination.get('history_of_presenting_illness', ''),
-            'Medical History': examination.get('medical_history', ''),
-            'Dental History': examination.get('dental_history', ''),
-            'Examination Findings': examination.get('examination_findings', ''),
-            'Diagnosis': examination.get('diagnosis', ''),
-            'Treatment Plan': examination.get('treatment_plan', ''),
-            'Notes': examination.get('notes', '')
-        }
-        
-        # If no chart data for this examination, write one row with patient/exam info
-        if not any(chart_data.values()):
-            rows.append(base_info)
-            return rows
-
-        # If chart data exists, create a row for each tooth in the chart
-        for quadrant, teeth in chart_data.items():
-            for tooth in teeth:
-                row = base_info.copy()
-                row.update({
-                    'Quadrant': quadrant,
-                    'Tooth Number': tooth.get('tooth_number', ''),
-                    'Tooth Diagnosis': tooth.get('diagnosis', ''),
-                    'Treatment Performed': tooth.get('treatment_performed', ''),
-                    'Tooth Status': tooth.get('status', '')
-                })
-                rows.append(row)
-        
-        return rows
-
-    def export_complete_data_to_csv(self, file_path: str) -> bool:
+    # CSV columns of the complete export, in order
+    COMPLETE_EXPORT_HEADERS = [
+        'Patient ID', 'Full Name', 'Phone Number', 'Email', 'Date of Birth', 'Address',
+        'Examination ID', 'Examination Date', 'Chief Complaint', 'History of Presenting Illness',
+        'Medical History', 'Dental History', 'Examination Findings', 'Diagnosis', 'Treatment Plan', 'Notes',
+        'Quadrant', 'Tooth Number', 'Tooth Diagnosis', 'Treatment Performed', 'Tooth Status'
+    ]
+    
+    # Chart quadrants in export order; records with any other quadrant are not exported
+    CHART_QUADRANTS = ['upper_right', 'upper_left', 'lower_right', 'lower_left']
+    
+    def _complete_export_query(self):
+        """
+        Build the single ordered query behind the complete export.
+        
+        Patients are outer-joined to their examinations and each examination's
+        chart records, so patients without examinations and examinations without
+        chart records still produce one row. Column order matches COMPLETE_EXPORT_HEADERS.
+        """
+        quadrant_order = case(
+            {quadrant: position for position, quadrant in enumerate(self.CHART_QUADRANTS)},
+            value=DentalChartRecord.quadrant
+        )
+        return (
+            select(
+                Patient.patient_id, Patient.full_name, Patient.phone_number, Patient.email,
+                Patient.date_of_birth, Patient.address,
+                DentalExamination.id, DentalExamination.examination_date, DentalExamination.chief_complaint,
+                DentalExamination.history_of_presenting_illness, DentalExamination.medical_history,
+                DentalExamination.dental_history, DentalExamination.examination_findings,
+                DentalExamination.diagnosis, DentalExamination.treatment_plan, DentalExamination.notes,
+                DentalChartRecord.quadrant, DentalChartRecord.tooth_number, DentalChartRecord.diagnosis,
+                DentalChartRecord.treatment_performed, DentalChartRecord.status
+            )
+            .select_from(Patient)
+            .outerjoin(DentalExamination, DentalExamination.patient_id == Patient.id)
+            .outerjoin(DentalChartRecord, and_(
+                DentalChartRecord.examination_id == DentalExamination.id,
+                DentalChartRecord.patient_id == Patient.id,
+                DentalChartRecord.quadrant.in_(self.CHART_QUADRANTS)
+            ))
+            .order_by(Patient.created_at.desc(), Patient.id, DentalExamination.id,
+                      quadrant_order, DentalChartRecord.tooth_number)
+        )
+    
+    def export_complete_data_to_csv(self, file_path: str,
+                                    progress_callback: Optional[Callable[[int, int], None]] = None,
+                                    cancel_token: Optional[CancelToken] = None) -> bool:
         """
         Export complete patient, examination, and dental chart data to a single CSV file.
+        
+        Rows are streamed from one joined query (fetched EXPORT_BATCH_SIZE at a time)
+        straight into the file, so memory use does not grow with the number of patients.
+        
+        Args:
+            file_path: CSV file to write
+            progress_callback: Optional callable receiving (rows_written, rows_total)
+            cancel_token: Optional token checked between batches
+            
+        Raises:
+            OperationCancelled: If the token was cancelled (the partial file is removed)
         """
         try:
-            patients = patient_service.get_all_patients(limit=10000)
-            
-            if not patients:
-                logger.warning("No patients found to export")
-                return False
-            
-            headers = [
-                'Patient ID', 'Full Name', 'Phone Number', 'Email', 'Date of Birth', 'Address',
-                'Examination ID', 'Examination Date', 'Chief Complaint', 'History of Presenting Illness',
-                'Medical History', 'Dental History', 'Examination Findings', 'Diagnosis', 'Treatment Plan', 'Notes',
-                'Quadrant', 'Tooth Number', 'Tooth Diagnosis', 'Treatment Performed', 'Tooth Status'
-            ]
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=headers)
-                writer.writeheader()
+            with db_manager.session_scope() as session:
+                if session.query(Patient.id).first() is None:
+                    logger.warning("No patients found to export")
+                    return False
+                
+                query = self._complete_export_query()
+                total = 0
+                if progress_callback:
+                    total = session.execute(
+                        select(func.count()).select_from(query.order_by(None).subquery())
+                    ).scalar()
+                    progress_callback(0, total)
+                
+                result = session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
                 
-                for patient in patients:
-                    examinations = dental_service.get_all_patient_examinations(patient['patient_id'])
+                patient_count = 0
+                last_patient_id = None
+                done = 0
+                with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
+                    writer = csv.writer(csvfile)
+                    writer.writerow(self.COMPLETE_EXPORT_HEADERS)
                     
-                    if not examinations:
-                        # Write basic patient info if no examinations
-                        writer.writerow({
-                            'Patient ID': patient.get('patient_id', ''),
-                            'Full Name': patient.get('full_name', ''),
-                            'Phone Number': patient.get('phone_number', ''),
-                            'Email': patient.get('email', ''),
-                            'Date of Birth': patient.get('date_of_birth', ''),
-                            'Address': patient.get('address', '')
-                        })
-                        continue
-
-                    for exam in examinations:
-                        chart_data = dental_service.get_dental_chart(patient['patient_id'], exam['id'])
-                        flat_data_rows = self._flatten_data(patient, exam, chart_data)
-                        
-                        for row in flat_data_rows:
-                            writer.writerow(row)
-            
-            logger.info(f"Successfully exported complete data for {len(patients)} patients to {file_path}")
+                    for batch in result.partitions():
+                        check_cancelled(cancel_token)
+                        for row in batch:
+                            if row[0] != last_patient_id:
+                                last_patient_id = row[0]
+                                patient_count += 1
+                            writer.writerow(['' if value is None else value for value in row])
+                        done += len(batch)
+                        if progress_callback:
+                            progress_callback(done, total)
+            
+            logger.info(f"Successfully exported complete data for {patient_count} patients to {file_path}")
             return True
             
+        except OperationCancelled:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            logger.info(f"Complete data export to {file_path} cancelled")
+            raise
         except Exception as e:
             logger.error(f"Error exporting complete data to CSV: {str(e)}")
             return False
     
-    def create_complete_backup(self, backup_path: str) -> bool:
+    def export_tables(self, output_dir: str, format_name: str = 'csv',
+                      tables: Optional[List[str]] = None,
+                      progress_callback: Optional[Callable[[str, int, int], None]] = None,
+                      max_workers: int = EXPORT_MAX_WORKERS,
+                      cancel_token: Optional[CancelToken] = None) -> Dict[str, int]:
+        """
+        Export database tables to one file per table, each table on its own worker.
+        
+        Args:
+            output_dir: Directory to write the files into (created if needed)
+            format_name: Registered exporter name ('csv', 'jsonl', 'columnar')
+            tables: Table names to export (default: every table except EXPORT_EXCLUDED_TABLES)
+            progress_callback: Optional callable receiving (table, rows_done, rows_total);
+                called from worker threads
+            max_workers: Maximum number of tables exported at the same time
+            cancel_token: Optional token checked by every worker between batches
+            
+        Returns:
+            Dictionary of table name -> rows exported
+            
+        If a table fails, the other workers stop at their next batch; every
+        unfinished file is removed and completed files are kept.
+            
+        Raises:
+            ValueError: If the format or a table name is unknown
+            OperationCancelled: If the token was cancelled (unfinished files are removed)
+            Exception: The first error raised while exporting a table
+        """
+        exporter_class = get_exporter(format_name)
+        available = {table.name: table for table in Base.metadata.sorted_tables}
+        if tables is None:
+            tables = [name for name in available if name not in EXPORT_EXCLUDED_TABLES]
+        unknown = [name for name in tables if name not in available]
+        if unknown:
+            raise ValueError(f"Unknown tables: {', '.join(unknown)}")
+        
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        
+        # Cancelled when a table fails, so the other workers stop too
+        stop_token = CancelToken()
+        
+        def check_stopped():
+            check_cancelled(cancel_token)
+            stop_token.raise_if_cancelled()
+        
+        def export_table(table_name: str) -> int:
+            check_stopped()
+            table = available[table_name]
+            columns = [column.name for column in table.columns]
+            file_path = os.path.join(output_dir, table_name + exporter_class.extension)
+            
+            with db_manager.engine.connect() as connection:
+                total = connection.execute(select(func.count()).select_from(table)).scalar()
+                if progress_callback:
+                    progress_callback(table_name, 0, total)
+                
+                done = 0
+                result = connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(
+                    select(table).order_by(*table.primary_key.columns)
+                )
+                try:
+                    with exporter_class(file_path, table_name, columns) as exporter:
+                        for batch in result.partitions():
+                            check_stopped()
+                            exporter.write_rows(batch)
+                            done += len(batch)
+                            if progress_callback:
+                                progress_callback(table_name, done, total)
+                except BaseException as e:
+                    if not isinstance(e, OperationCancelled):
+                        logger.error(f"Exporting {table_name} failed: {str(e)}")
+                        stop_token.cancel()
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                    raise
+            
+            logger.info(f"Exported {done} rows from {table_name} to {file_path}")
+            return done
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tables)))) as executor:
+            futures = {name: executor.submit(export_table, name) for name in tables}
+        
+        # Report the error that stopped the export rather than the cancellations it caused
+        errors = [future.exception() for future in futures.values() if future.exception()]
+        failures = [error for error in errors if not isinstance(error, OperationCancelled)]
+        if failures:
+            raise failures[0]
+        if errors:
+            raise errors[0]
+        return {name: future.result() for name, future in futures.items()}
+    
+    def create_complete_backup(self, backup_path: str,
+                               progress_callback: Optional[Callable[[int, int], None]] = None,
+                               cancel_token: Optional[CancelToken] = None) -> bool:
         """
         Create a complete backup of the database as a single file.
+        
+        Uses the SQLite online backup API, so the copy is consistent even while
+        the application keeps writing, and is verified with a quick_check.
+        progress_callback receives (pages_copied, pages_total).
+        
+        Raises:
+            OperationCancelled: If the token was cancelled
         """
         try:
             db_path = db_manager.get_database_path()
@@ -129,31 +256,302 @@ class ExportService:
                 logger.error(f"Database file not found: {db_path}")
                 return False
             
-            backup_dir = os.path.dirname(backup_path)
-            if backup_dir:
-                Path(backup_dir).mkdir(parents=True, exist_ok=True)
+            backup_database_file(db_path, backup_path, progress_callback, cancel_token=cancel_token)
+            logger.info(f"Complete database backup created: {backup_path}")
+            return True
             
-            shutil.copy2(db_path, backup_path)
+        except OperationCancelled:
+            logger.info(f"Database backup to {backup_path} cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error creating complete backup: {str(e)}")
+            return False
+    
+    def create_backup_archive(self, archive_path: str,
+                              progress_callback: Optional[Callable[[int, int], None]] = None,
+                              cancel_token: Optional[CancelToken] = None) -> bool:
+        """
+        Create a compressed backup archive with a checksum manifest.
+        
+        Raises:
+            OperationCancelled: If the token was cancelled
+        """
+        try:
+            create_backup_archive(db_manager.get_database_path(), archive_path, progress_callback,
+                                  cancel_token=cancel_token)
+            return True
             
-            if os.path.exists(backup_path) and os.path.getsize(backup_path) > 0:
-                logger.info(f"Complete database backup created: {backup_path}")
-                return True
-            else:
-                logger.error("Backup file was not created or is empty")
-                return False
+        except OperationCancelled:
+            logger.info(f"Backup archive {archive_path} cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error creating backup archive: {str(e)}")
+            return False
+    
+    def verify_backup_archive(self, archive_path: str, extract_to: Optional[str] = None,
+                              progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Verify a backup archive against its manifest, optionally extracting the database.
+        
+        Args:
+            archive_path: Archive to verify
+            extract_to: Optional path to extract the database to in the same pass
+            progress_callback: Optional callable receiving (bytes_done, bytes_total)
+        
+        Returns:
+            Dictionary with 'valid', the archive 'manifest' and an 'error' message
+        """
+        try:
+            manifest = verify_backup_archive(archive_path, extract_to, progress_callback)
+            return {'valid': True, 'manifest': manifest, 'error': None}
             
         except Exception as e:
-            logger.error(f"Error creating complete backup: {str(e)}")
+            logger.error(f"Backup archive verification failed: {str(e)}")
+            return {'valid': False, 'manifest': None, 'error': str(e)}
+    
+    def create_incremental_backup(self, store_dir: str,
+                                  progress_callback: Optional[Callable[[int, int], None]] = None,
+                                  keep: int = BACKUP_RETAINED_SNAPSHOTS,
+                                  cancel_token: Optional[CancelToken] = None) -> Optional[Dict[str, Any]]:
+        """
+        Add a snapshot to the incremental backup store and prune old snapshots.
+        
+        Only chunks that changed since the retained snapshots are written, so
+        repeated backups cost roughly the day's changes instead of a full copy.
+        
+        Raises:
+            OperationCancelled: If the token was cancelled
+        """
+        try:
+            store = IncrementalBackupStore(store_dir)
+            snapshot = store.create_snapshot(db_manager.get_database_path(), progress_callback,
+                                             cancel_token=cancel_token)
+            store.prune(keep)
+            return snapshot
+            
+        except OperationCancelled:
+            logger.info("Incremental backup cancelled")
+            raise
+        except Exception as e:
+            logger.error(f"Error creating incremental backup: {str(e)}")
+            return None
+    
+    def restore_incremental_backup(self, manifest_path: str, target_path: str,
+                                   progress_callback: Optional[Callable[[int, int], None]] = None) -> bool:
+        """
+        Rebuild a snapshot from the incremental backup store as a database file.
+        
+        Args:
+            manifest_path: Path to <store>/snapshots/<snapshot_id>.json
+            target_path: Where to write the reconstructed database
+            progress_callback: Optional callable receiving (chunks_done, chunks_total)
+        """
+        try:
+            manifest_path = Path(manifest_path)
+            store = IncrementalBackupStore(manifest_path.parent.parent)
+            store.restore_snapshot(manifest_path.stem, target_path, progress_callback)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error restoring incremental backup: {str(e)}")
             return False
     
-    def import_patients_from_csv(self, file_path: str) -> Dict[str, Any]:
+    # Accepted spellings of Date of Birth in imported files (data.md uses DD-MM-YYYY)
+    IMPORT_DAY_FIRST_DATE = re.compile(r'(\d{1,2})[-/](\d{1,2})[-/](\d{4})')
+    IMPORT_ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+    
+    @staticmethod
+    def _normalize_phone(phone_number: str) -> str:
+        """Reduce a phone number to its digits for duplicate detection."""
+        return ''.join(ch for ch in phone_number if ch.isdigit())
+    
+    @staticmethod
+    def _patient_id_number(patient_id: str) -> int:
+        """Get the number of a generated patient ID ("P00012" -> 12), or 0 for other IDs."""
+        suffix = patient_id.strip()[len(PATIENT_ID_PREFIX):]
+        return int(suffix) if patient_id.strip().startswith(PATIENT_ID_PREFIX) and suffix.isdigit() else 0
+    
+    def _parse_import_date(self, value: str) -> date:
+        """Parse a Date of Birth cell (DD-MM-YYYY, DD/MM/YYYY or YYYY-MM-DD); raises ValueError otherwise."""
+        match = self.IMPORT_DAY_FIRST_DATE.fullmatch(value)
+        if match:
+            day, month, year = match.groups()
+        else:
+            match = self.IMPORT_ISO_DATE.fullmatch(value)
+            if not match:
+                raise ValueError(value)
+            year, month, day = match.groups()
+        return date(int(year), int(month), int(day))
+    
+    def import_patients_from_csv(self, file_path: str,
+                                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                                 batch_size: int = IMPORT_BATCH_SIZE,
+                                 cancel_token: Optional[CancelToken] = None) -> Dict[str, Any]:
         """
-        Import patients from CSV file with duplicate prevention based on phone number.
-        NOTE: This function needs to be updated to handle the new export format with multiple examinations.
+        Import patients from a CSV or tab-separated file with duplicate prevention based on phone number.
+        
+        The file uses the export layout (see data.md): one row per patient or per
+        tooth, so a patient may appear on several rows. Only the patient columns
+        are imported, and repeats of a patient (same Patient ID and phone number)
+        are collapsed into its first row. Rows are streamed, validated with
+        validate_patient_data, checked against an in-memory index of existing
+        phone numbers (digits only) and inserted with executemany in transactions
+        of ``batch_size`` rows. Patient IDs from the file are kept when they are
+        free; otherwise new ones are reserved from the patient ID sequence, one
+        block per batch, after moving it past the IDs kept in that batch. Invalid
+        rows are written to ``<file>.rejects.csv`` with the reason; a reject file
+        left by an earlier run is removed first.
+        
+        Args:
+            file_path: File to import
+            progress_callback: Optional callable receiving (bytes_read, bytes_total)
+            batch_size: Rows inserted per transaction
+            cancel_token: Optional token checked between batches; batches already
+                committed stay imported and are counted in 'imported'
+            
+        Returns:
+            Dictionary with 'success', 'cancelled', 'imported', 'duplicates'
+            (phone number already known), 'repeated' (further rows of a patient
+            already read), 'rejected', 'reject_file' and 'errors'
         """
-        logger.warning("CSV import logic is not fully updated for the new data format.")
-        return {'success': False, 'errors': ["Import function is disabled pending update."]}
-
+        result = {'success': False, 'cancelled': False, 'imported': 0, 'duplicates': 0, 'repeated': 0,
+                  'rejected': 0, 'reject_file': None, 'errors': []}
+        reject_path = f"{os.path.splitext(file_path)[0]}.rejects.csv"
+        reject_file = None
+        reject_writer = None
+        
+        try:
+            total_bytes = os.path.getsize(file_path)
+            # Rejects from an earlier run would otherwise look like this run's
+            if os.path.exists(reject_path):
+                os.remove(reject_path)
+            
+            # Load the duplicate and ID indexes once
+            with db_manager.session_scope() as session:
+                known_phones = {self._normalize_phone(phone)
+                                for (phone,) in session.execute(select(Patient.phone_number))}
+                used_ids = set(session.execute(select(Patient.patient_id)).scalars())
+            # (Patient ID, phone digits) of every row read, to collapse the export layout's repeated rows
+            seen_patients = set()
+            
+            def keep_patient_id(requested: str) -> Optional[str]:
+                """Keep the file's ID if it is free; None means allocate one at insert time."""
+                if requested and requested not in used_ids:
+                    used_ids.add(requested)
+                    return requested
+                return None
+            
+            def flush(batch):
+                with db_manager.session_scope() as session:
+                    # Move the sequence past the file's IDs kept in this batch, so allocations never collide
+                    highest_kept = max((self._patient_id_number(row['patient_id'])
+                                        for row in batch if row['patient_id']), default=0)
+                    if highest_kept:
+                        advance_to(session, PATIENT_ID_SEQUENCE, highest_kept + 1)
+                    # One sequence reservation covers every row of the batch that needs a new ID
+                    missing = [row for row in batch if row['patient_id'] is None]
+                    for row, patient_id in zip(missing, patient_service.allocate_patient_ids(session, len(missing))):
+                        row['patient_id'] = patient_id
+                        used_ids.add(patient_id)
+                    # Core executemany: one prepared INSERT for the whole batch
+                    session.connection().execute(insert(Patient.__table__), batch)
+                result['imported'] += len(batch)
+            
+            with open(file_path, 'rb') as raw:
+                text = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+                sample = text.read(IMPORT_SNIFF_BYTES)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=',\t;')
+                except csv.Error:
+                    dialect = csv.excel
+                
+                text.seek(0)
+                reader = csv.DictReader(text, dialect=dialect)
+                
+                batch = []
+                for row in reader:
+                    row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+                    if row.get('Patient ID'):
+                        patient_key = (row['Patient ID'], self._normalize_phone(row.get('Phone Number', '')))
+                        if patient_key in seen_patients:
+                            result['repeated'] += 1
+                            continue
+                        seen_patients.add(patient_key)
+                    patient_data = {
+                        'full_name': row.get('Full Name', ''),
+                        'phone_number': row.get('Phone Number', ''),
+                        'email': row.get('Email', ''),
+                        'address': row.get('Address', ''),
+                        'date_of_birth': None
+                    }
+                    
+                    errors = {}
+                    if row.get('Date of Birth'):
+                        try:
+                            patient_data['date_of_birth'] = self._parse_import_date(row['Date of Birth'])
+                        except ValueError:
+                            errors['date_of_birth'] = "Unrecognized date (use DD-MM-YYYY)"
+                    errors.update(patient_service.validate_patient_data(patient_data))
+                    
+                    if errors:
+                        if reject_writer is None:
+                            reject_file = open(reject_path, 'w', newline='', encoding='utf-8')
+                            reject_writer = csv.writer(reject_file)
+                            reject_writer.writerow(list(reader.fieldnames) + ['Errors'])
+                        reject_writer.writerow([row.get(name.strip(), '') for name in reader.fieldnames]
+                                               + ['; '.join(errors.values())])
+                        result['rejected'] += 1
+                        continue
+                    
+                    phone_key = self._normalize_phone(patient_data['phone_number'])
+                    if phone_key in known_phones:
+                        result['duplicates'] += 1
+                        continue
+                    known_phones.add(phone_key)
+                    
+                    batch.append({
+                        'patient_id': keep_patient_id(row.get('Patient ID', '')),
+                        'full_name': patient_data['full_name'],
+                        'phone_number': patient_data['phone_number'],
+                        'date_of_birth': patient_data['date_of_birth'],
+                        'email': patient_data['email'] or None,
+                        'address': patient_data['address'] or None
+                    })
+                    
+                    if len(batch) >= batch_size:
+                        check_cancelled(cancel_token)
+                        flush(batch)
+                        batch = []
+                        if progress_callback:
+                            progress_callback(raw.tell(), total_bytes)
+                
+                check_cancelled(cancel_token)
+                if batch:
+                    flush(batch)
+            
+            if progress_callback:
+                progress_callback(total_bytes, total_bytes)
+            
+            result['success'] = True
+            logger.info(f"Imported {result['imported']} patients from {file_path} "
+                        f"({result['duplicates']} duplicates and {result['repeated']} repeated rows skipped, "
+                        f"{result['rejected']} rejected)")
+            
+        except OperationCancelled:
+            result['cancelled'] = True
+            logger.info(f"Import from {file_path} cancelled after {result['imported']} patients")
+        except Exception as e:
+            logger.error(f"Error importing patients from CSV: {str(e)}")
+            result['errors'].append(str(e))
+        finally:
+            if reject_file:
+                reject_file.close()
+                result['reject_file'] = reject_path
+            if result['imported']:
+                dashboard_stats_service.invalidate()
+        
+        return result
+    
     def get_export_statistics(self) -> Dict[str, Any]:
         """
         Get statistics for export purposes.
@@ -0,0 +1,150 @@
+"""
+Streaming table exporters.
+
+Each exporter writes one table to one file, receiving rows in batches, so an
+export never holds a whole table in memory. New formats are added by
+subclassing TableExporter and registering the class in EXPORTERS.
+"""
+import csv
+import gzip
+import json
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Sequence, Type
+
+from ..utils.constants import EXPORT_FORMATS
+
+
+def _json_value(value: Any) -> Any:
+    """Convert a database value to something json.dumps accepts."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        # Text keeps money columns exact
+        return str(value)
+    return value
+
+
+class TableExporter(ABC):
+    """Base class for streaming exporters (one instance per output file)."""
+
+    name = ""
+    extension = ""
+    description = ""
+
+    def __init__(self, file_path: str, table_name: str, columns: List[str]):
+        self.file_path = file_path
+        self.table_name = table_name
+        self.columns = columns
+
+    @abstractmethod
+    def write_rows(self, rows: Sequence[Sequence[Any]]):
+        """Write a batch of rows (values in the order of self.columns)."""
+
+    @abstractmethod
+    def close(self):
+        """Flush and close the output file."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CsvExporter(TableExporter):
+    """Comma separated values with a header row; JSON columns are written as JSON text."""
+
+    name = "csv"
+    extension = ".csv"
+    description = EXPORT_FORMATS['csv']
+
+    def __init__(self, file_path: str, table_name: str, columns: List[str]):
+        super().__init__(file_path, table_name, columns)
+        self._file = open(file_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    @staticmethod
+    def _csv_value(value: Any) -> Any:
+        if value is None:
+            return ''
+        if isinstance(value, (list, dict)):
+            return json.dumps(value)
+        return value
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]):
+        self._writer.writerows([self._csv_value(value) for value in row] for row in rows)
+
+    def close(self):
+        self._file.close()
+
+
+class JsonLinesExporter(TableExporter):
+    """One JSON object per line, keyed by column name."""
+
+    name = "jsonl"
+    extension = ".jsonl"
+    description = EXPORT_FORMATS['jsonl']
+
+    def __init__(self, file_path: str, table_name: str, columns: List[str]):
+        super().__init__(file_path, table_name, columns)
+        self._file = open(file_path, 'w', encoding='utf-8')
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]):
+        self._file.writelines(
+            json.dumps(dict(zip(self.columns, map(_json_value, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        )
+
+    def close(self):
+        self._file.close()
+
+
+class ColumnarExporter(TableExporter):
+    """
+    Gzip-compressed column-oriented row groups (a stdlib stand-in for Parquet).
+
+    The first line is a header ``{"table", "columns"}``; every following line is
+    a row group ``{"rows": n, "columns": {name: [values...]}}`` holding one
+    batch, so readers can load single columns of large tables cheaply and
+    repeated values compress well.
+    """
+
+    name = "columnar"
+    extension = ".columnar.json.gz"
+    description = EXPORT_FORMATS['columnar']
+
+    def __init__(self, file_path: str, table_name: str, columns: List[str]):
+        super().__init__(file_path, table_name, columns)
+        self._file = gzip.open(file_path, 'wt', encoding='utf-8')
+        self._file.write(json.dumps({'format': 'columnar', 'version': 1,
+                                     'table': table_name, 'columns': columns}) + "\n")
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]):
+        if not rows:
+            return
+        column_values = zip(*rows)
+        group = {
+            'rows': len(rows),
+            'columns': {name: [_json_value(value) for value in values]
+                        for name, values in zip(self.columns, column_values)}
+        }
+        self._file.write(json.dumps(group, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+# Registered exporters by format name
+EXPORTERS: Dict[str, Type[TableExporter]] = {
+    exporter.name: exporter for exporter in (CsvExporter, JsonLinesExporter, ColumnarExporter)
+}
+
+
+def get_exporter(format_name: str) -> Type[TableExporter]:
+    """Get the exporter class for a format name."""
+    if format_name not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: {format_name}")
+    return EXPORTERS[format_name]
@@ -2,12 +2,17 @@
 Patient service for business logic and data operations.
 """
 import logging
+import re
 from datetime import datetime, date
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func, extract
+from sqlalchemy import or_, func, text
+from sqlalchemy.exc import OperationalError
 from ..database.models import Patient, DentalExamination
 from ..database.database import db_manager
+from ..database.sequences import reserve_block, PATIENT_ID_SEQUENCE
+from ..database.migrations import PATIENT_SEARCH_TABLE, PATIENT_SUBSTRING_TABLE
+from .dashboard_stats_service import dashboard_stats_service
 from ..utils.constants import PATIENT_ID_PREFIX, PATIENT_ID_LENGTH
 
 logger = logging.getLogger(__name__)
@@ -30,60 +35,47 @@ class PatientService:
             Patient object if successful, None otherwise
         """
         try:
-            session = db_manager.get_session()
-            
-            # Generate unique patient ID
-            patient_id = self._generate_patient_id(session)
-            
-            # Handle null date of birth
-            dob = patient_data.get('date_of_birth')
-            if isinstance(dob, date) and dob == date(1900, 1, 1):
-                dob = None
-            
-            # Create patient object
-            patient = Patient(
-                patient_id=patient_id,
-                full_name=patient_data['full_name'],
-                phone_number=patient_data['phone_number'],
-                date_of_birth=dob,
-                email=patient_data.get('email'),
-                address=patient_data.get('address')
-            )
-            
-            session.add(patient)
-            session.commit()
-            
-            # Refresh to get the committed data
-            session.refresh(patient)
-            
-            logger.info(f"Created patient: {patient.patient_id} - {patient.full_name}")
-            
-            # Convert to dict to avoid session issues
-            patient_dict = self._patient_to_dict(patient)
-            session.close()
+            with db_manager.session_scope() as session:
+                # Generate unique patient ID
+                patient_id = self._generate_patient_id(session)
+                
+                # Handle null date of birth
+                dob = patient_data.get('date_of_birth')
+                if isinstance(dob, date) and dob == date(1900, 1, 1):
+                    dob = None
+                
+                # Create patient object
+                patient = Patient(
+                    patient_id=patient_id,
+                    full_name=patient_data['full_name'],
+                    phone_number=patient_data['phone_number'],
+                    date_of_birth=dob,
+                    email=patient_data.get('email'),
+                    address=patient_data.get('address')
+                )
+                
+                session.add(patient)
+                
+                # Flush to assign the database ID and defaults before the scope commits
+                session.flush()
+                
+                # Convert to dict to avoid session issues
+                patient_dict = self._patient_to_dict(patient)
             
+            dashboard_stats_service.invalidate()
+            logger.info(f"Created patient: {patient_dict['patient_id']} - {patient_dict['full_name']}")
             return patient_dict
             
         except Exception as e:
             logger.error(f"Error creating patient: {str(e)}")
-            if session:
-                session.rollback()
-                session.close()
             return None
     
     def get_patient_by_id(self, patient_id: str) -> Optional[Dict]:
         """Get patient by patient ID."""
         try:
-            session = db_manager.get_session()
-            patient = session.query(Patient).filter(Patient.patient_id == patient_id).first()
-            
-            if patient:
-                patient_dict = self._patient_to_dict(patient)
-                session.close()
-                return patient_dict
-            
-            session.close()
-            return None
+            with db_manager.session_scope() as session:
+                patient = session.query(Patient).filter(Patient.patient_id == patient_id).first()
+                return self._patient_to_dict(patient) if patient else None
             
         except Exception as e:
             logger.error(f"Error getting patient {patient_id}: {str(e)}")
@@ -92,16 +84,9 @@ class PatientService:
     def get_patient_by_db_id(self, db_id: int) -> Optional[Dict]:
         """Get patient by database ID."""
         try:
-            session = db_manager.get_session()
-            patient = session.query(Patient).filter(Patient.id == db_id).first()
-            
-            if patient:
-                patient_dict = self._patient_to_dict(patient)
-                session.close()
-                return patient_dict
-            
-            session.close()
-            return None
+            with db_manager.session_scope() as session:
+                patient = session.query(Patient).filter(Patient.id == db_id).first()
+                return self._patient_to_dict(patient) if patient else None
             
         except Exception as e:
             logger.error(f"Error getting patient with ID {db_id}: {str(e)}")
@@ -119,38 +104,31 @@ class PatientService:
             True if successful, False otherwise
         """
         try:
-            session = db_manager.get_session()
-            patient = session.query(Patient).filter(Patient.patient_id == patient_id).first()
-            
-            if not patient:
-                logger.warning(f"Patient not found: {patient_id}")
-                session.close()
-                return False
-            
-            # Handle null date of birth
-            dob = patient_data.get('date_of_birth')
-            if isinstance(dob, date) and dob == date(1900, 1, 1):
-                dob = None
-            
-            # Update patient fields
-            patient.full_name = patient_data.get('full_name', patient.full_name)
-            patient.phone_number = patient_data.get('phone_number', patient.phone_number)
-            patient.date_of_birth = dob if 'date_of_birth' in patient_data else patient.date_of_birth
-            patient.email = patient_data.get('email', patient.email)
-            patient.address = patient_data.get('address', patient.address)
-            patient.updated_at = datetime.utcnow()
-            
-            session.commit()
-            session.close()
+            with db_manager.session_scope() as session:
+                patient = session.query(Patient).filter(Patient.patient_id == patient_id).first()
+                
+                if not patient:
+                    logger.warning(f"Patient not found: {patient_id}")
+                    return False
+                
+                # Handle null date of birth
+                dob = patient_data.get('date_of_birth')
+                if isinstance(dob, date) and dob == date(1900, 1, 1):
+                    dob = None
+                
+                # Update patient fields
+                patient.full_name = patient_data.get('full_name', patient.full_name)
+                patient.phone_number = patient_data.get('phone_number', patient.phone_number)
+                patient.date_of_birth = dob if 'date_of_birth' in patient_data else patient.date_of_birth
+                patient.email = patient_data.get('email', patient.email)
+                patient.address = patient_data.get('address', patient.address)
+                patient.updated_at = datetime.utcnow()
             
             logger.info(f"Updated patient: {patient_id}")
             return True
             
         except Exception as e:
             logger.error(f"Error updating patient {patient_id}: {str(e)}")
-            if session:
-                session.rollback()
-                session.close()
             return False
     
     def delete_patient(self, patient_id: str) -> bool:
@@ -164,32 +142,119 @@ class PatientService:
             True if successful, False otherwise
         """
         try:
-            session = db_manager.get_session()
-            patient = session.query(Patient).filter(Patient.patient_id == patient_id).first()
-            
-            if not patient:
-                logger.warning(f"Patient not found: {patient_id}")
-                session.close()
-                return False
-            
-            # For now, we'll do a hard delete. In production, consider soft delete
-            session.delete(patient)
-            session.commit()
-            session.close()
-            
+            with db_manager.session_scope() as session:
+                patient = session.query(Patient).filter(Patient.patient_id == patient_id).first()
+                
+                if not patient:
+                    logger.warning(f"Patient not found: {patient_id}")
+                    return False
+                
+                # For now, we'll do a hard delete. In production, consider soft delete
+                session.delete(patient)
+            
+            dashboard_stats_service.invalidate()
             logger.info(f"Deleted patient: {patient_id}")
             return True
             
         except Exception as e:
             logger.error(f"Error deleting patient {patient_id}: {str(e)}")
-            if session:
-                session.rollback()
-                session.close()
             return False
     
+    # bm25 weights of the patients_fts columns (full_name, patient_id, phone_digits, email)
+    SEARCH_RANK_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+    
+    # bm25 ranks only the newest this many word matches, so a short prefix like "ra"
+    # that matches most patients costs a bounded amount of scoring
+    SEARCH_RANK_WINDOW = 2000
+    
+    # Substring matches need at least one trigram
+    SUBSTRING_MIN_LENGTH = 3
+    
+    # Terms made only of digits and phone separators are searched as one digit string
+    PHONE_LIKE_TERM = re.compile(r'[\d\s()+./-]*\d[\d\s()+./-]*')
+    
+    def _search_match_expression(self, search_term: str) -> Optional[str]:
+        """
+        Build the FTS5 MATCH expression for a search term.
+        
+        Every word becomes a prefix query and all must match; phone-like terms
+        ("98765 43210", "+91-98765") become a single digits-only prefix.
+        """
+        term = search_term.strip()
+        if self.PHONE_LIKE_TERM.fullmatch(term):
+            tokens = [''.join(ch for ch in term if ch.isdigit())]
+        else:
+            tokens = re.findall(r'\w+', term)
+        return " ".join(f'"{token}"*' for token in tokens) or None
+    
+    def _substring_match_expression(self, search_term: str) -> Optional[str]:
+        """
+        Build the trigram MATCH expression finding the term anywhere in a field.
+        
+        Phone-like terms also match the digits-only phone number, so "98765 43"
+        finds "+91 9876543210". Terms shorter than SUBSTRING_MIN_LENGTH give None.
+        """
+        term = search_term.strip()
+        if len(term) < self.SUBSTRING_MIN_LENGTH:
+            return None
+        phrases = [term]
+        if self.PHONE_LIKE_TERM.fullmatch(term):
+            digits = ''.join(ch for ch in term if ch.isdigit())
+            if len(digits) >= self.SUBSTRING_MIN_LENGTH and digits != term:
+                phrases.append(digits)
+        return " OR ".join('"' + phrase.replace('"', '""') + '"' for phrase in phrases)
+    
+    def _search_patient_ids(self, session: Session, search_term: str, limit: int) -> Optional[List[int]]:
+        """
+        Find patient row IDs through the search indexes, best match first.
+        
+        Word and digit prefix matches (patients_fts) come first, ordered by
+        bm25 over the newest SEARCH_RANK_WINDOW of them. Substring matches
+        (patients_trigram, what the former ILIKE scan found) fill the
+        remaining places, newest first.
+        
+        Returns:
+            Matching IDs (possibly empty), or None if the indexes cannot be used
+        """
+        expression = self._search_match_expression(search_term)
+        substring = self._substring_match_expression(search_term)
+        weights = ", ".join(str(weight) for weight in self.SEARCH_RANK_WEIGHTS)
+        try:
+            patient_ids = []
+            if expression:
+                patient_ids = list(session.execute(
+                    text(f"SELECT rowid FROM (SELECT rowid, bm25({PATIENT_SEARCH_TABLE}, {weights}) AS score "
+                         f"FROM {PATIENT_SEARCH_TABLE} WHERE {PATIENT_SEARCH_TABLE} MATCH :expression "
+                         f"ORDER BY rowid DESC LIMIT :window) ORDER BY score, rowid DESC LIMIT :limit"),
+                    {'expression': expression, 'window': self.SEARCH_RANK_WINDOW, 'limit': limit}
+                ).scalars())
+            
+            if substring and len(patient_ids) < limit:
+                seen = set(patient_ids)
+                substring_ids = session.execute(
+                    text(f"SELECT rowid FROM {PATIENT_SUBSTRING_TABLE} WHERE {PATIENT_SUBSTRING_TABLE} "
+                         f"MATCH :substring ORDER BY rowid DESC LIMIT :limit"),
+                    {'substring': substring, 'limit': limit}
+                ).scalars()
+                patient_ids.extend(patient_id for patient_id in substring_ids if patient_id not in seen)
+            
+            return patient_ids[:limit]
+        except OperationalError as e:
+            logger.debug("Indexed patient search unavailable: %s", e)
+            session.rollback()
+            return None
+    
     def search_patients(self, search_term: str = "", limit: int = 100) -> List[Dict]:
         """
-        Search patients by name, patient ID, or phone number.
+        Search patients by name, patient ID, phone number or email.
+        
+        Matches come from two indexes kept in sync by triggers:
+        word prefixes of the name, patient ID and email and digit prefixes of
+        the phone number (ranked by bm25, see _search_patient_ids), followed by
+        substring matches in any of these fields for terms of at least
+        SUBSTRING_MIN_LENGTH characters, like the former ILIKE '%term%' search.
+        Shorter terms match prefixes only. A substring scan, newest patients
+        first, is only used when the indexes are missing.
         
         Args:
             search_term: Search term to filter patients
@@ -199,25 +264,34 @@ class PatientService:
             List of patient dictionaries
         """
         try:
-            session = db_manager.get_session()
-            query = session.query(Patient)
-            
-            if search_term:
-                search_filter = or_(
-                    Patient.full_name.ilike(f"%{search_term}%"),
-                    Patient.patient_id.ilike(f"%{search_term}%"),
-                    Patient.phone_number.ilike(f"%{search_term}%"),
-                    Patient.email.ilike(f"%{search_term}%")
-                )
-                query = query.filter(search_filter)
-            
-            # Order by creation date (newest first)
-            patients = query.order_by(Patient.created_at.desc()).limit(limit).all()
-            
-            patient_list = [self._patient_to_dict(patient) for patient in patients]
-            session.close()
-            
-            logger.info(f"Found {len(patient_list)} patients for search: '{search_term}'")
+            with db_manager.session_scope() as session:
+                if search_term.strip():
+                    patient_ids = self._search_patient_ids(session, search_term, limit)
+                    if patient_ids is not None:
+                        by_id = {patient.id: patient
+                                 for patient in session.query(Patient).filter(Patient.id.in_(patient_ids))}
+                        patient_list = [self._patient_to_dict(by_id[patient_id])
+                                        for patient_id in patient_ids if patient_id in by_id]
+                        logger.debug("Found %d patients for search %r", len(patient_list), search_term)
+                        return patient_list
+                
+                query = session.query(Patient)
+                
+                if search_term:
+                    search_filter = or_(
+                        Patient.full_name.ilike(f"%{search_term}%"),
+                        Patient.patient_id.ilike(f"%{search_term}%"),
+                        Patient.phone_number.ilike(f"%{search_term}%"),
+                        Patient.email.ilike(f"%{search_term}%")
+                    )
+                    query = query.filter(search_filter)
+                
+                # Order by creation date (newest first)
+                patients = query.order_by(Patient.created_at.desc()).limit(limit).all()
+                
+                patient_list = [self._patient_to_dict(patient) for patient in patients]
+            
+            logger.debug("Found %d patients for search %r", len(patient_list), search_term)
             return patient_list
             
         except Exception as e:
@@ -231,9 +305,8 @@ class PatientService:
     def get_patient_count(self) -> int:
         """Get total number of patients."""
         try:
-            session = db_manager.get_session()
-            count = session.query(func.count(Patient.id)).scalar()
-            session.close()
+            with db_manager.session_scope() as session:
+                count = session.query(func.count(Patient.id)).scalar()
             return count or 0
         except Exception as e:
             logger.error(f"Error getting patient count: {str(e)}")
@@ -242,13 +315,9 @@ class PatientService:
     def get_recent_patients(self, limit: int = 10) -> List[Dict]:
         """Get recently added patients."""
         try:
-            session = db_manager.get_session()
-            patients = session.query(Patient).order_by(Patient.created_at.desc()).limit(limit).all()
-            
-            patient_list = [self._patient_to_dict(patient) for patient in patients]
-            session.close()
-            
-            return patient_list
+            with db_manager.session_scope() as session:
+                patients = session.query(Patient).order_by(Patient.created_at.desc()).limit(limit).all()
+                return [self._patient_to_dict(patient) for patient in patients]
             
         except Exception as e:
             logger.error(f"Error getting recent patients: {str(e)}")
@@ -256,104 +325,30 @@ class PatientService:
     
     def get_patients_this_month(self) -> int:
         """Get number of patients added this month."""
-        try:
-            from datetime import datetime
-            
-            session = db_manager.get_session()
-            current_year = datetime.now().year
-            current_month = datetime.now().month
-            
-            count = session.query(func.count(Patient.id)).filter(
-                extract('year', Patient.created_at) == current_year,
-                extract('month', Patient.created_at) == current_month
-            ).scalar()
-            
-            session.close()
-            return count or 0
-            
-        except Exception as e:
-            logger.error(f"Error getting patients this month: {str(e)}")
-            return 0
+        return self.get_patients_statistics()['this_month']
     
     def get_patients_statistics(self) -> Dict[str, int]:
-        """Get comprehensive patient statistics."""
-        try:
-            from datetime import datetime, timedelta
-            
-            session = db_manager.get_session()
-            
-            stats = {}
-            
-            # Total patients
-            stats['total'] = session.query(func.count(Patient.id)).scalar() or 0
-            
-            # Patients this month
-            current_year = datetime.now().year
-            current_month = datetime.now().month
-            stats['this_month'] = session.query(func.count(Patient.id)).filter(
-                extract('year', Patient.created_at) == current_year,
-                extract('month', Patient.created_at) == current_month
-            ).scalar() or 0
-            
-            # Patients this week
-            week_ago = datetime.now() - timedelta(days=7)
-            stats['this_week'] = session.query(func.count(Patient.id)).filter(
-                Patient.created_at >= week_ago
-            ).scalar() or 0
-            
-            # Patients today
-            today = datetime.now().date()
-            stats['today'] = session.query(func.count(Patient.id)).filter(
-                func.date(Patient.created_at) == today
-            ).scalar() or 0
-            
-            # Total examinations (count from dental_examinations table)
-            stats['total_examinations'] = session.query(func.count(DentalExamination.id)).scalar() or 0
-            
-            # Examinations this month
-            stats['examinations_this_month'] = session.query(func.count(DentalExamination.id)).filter(
-                extract('year', DentalExamination.examination_date) == current_year,
-                extract('month', DentalExamination.examination_date) == current_month
-            ).scalar() or 0
-            
-            session.close()
-            return stats
-            
-        except Exception as e:
-            logger.error(f"Error getting patient statistics: {str(e)}")
-            return {'total': 0, 'this_month': 0, 'this_week': 0, 'today': 0, 'total_examinations': 0, 'examinations_this_month': 0}
+        """Get comprehensive patient statistics (cached; see DashboardStatsService)."""
+        return dashboard_stats_service.get_dashboard_stats()
+    
+    def _format_patient_id(self, number: int) -> str:
+        """Format a sequence number as a patient ID (e.g., 1 -> "P00001")."""
+        return f"{PATIENT_ID_PREFIX}{number:0{PATIENT_ID_LENGTH-1}d}"
+    
+    def allocate_patient_ids(self, session: Session, count: int) -> List[str]:
+        """
+        Reserve a block of new patient IDs in the session's transaction.
+        
+        One UPDATE on the patient ID sequence, whatever the block size, so
+        single creates and bulk imports cost the same and concurrent workers
+        never receive the same ID.
+        """
+        first = reserve_block(session, PATIENT_ID_SEQUENCE, count)
+        return [self._format_patient_id(number) for number in range(first, first + count)]
     
     def _generate_patient_id(self, session: Session) -> str:
         """Generate a unique patient ID."""
-        try:
-            # Get the highest existing patient ID number
-            latest_patient = session.query(Patient).order_by(Patient.id.desc()).first()
-            
-            if latest_patient and latest_patient.patient_id.startswith(PATIENT_ID_PREFIX):
-                try:
-                    # Extract number from patient ID (e.g., "P00001" -> 1)
-                    last_number = int(latest_patient.patient_id[len(PATIENT_ID_PREFIX):])
-                    next_number = last_number + 1
-                except (ValueError, IndexError):
-                    next_number = 1
-            else:
-                next_number = 1
-            
-            # Format with leading zeros
-            patient_id = f"{PATIENT_ID_PREFIX}{next_number:0{PATIENT_ID_LENGTH-1}d}"
-            
-            # Ensure uniqueness (in case of gaps)
-            while session.query(Patient).filter(Patient.patient_id == patient_id).first():
-                next_number += 1
-                patient_id = f"{PATIENT_ID_PREFIX}{next_number:0{PATIENT_ID_LENGTH-1}d}"
-            
-            return patient_id
-            
-        except Exception as e:
-            logger.error(f"Error generating patient ID: {str(e)}")
-            # Fallback to timestamp-based ID
-            import time
-            return f"{PATIENT_ID_PREFIX}{int(time.time())}"
+        return self.allocate_patient_ids(session, 1)[0]
     
     def _patient_to_dict(self, patient: Patient) -> Dict:
         """Convert Patient object to dictionary."""
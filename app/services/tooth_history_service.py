@@ -2,42 +2,199 @@
 Service for managing tooth history records.
 """
 import logging
-import json
+from array import array
+from collections import OrderedDict
 from datetime import date, datetime
 from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import desc, and_
 
 from ..database.database import db_manager
-from ..database.models import ToothHistory, Patient, DentalExamination
+from ..database.models import ToothHistory, ToothHistoryEvent, Patient, DentalExamination
 
 logger = logging.getLogger(__name__)
 
+# Standard tooth numbers (32 teeth): upper right 11-18, upper left 21-28,
+# lower left 31-38, lower right 41-48
+ALL_TEETH = [*range(11, 19), *range(21, 29), *range(31, 39), *range(41, 49)]
+
+# Number of patients whose chart snapshots are kept in memory
+CHART_SNAPSHOT_CACHE_SIZE = 8
+
+
+class ToothChartSnapshot:
+    """Whole-mouth chart state for one patient, shared by the patient and doctor panels."""
+    
+    def __init__(self, patient_id: int, tooth_summary: Dict[int, Dict[str, Any]]):
+        self.patient_id = patient_id
+        self.tooth_summary = tooth_summary
+        self.created_at = datetime.now()
+    
+    def get_tooth_status(self, tooth_number: int) -> Optional[Dict[str, Any]]:
+        """Get the summary dictionary for a tooth (same shape as get_tooth_current_status)."""
+        return self.tooth_summary.get(tooth_number)
+    
+    def get_statuses(self, tooth_number: int, record_type: str) -> List[str]:
+        """Get the latest statuses of a tooth for 'patient_problem' or 'doctor_finding'."""
+        summary = self.tooth_summary.get(tooth_number)
+        if not summary:
+            return ['normal']
+        
+        key = 'latest_patient_problem' if record_type == 'patient_problem' else 'latest_doctor_finding'
+        latest_record = summary.get(key)
+        if latest_record and latest_record['status']:
+            return latest_record['status']
+        return ['normal']
+
+
+class ToothTimelines:
+    """
+    Merged history entries of many teeth, stored column by column.
+    
+    Entry i is (dates[i], tooth_numbers[i], record_types[i], statuses[i],
+    descriptions[i], history_ids[i]); entries are sorted newest first (ties
+    broken by newest insert), so a full-mouth report is rendered by walking
+    the columns once.
+    """
+    
+    __slots__ = ('dates', 'tooth_numbers', 'record_types', 'statuses', 'descriptions', 'history_ids')
+    
+    def __init__(self, rows: List[tuple] = ()):
+        columns = list(zip(*rows)) or [()] * 6
+        self.dates: List[date] = list(columns[0])
+        self.tooth_numbers = array('i', columns[1])
+        self.record_types: List[str] = list(columns[2])
+        self.statuses: List[List[str]] = [status.split(',') if status else [] for status in columns[3]]
+        self.descriptions: List[str] = [description or '' for description in columns[4]]
+        self.history_ids = array('i', columns[5])
+    
+    def __len__(self) -> int:
+        return len(self.dates)
+    
+    def indexes_for_tooth(self, tooth_number: int) -> List[int]:
+        """Positions of one tooth's entries, newest first."""
+        return [index for index, number in enumerate(self.tooth_numbers) if number == tooth_number]
+    
+    def to_dicts(self, indexes: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+        """Convert entries to the per-entry dictionaries returned by get_tooth_timeline."""
+        if indexes is None:
+            indexes = range(len(self.dates))
+        return [{
+            'date': self.dates[index].isoformat(),
+            'type': self.record_types[index],
+            'status': self.statuses[index],
+            'description': self.descriptions[index],
+            'record_id': self.history_ids[index]
+        } for index in indexes]
+
 
 class ToothHistoryService:
     """Service for managing tooth history records."""
     
-    def _parse_history_field(self, field_value: str) -> List[Any]:
-        """Parse JSON history field, return empty list if invalid."""
-        if not field_value:
-            return []
-        try:
-            return json.loads(field_value)
-        except (json.JSONDecodeError, TypeError):
-            return []
+    def __init__(self):
+        self._chart_snapshots: "OrderedDict[int, ToothChartSnapshot]" = OrderedDict()
+        # Snapshots describe the old file after a restore
+        db_manager.add_reload_listener(self.invalidate_chart_snapshot)
     
-    def _serialize_history_field(self, field_list: List[Any]) -> str:
-        """Serialize list to JSON string."""
-        try:
-            return json.dumps(field_list) if field_list else "[]"
-        except (TypeError, ValueError):
-            return "[]"
+    def get_chart_snapshot(self, patient_id: int) -> ToothChartSnapshot:
+        """
+        Get the chart snapshot for a patient, building it from a single summary query if needed.
+        
+        Args:
+            patient_id: ID of the patient
+            
+        Returns:
+            ToothChartSnapshot shared by every caller until the patient's history changes
+        """
+        snapshot = self._chart_snapshots.get(patient_id)
+        if snapshot is not None:
+            self._chart_snapshots.move_to_end(patient_id)
+            return snapshot
+        
+        snapshot = ToothChartSnapshot(patient_id, self.get_patient_tooth_summary(patient_id))
+        
+        # Do not cache failed loads so the next caller retries
+        if snapshot.tooth_summary:
+            self._chart_snapshots[patient_id] = snapshot
+            while len(self._chart_snapshots) > CHART_SNAPSHOT_CACHE_SIZE:
+                self._chart_snapshots.popitem(last=False)
+        
+        return snapshot
+    
+    def invalidate_chart_snapshot(self, patient_id: Optional[int] = None):
+        """Drop the cached chart snapshot for a patient, or all snapshots if no patient is given."""
+        if patient_id is None:
+            self._chart_snapshots.clear()
+        else:
+            self._chart_snapshots.pop(patient_id, None)
+    
+    def _history_lists(self, history: ToothHistory) -> Dict[str, List[Any]]:
+        """
+        Build the oldest-first status/description/date lists of a record from its events.
+        
+        Keeps the shape of the former JSON history columns for callers that read them.
+        """
+        events = history.events
+        return {
+            'status_history': [event.status.split(',') if event.status else [] for event in events],
+            'description_history': [event.description for event in events],
+            'date_history': [event.date_recorded.isoformat() for event in events]
+        }
+    
+    def _history_to_dict(self, history: ToothHistory, include_history: bool = False) -> Dict[str, Any]:
+        """
+        Convert a ToothHistory row to the dictionary shape used by the UI.
+        
+        The current state comes from the projection columns; the per-entry
+        lists are only added (and the events loaded) when include_history is set.
+        """
+        result = {
+            'id': history.id,
+            'patient_id': history.patient_id,
+            'examination_id': history.examination_id,
+            'tooth_number': history.tooth_number,
+            'record_type': history.record_type,
+            'status': history.status.split(',') if history.status else [],
+            'description': history.description,
+            'date_recorded': history.date_recorded,
+            'created_at': history.created_at,
+            'examination_date': history.examination.examination_date if history.examination else None
+        }
+        if include_history:
+            result.update(self._history_lists(history))
+        return result
+    
+    def _build_tooth_status(self, tooth_number: int, patient_problems: List[Dict[str, Any]],
+                            doctor_findings: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build the current status summary for one tooth from its newest-first records."""
+        latest_patient_problem = patient_problems[0] if patient_problems else None
+        latest_doctor_finding = doctor_findings[0] if doctor_findings else None
+        
+        # Determine current status (doctor finding takes precedence)
+        current_statuses = ['normal']
+        if latest_doctor_finding and latest_doctor_finding['status']:
+            current_statuses = latest_doctor_finding['status']
+        elif latest_patient_problem and latest_patient_problem['status']:
+            current_statuses = latest_patient_problem['status']
+        
+        return {
+            'tooth_number': tooth_number,
+            'current_status': current_statuses,
+            'latest_patient_problem': latest_patient_problem,
+            'latest_doctor_finding': latest_doctor_finding,
+            'patient_problems_count': len(patient_problems),
+            'doctor_findings_count': len(doctor_findings)
+        }
     
     def add_tooth_history_entry(self, patient_id: int, tooth_number: int, record_type: str, 
                                statuses: List[str], description: str = "", examination_id: Optional[int] = None) -> bool:
         """
         Add a new entry to existing tooth history or create new record.
         
+        The entry is inserted as one tooth_history_events row and the record's
+        status/description/date_recorded projection is updated, so the cost
+        does not depend on how long the tooth's history already is.
+        
         Args:
             patient_id: ID of the patient
             tooth_number: Tooth number
@@ -50,66 +207,52 @@ class ToothHistoryService:
             True if successful, False otherwise
         """
         try:
-            session = db_manager.get_session()
-            current_date = date.today().isoformat()
-            
-            # Find existing record for this patient, tooth, and record type
-            existing_record = session.query(ToothHistory).filter(
-                and_(
-                    ToothHistory.patient_id == patient_id,
-                    ToothHistory.tooth_number == tooth_number,
-                    ToothHistory.record_type == record_type
-                )
-            ).first()
-            
-            if existing_record:
-                # Update existing record by adding to history
-                status_history = self._parse_history_field(existing_record.status_history)
-                description_history = self._parse_history_field(existing_record.description_history)
-                date_history = self._parse_history_field(existing_record.date_history)
+            with db_manager.session_scope() as session:
+                today = date.today()
+                status = ",".join(statuses)
                 
-                # Add new entries
-                status_history.append(statuses)
-                description_history.append(description)
-                date_history.append(current_date)
+                # Find existing record for this patient, tooth, and record type
+                record = session.query(ToothHistory).filter(
+                    and_(
+                        ToothHistory.patient_id == patient_id,
+                        ToothHistory.tooth_number == tooth_number,
+                        ToothHistory.record_type == record_type
+                    )
+                ).first()
                 
-                # Update the record
-                existing_record.status_history = self._serialize_history_field(status_history)
-                existing_record.description_history = self._serialize_history_field(description_history)
-                existing_record.date_history = self._serialize_history_field(date_history)
+                if record is None:
+                    record = ToothHistory(
+                        patient_id=patient_id,
+                        examination_id=examination_id,
+                        tooth_number=tooth_number,
+                        record_type=record_type
+                    )
+                    session.add(record)
                 
-                # Update latest/current fields
-                existing_record.status = ",".join(statuses)
-                existing_record.description = description
-                existing_record.date_recorded = date.today()
+                # Latest-state projection
+                record.status = status
+                record.description = description
+                record.date_recorded = today
+                session.flush()
                 
-            else:
-                # Create new record
-                tooth_history = ToothHistory(
+                # Append the entry without loading the existing ones
+                session.add(ToothHistoryEvent(
+                    history_id=record.id,
                     patient_id=patient_id,
-                    examination_id=examination_id,
                     tooth_number=tooth_number,
                     record_type=record_type,
-                    status_history=self._serialize_history_field([statuses]),
-                    description_history=self._serialize_history_field([description]),
-                    date_history=self._serialize_history_field([current_date]),
-                    status=",".join(statuses),
+                    status=status,
                     description=description,
-                    date_recorded=date.today()
-                )
-                session.add(tooth_history)
+                    date_recorded=today
+                ))
             
-            session.commit()
-            session.close()
+            self.invalidate_chart_snapshot(patient_id)
             
-            logger.info(f"Added tooth history entry for patient {patient_id}, tooth {tooth_number}")
+            logger.debug("Added tooth history entry for patient %s, tooth %s", patient_id, tooth_number)
             return True
             
         except Exception as e:
             logger.error(f"Error adding tooth history entry: {str(e)}")
-            if session:
-                session.rollback()
-                session.close()
             return False
     
     def get_tooth_history_by_id(self, history_id: int) -> Optional[Dict[str, Any]]:
@@ -123,40 +266,33 @@ class ToothHistoryService:
             Dictionary containing tooth history data or None if not found
         """
         try:
-            session = db_manager.get_session()
-            
-            history = session.query(ToothHistory).filter(
-                ToothHistory.id == history_id
-            ).first()
-            
-            if not history:
-                session.close()
-                return None
-            
-            result = {
-                'id': history.id,
-                'patient_id': history.patient_id,
-                'examination_id': history.examination_id,
-                'tooth_number': history.tooth_number,
-                'record_type': history.record_type,
-                'current_status': history.status.split(',') if history.status else [],
-                'current_description': history.description,
-                'current_date': history.date_recorded,
-                'status_history': self._parse_history_field(history.status_history),
-                'description_history': self._parse_history_field(history.description_history),
-                'date_history': self._parse_history_field(history.date_history),
-                'created_at': history.created_at,
-                'patient_name': history.patient.full_name if history.patient else '',
-                'examination_date': history.examination.examination_date if history.examination else None
-            }
-            
-            session.close()
-            return result
+            with db_manager.session_scope() as session:
+                history = session.query(ToothHistory).options(
+                    selectinload(ToothHistory.events)
+                ).filter(
+                    ToothHistory.id == history_id
+                ).first()
+                
+                if not history:
+                    return None
+                
+                return {
+                    'id': history.id,
+                    'patient_id': history.patient_id,
+                    'examination_id': history.examination_id,
+                    'tooth_number': history.tooth_number,
+                    'record_type': history.record_type,
+                    'current_status': history.status.split(',') if history.status else [],
+                    'current_description': history.description,
+                    'current_date': history.date_recorded,
+                    **self._history_lists(history),
+                    'created_at': history.created_at,
+                    'patient_name': history.patient.full_name if history.patient else '',
+                    'examination_date': history.examination.examination_date if history.examination else None
+                }
             
         except Exception as e:
             logger.error(f"Error getting tooth history {history_id}: {str(e)}")
-            if session:
-                session.close()
             return None
     
     def get_tooth_full_history(self, patient_id: int, tooth_number: int, record_type: Optional[str] = None) -> Dict[str, Any]:
@@ -172,52 +308,48 @@ class ToothHistoryService:
             Dictionary containing complete tooth history
         """
         try:
-            session = db_manager.get_session()
-            
-            query = session.query(ToothHistory).filter(
-                and_(
-                    ToothHistory.patient_id == patient_id,
-                    ToothHistory.tooth_number == tooth_number
+            with db_manager.session_scope() as session:
+                query = session.query(ToothHistory).options(
+                    selectinload(ToothHistory.events)
+                ).filter(
+                    and_(
+                        ToothHistory.patient_id == patient_id,
+                        ToothHistory.tooth_number == tooth_number
+                    )
                 )
-            )
-            
-            if record_type:
-                query = query.filter(ToothHistory.record_type == record_type)
-            
-            records = query.all()
-            
-            result = {
-                'tooth_number': tooth_number,
-                'patient_id': patient_id,
-                'patient_problems': [],
-                'doctor_findings': []
-            }
-            
-            for record in records:
-                history_data = {
-                    'id': record.id,
-                    'examination_id': record.examination_id,
-                    'current_status': record.status.split(',') if record.status else [],
-                    'current_description': record.description,
-                    'current_date': record.date_recorded,
-                    'status_history': self._parse_history_field(record.status_history),
-                    'description_history': self._parse_history_field(record.description_history),
-                    'date_history': self._parse_history_field(record.date_history),
-                    'created_at': record.created_at
+                
+                if record_type:
+                    query = query.filter(ToothHistory.record_type == record_type)
+                
+                records = query.all()
+                
+                result = {
+                    'tooth_number': tooth_number,
+                    'patient_id': patient_id,
+                    'patient_problems': [],
+                    'doctor_findings': []
                 }
                 
-                if record.record_type == 'patient_problem':
-                    result['patient_problems'].append(history_data)
-                elif record.record_type == 'doctor_finding':
-                    result['doctor_findings'].append(history_data)
-            
-            session.close()
-            return result
+                for record in records:
+                    history_data = {
+                        'id': record.id,
+                        'examination_id': record.examination_id,
+                        'current_status': record.status.split(',') if record.status else [],
+                        'current_description': record.description,
+                        'current_date': record.date_recorded,
+                        **self._history_lists(record),
+                        'created_at': record.created_at
+                    }
+                    
+                    if record.record_type == 'patient_problem':
+                        result['patient_problems'].append(history_data)
+                    elif record.record_type == 'doctor_finding':
+                        result['doctor_findings'].append(history_data)
+                
+                return result
             
         except Exception as e:
             logger.error(f"Error getting full tooth history for tooth {tooth_number}: {str(e)}")
-            if session:
-                session.close()
             return {
                 'tooth_number': tooth_number,
                 'patient_id': patient_id,
@@ -226,7 +358,8 @@ class ToothHistoryService:
             }
     
     def get_tooth_history(self, patient_id: int, tooth_number: Optional[int] = None, 
-                         record_type: Optional[str] = None, examination_id: Optional[int] = None) -> List[Dict[str, Any]]:
+                         record_type: Optional[str] = None, examination_id: Optional[int] = None,
+                         include_history: bool = False) -> List[Dict[str, Any]]:
         """
         Get tooth history records for a patient (backward compatibility method).
         
@@ -235,51 +368,33 @@ class ToothHistoryService:
             tooth_number: Optional specific tooth number to filter by
             record_type: Optional record type ('patient_problem' or 'doctor_finding')
             examination_id: Optional examination ID to filter by
+            include_history: Also load every entry (status_history, description_history,
+                date_history); otherwise only the current state is read
             
         Returns:
             List of tooth history dictionaries
         """
         try:
-            session = db_manager.get_session()
-            
-            query = session.query(ToothHistory).filter(ToothHistory.patient_id == patient_id)
-            
-            if tooth_number:
-                query = query.filter(ToothHistory.tooth_number == tooth_number)
-            
-            if record_type:
-                query = query.filter(ToothHistory.record_type == record_type)
-            
-            if examination_id:
-                query = query.filter(ToothHistory.examination_id == examination_id)
-            
-            histories = query.order_by(desc(ToothHistory.date_recorded)).all()
-            
-            results = []
-            for history in histories:
-                results.append({
-                    'id': history.id,
-                    'patient_id': history.patient_id,
-                    'examination_id': history.examination_id,
-                    'tooth_number': history.tooth_number,
-                    'record_type': history.record_type,
-                    'status': history.status.split(',') if history.status else [],
-                    'description': history.description,
-                    'date_recorded': history.date_recorded,
-                    'status_history': self._parse_history_field(history.status_history),
-                    'description_history': self._parse_history_field(history.description_history),
-                    'date_history': self._parse_history_field(history.date_history),
-                    'created_at': history.created_at,
-                    'examination_date': history.examination.examination_date if history.examination else None
-                })
-            
-            session.close()
-            return results
+            with db_manager.session_scope() as session:
+                query = session.query(ToothHistory).filter(ToothHistory.patient_id == patient_id)
+                if include_history:
+                    query = query.options(selectinload(ToothHistory.events))
+                
+                if tooth_number:
+                    query = query.filter(ToothHistory.tooth_number == tooth_number)
+                
+                if record_type:
+                    query = query.filter(ToothHistory.record_type == record_type)
+                
+                if examination_id:
+                    query = query.filter(ToothHistory.examination_id == examination_id)
+                
+                histories = query.order_by(desc(ToothHistory.date_recorded)).all()
+                
+                return [self._history_to_dict(history, include_history) for history in histories]
             
         except Exception as e:
             logger.error(f"Error getting tooth history for patient {patient_id}: {str(e)}")
-            if session:
-                session.close()
             return []
     
     def get_tooth_current_status(self, patient_id: int, tooth_number: int) -> Dict[str, Any]:
@@ -298,29 +413,13 @@ class ToothHistoryService:
             patient_problems = self.get_tooth_history(
                 patient_id, tooth_number, record_type='patient_problem'
             )
-            latest_patient_problem = patient_problems[0] if patient_problems else None
             
             # Get latest doctor finding
             doctor_findings = self.get_tooth_history(
                 patient_id, tooth_number, record_type='doctor_finding'
             )
-            latest_doctor_finding = doctor_findings[0] if doctor_findings else None
             
-            # Determine current status (doctor finding takes precedence)
-            current_statuses = ['normal']
-            if latest_doctor_finding and latest_doctor_finding['status']:
-                current_statuses = latest_doctor_finding['status']
-            elif latest_patient_problem and latest_patient_problem['status']:
-                current_statuses = latest_patient_problem['status']
-            
-            return {
-                'tooth_number': tooth_number,
-                'current_status': current_statuses,
-                'latest_patient_problem': latest_patient_problem,
-                'latest_doctor_finding': latest_doctor_finding,
-                'patient_problems_count': len(patient_problems),
-                'doctor_findings_count': len(doctor_findings)
-            }
+            return self._build_tooth_status(tooth_number, patient_problems, doctor_findings)
             
         except Exception as e:
             logger.error(f"Error getting current status for tooth {tooth_number}: {str(e)}")
@@ -345,21 +444,36 @@ class ToothHistoryService:
             Dictionary mapping tooth numbers to their status information
         """
         try:
-            tooth_summary = {}
-            
-            # Standard tooth numbers (32 teeth)
-            all_teeth = []
-            # Upper right: 18-11
-            all_teeth.extend(range(11, 19))
-            # Upper left: 21-28
-            all_teeth.extend(range(21, 29))
-            # Lower left: 31-38
-            all_teeth.extend(range(31, 39))
-            # Lower right: 41-48
-            all_teeth.extend(range(41, 49))
+            with db_manager.session_scope() as session:
+                # One query for the current state of every record (examination eagerly joined);
+                # the events are not loaded, so the cost does not grow with the history length
+                query = session.query(ToothHistory).options(
+                    joinedload(ToothHistory.examination)
+                ).filter(ToothHistory.patient_id == patient_id)
+                
+                if examination_id:
+                    query = query.filter(ToothHistory.examination_id == examination_id)
+                
+                histories = query.order_by(desc(ToothHistory.date_recorded)).all()
+                
+                # Group newest-first records per tooth and record type in memory
+                patient_problems = {tooth_number: [] for tooth_number in ALL_TEETH}
+                doctor_findings = {tooth_number: [] for tooth_number in ALL_TEETH}
+                for history in histories:
+                    if history.record_type == 'patient_problem':
+                        bucket = patient_problems
+                    elif history.record_type == 'doctor_finding':
+                        bucket = doctor_findings
+                    else:
+                        continue
+                    if history.tooth_number in bucket:
+                        bucket[history.tooth_number].append(self._history_to_dict(history))
             
-            for tooth_number in all_teeth:
-                tooth_summary[tooth_number] = self.get_tooth_current_status(patient_id, tooth_number)
+            tooth_summary = {}
+            for tooth_number in ALL_TEETH:
+                tooth_summary[tooth_number] = self._build_tooth_status(
+                    tooth_number, patient_problems[tooth_number], doctor_findings[tooth_number]
+                )
             
             return tooth_summary
             
@@ -444,22 +558,19 @@ class ToothHistoryService:
             Dictionary containing tooth history statistics
         """
         try:
-            session = db_manager.get_session()
-            
-            query = session.query(ToothHistory)
-            if patient_id:
-                query = query.filter(ToothHistory.patient_id == patient_id)
-            
-            total_records = query.count()
-            patient_problems = query.filter(ToothHistory.record_type == 'patient_problem').count()
-            doctor_findings = query.filter(ToothHistory.record_type == 'doctor_finding').count()
-            
-            # Get recent records (last 30 days)
-            from datetime import timedelta
-            last_month = date.today() - timedelta(days=30)
-            recent_records = query.filter(ToothHistory.date_recorded >= last_month).count()
-            
-            session.close()
+            with db_manager.session_scope() as session:
+                query = session.query(ToothHistory)
+                if patient_id:
+                    query = query.filter(ToothHistory.patient_id == patient_id)
+                
+                total_records = query.count()
+                patient_problems = query.filter(ToothHistory.record_type == 'patient_problem').count()
+                doctor_findings = query.filter(ToothHistory.record_type == 'doctor_finding').count()
+                
+                # Get recent records (last 30 days)
+                from datetime import timedelta
+                last_month = date.today() - timedelta(days=30)
+                recent_records = query.filter(ToothHistory.date_recorded >= last_month).count()
             
             return {
                 'total_records': total_records,
@@ -470,8 +581,6 @@ class ToothHistoryService:
             
         except Exception as e:
             logger.error(f"Error getting tooth history statistics: {str(e)}")
-            if session:
-                session.close()
             return {
                 'total_records': 0,
                 'patient_problems': 0,
@@ -479,107 +588,97 @@ class ToothHistoryService:
                 'recent_records': 0
             }
     
-    def get_tooth_timeline(self, patient_id: int, tooth_number: int) -> List[Dict[str, Any]]:
+    def get_timelines(self, patient_id: int, tooth_numbers: Optional[List[int]] = None,
+                      since: Optional[date] = None, until: Optional[date] = None,
+                      record_type: Optional[str] = None) -> ToothTimelines:
         """
-        Get complete timeline of a tooth including all history entries.
+        Get the merged, newest-first history of many teeth from one query.
+        
+        Reads tooth_history_events with a range scan on
+        (patient_id, tooth_number, date_recorded); the database does the only sort.
         
         Args:
             patient_id: ID of the patient
-            tooth_number: Tooth number
+            tooth_numbers: Teeth to include (default: all teeth)
+            since: Optional first date to include
+            until: Optional last date to include
+            record_type: Optional 'patient_problem' or 'doctor_finding' filter
             
         Returns:
-            List of timeline entries sorted by date (newest first)
+            ToothTimelines (empty if loading failed)
         """
         try:
-            full_history = self.get_tooth_full_history(patient_id, tooth_number)
-            timeline = []
-            
-            # Process patient problems
-            for problem_record in full_history['patient_problems']:
-                status_history = problem_record['status_history']
-                description_history = problem_record['description_history']
-                date_history = problem_record['date_history']
+            with db_manager.session_scope() as session:
+                query = session.query(
+                    ToothHistoryEvent.date_recorded, ToothHistoryEvent.tooth_number, ToothHistoryEvent.record_type,
+                    ToothHistoryEvent.status, ToothHistoryEvent.description, ToothHistoryEvent.history_id
+                ).filter(ToothHistoryEvent.patient_id == patient_id)
                 
-                for i, date_str in enumerate(date_history):
-                    timeline.append({
-                        'date': date_str,
-                        'type': 'patient_problem',
-                        'status': status_history[i] if i < len(status_history) else [],
-                        'description': description_history[i] if i < len(description_history) else '',
-                        'record_id': problem_record['id']
-                    })
-            
-            # Process doctor findings
-            for finding_record in full_history['doctor_findings']:
-                status_history = finding_record['status_history']
-                description_history = finding_record['description_history']
-                date_history = finding_record['date_history']
+                if tooth_numbers is not None:
+                    query = query.filter(ToothHistoryEvent.tooth_number.in_(tooth_numbers))
+                if since:
+                    query = query.filter(ToothHistoryEvent.date_recorded >= since)
+                if until:
+                    query = query.filter(ToothHistoryEvent.date_recorded <= until)
+                if record_type:
+                    query = query.filter(ToothHistoryEvent.record_type == record_type)
                 
-                for i, date_str in enumerate(date_history):
-                    timeline.append({
-                        'date': date_str,
-                        'type': 'doctor_finding',
-                        'status': status_history[i] if i < len(status_history) else [],
-                        'description': description_history[i] if i < len(description_history) else '',
-                        'record_id': finding_record['id']
-                    })
+                rows = query.order_by(desc(ToothHistoryEvent.date_recorded), desc(ToothHistoryEvent.id)).all()
             
-            # Sort by date (newest first)
-            timeline.sort(key=lambda x: x['date'], reverse=True)
-            
-            return timeline
+            return ToothTimelines(rows)
             
         except Exception as e:
-            logger.error(f"Error getting tooth timeline for tooth {tooth_number}: {str(e)}")
-            return []
+            logger.error(f"Error getting tooth timelines for patient {patient_id}: {str(e)}")
+            return ToothTimelines()
+    
+    def get_tooth_timeline(self, patient_id: int, tooth_number: int) -> List[Dict[str, Any]]:
+        """
+        Get complete timeline of a tooth including all history entries.
+        
+        Args:
+            patient_id: ID of the patient
+            tooth_number: Tooth number
+            
+        Returns:
+            List of timeline entries sorted by date (newest first)
+        """
+        return self.get_timelines(patient_id, [tooth_number]).to_dicts()
 
     def delete_last_tooth_history_entry(self, patient_id: int, tooth_number: int, record_type: str) -> bool:
         """Deletes the last entry from a tooth's history."""
         try:
-            session = db_manager.get_session()
-            
-            record = session.query(ToothHistory).filter(
-                and_(
-                    ToothHistory.patient_id == patient_id,
-                    ToothHistory.tooth_number == tooth_number,
-                    ToothHistory.record_type == record_type
-                )
-            ).first()
-            
-            if record:
-                status_history = self._parse_history_field(record.status_history)
-                description_history = self._parse_history_field(record.description_history)
-                date_history = self._parse_history_field(record.date_history)
+            with db_manager.session_scope() as session:
+                record = session.query(ToothHistory).filter(
+                    and_(
+                        ToothHistory.patient_id == patient_id,
+                        ToothHistory.tooth_number == tooth_number,
+                        ToothHistory.record_type == record_type
+                    )
+                ).first()
                 
-                if len(status_history) > 1:
-                    # More than one entry, so pop the last one
-                    status_history.pop()
-                    description_history.pop()
-                    date_history.pop()
-                    
-                    record.status_history = self._serialize_history_field(status_history)
-                    record.description_history = self._serialize_history_field(description_history)
-                    record.date_history = self._serialize_history_field(date_history)
-                    
-                    record.status = ",".join(status_history[-1])
-                    record.description = description_history[-1]
-                    record.date_recorded = date.fromisoformat(date_history[-1])
+                if not record:
+                    return False # No record found
+                
+                # The two newest events: the one to delete and the one that becomes current
+                newest = session.query(ToothHistoryEvent).filter(
+                    ToothHistoryEvent.history_id == record.id
+                ).order_by(desc(ToothHistoryEvent.id)).limit(2).all()
+                
+                if len(newest) > 1:
+                    # More than one entry, so drop the last one and project the previous one
+                    session.delete(newest[0])
+                    record.status = newest[1].status
+                    record.description = newest[1].description
+                    record.date_recorded = newest[1].date_recorded
                 else:
                     # Only one entry, so delete the whole record
                     session.delete(record)
-                
-                session.commit()
-                session.close()
-                return True
             
-            session.close()
-            return False # No record found
+            self.invalidate_chart_snapshot(patient_id)
+            return True
             
         except Exception as e:
             logger.error(f"Error deleting last tooth history entry: {str(e)}")
-            if session:
-                session.rollback()
-                session.close()
             return False
 
 
@@ -7,10 +7,11 @@ from datetime import date, datetime, time, timedelta
 from typing import List, Dict, Any, Optional
 from decimal import Decimal
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, or_, func, text
+from sqlalchemy import desc, and_, or_, func, text, case
 
 from ..database.database import db_manager
-from ..database.models import VisitRecord, Patient, DentalExamination
+from ..database.models import VisitRecord, VisitDailyStats, Patient, DentalExamination
+from ..config import VISIT_STATISTICS_USE_ROLLUP
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,7 @@ class VisitRecordsService:
         Returns:
             Created VisitRecord object or None if failed
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -123,6 +125,7 @@ class VisitRecordsService:
         Returns:
             Dictionary containing visit data or None if not found
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -178,6 +181,7 @@ class VisitRecordsService:
         Returns:
             List of visit dictionaries
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -240,6 +244,7 @@ class VisitRecordsService:
         Returns:
             List of visit dictionaries
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -327,6 +332,7 @@ class VisitRecordsService:
         Returns:
             True if successful, False otherwise
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -427,6 +433,7 @@ class VisitRecordsService:
         Returns:
             True if successful, False otherwise
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -500,6 +507,7 @@ class VisitRecordsService:
         Returns:
             List of visit record dictionaries
         """
+        session = None
         try:
             session = db_manager.get_session()
             
@@ -550,80 +558,80 @@ class VisitRecordsService:
                 session.close()
             return []
 
+    # Breakdown keys reported by get_visit_statistics
+    STATISTICS_STATUSES = ['scheduled', 'completed', 'cancelled', 'no_show']
+    STATISTICS_VISIT_TYPES = ['consultation', 'treatment', 'follow_up', 'emergency']
+    
+    def _statistics_query(self, session: Session, use_rollup: bool):
+        """
+        Build the grouped (status, visit_type, visits, revenue) query behind the statistics.
+        
+        Revenue is the cost of completed visits. The rollup variant sums the
+        pre-aggregated daily rows instead of scanning visit_records.
+        
+        Returns:
+            Tuple of the query and the date column to filter it on
+        """
+        if use_rollup:
+            return session.query(
+                VisitDailyStats.status, VisitDailyStats.visit_type,
+                func.sum(VisitDailyStats.visit_count),
+                func.sum(case((VisitDailyStats.status == 'completed', VisitDailyStats.total_cost), else_=0))
+            ).group_by(VisitDailyStats.status, VisitDailyStats.visit_type), VisitDailyStats.visit_date
+        
+        return session.query(
+            VisitRecord.status, VisitRecord.visit_type,
+            func.count(VisitRecord.id),
+            func.sum(case((VisitRecord.status == 'completed', VisitRecord.cost), else_=0))
+        ).group_by(VisitRecord.status, VisitRecord.visit_type), VisitRecord.visit_date
+    
     def get_visit_statistics(self, start_date: Optional[date] = None, 
-                           end_date: Optional[date] = None) -> Dict[str, Any]:
+                           end_date: Optional[date] = None,
+                           use_rollup: bool = VISIT_STATISTICS_USE_ROLLUP) -> Dict[str, Any]:
         """
         Get visit statistics.
         
+        All counts and the revenue come from one grouped aggregate query, read
+        from the daily rollup (visit_daily_stats) unless use_rollup is False.
+        
         Args:
             start_date: Optional start date for statistics
             end_date: Optional end date for statistics
+            use_rollup: Read the daily rollup instead of visit_records
             
         Returns:
             Dictionary containing visit statistics
         """
+        session = None
         try:
             session = db_manager.get_session()
             
-            query = session.query(VisitRecord)
-            
+            query, date_column = self._statistics_query(session, use_rollup)
             if start_date:
-                query = query.filter(VisitRecord.visit_date >= start_date)
-            
-            if end_date:
-                query = query.filter(VisitRecord.visit_date <= end_date)
-            
-            total_visits = query.count()
-            
-            # Status breakdown
-            scheduled = query.filter(VisitRecord.status == 'scheduled').count()
-            completed = query.filter(VisitRecord.status == 'completed').count()
-            cancelled = query.filter(VisitRecord.status == 'cancelled').count()
-            no_show = query.filter(VisitRecord.status == 'no_show').count()
-            
-            # Visit type breakdown
-            consultation = query.filter(VisitRecord.visit_type == 'consultation').count()
-            treatment = query.filter(VisitRecord.visit_type == 'treatment').count()
-            follow_up = query.filter(VisitRecord.visit_type == 'follow_up').count()
-            emergency = query.filter(VisitRecord.visit_type == 'emergency').count()
-            
-            # Financial statistics
-            total_revenue = session.query(func.sum(VisitRecord.cost)).filter(
-                VisitRecord.status == 'completed'
-            ).scalar() or 0
-            
-            if start_date:
-                total_revenue = session.query(func.sum(VisitRecord.cost)).filter(
-                    and_(
-                        VisitRecord.status == 'completed',
-                        VisitRecord.visit_date >= start_date
-                    )
-                ).scalar() or 0
-            
+                query = query.filter(date_column >= start_date)
             if end_date:
-                total_revenue = session.query(func.sum(VisitRecord.cost)).filter(
-                    and_(
-                        VisitRecord.status == 'completed',
-                        VisitRecord.visit_date <= end_date
-                    )
-                ).scalar() or 0
+                query = query.filter(date_column <= end_date)
+            
+            status_breakdown = dict.fromkeys(self.STATISTICS_STATUSES, 0)
+            visit_type_breakdown = dict.fromkeys(self.STATISTICS_VISIT_TYPES, 0)
+            total_visits = 0
+            total_revenue = 0
+            for status, visit_type, visits, revenue in query.all():
+                total_visits += visits
+                total_revenue += revenue or 0
+                if status in status_breakdown:
+                    status_breakdown[status] += visits
+                if visit_type in visit_type_breakdown:
+                    visit_type_breakdown[visit_type] += visits
             
             session.close()
             
+            completed = status_breakdown['completed']
+            no_show = status_breakdown['no_show']
             return {
                 'total_visits': total_visits,
-                'status_breakdown': {
-                    'scheduled': scheduled,
-                    'completed': completed,
-                    'cancelled': cancelled,
-                    'no_show': no_show
-                },
-                'visit_type_breakdown': {
-                    'consultation': consultation,
-                    'treatment': treatment,
-                    'follow_up': follow_up,
-                    'emergency': emergency
-                },
+                'status_breakdown': status_breakdown,
+                'visit_type_breakdown': visit_type_breakdown,
                 'total_revenue': float(total_revenue),
                 'completion_rate': round((completed / total_visits * 100), 2) if total_visits > 0 else 0,
                 'no_show_rate': round((no_show / total_visits * 100), 2) if total_visits > 0 else 0
@@ -641,6 +649,56 @@ class VisitRecordsService:
                 'completion_rate': 0.0,
                 'no_show_rate': 0.0
             }
+    
+    def get_visit_report(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                         period: str = 'month') -> List[Dict[str, Any]]:
+        """
+        Get visit totals per month or year from the daily rollup.
+        
+        Args:
+            start_date: Optional first date to include
+            end_date: Optional last date to include
+            period: 'month' (keys like '2024-05') or 'year' (keys like '2024')
+            
+        Returns:
+            List of dictionaries with 'period', 'total_visits', 'completed_visits'
+            and 'revenue', oldest period first
+        """
+        if period not in ('month', 'year'):
+            raise ValueError(f"Unsupported report period: {period}")
+        
+        session = None
+        try:
+            session = db_manager.get_session()
+            
+            period_key = func.strftime('%Y-%m' if period == 'month' else '%Y', VisitDailyStats.visit_date)
+            completed = VisitDailyStats.status == 'completed'
+            query = session.query(
+                period_key,
+                func.sum(VisitDailyStats.visit_count),
+                func.sum(case((completed, VisitDailyStats.visit_count), else_=0)),
+                func.sum(case((completed, VisitDailyStats.total_cost), else_=0))
+            )
+            if start_date:
+                query = query.filter(VisitDailyStats.visit_date >= start_date)
+            if end_date:
+                query = query.filter(VisitDailyStats.visit_date <= end_date)
+            
+            rows = query.group_by(period_key).order_by(period_key).all()
+            session.close()
+            
+            return [{
+                'period': key,
+                'total_visits': visits,
+                'completed_visits': completed_visits,
+                'revenue': float(revenue or 0)
+            } for key, visits, completed_visits, revenue in rows]
+            
+        except Exception as e:
+            logger.error(f"Error getting visit report: {str(e)}")
+            if session:
+                session.close()
+            return []
 
 
 # Global service instance
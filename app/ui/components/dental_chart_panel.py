@@ -12,7 +12,8 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont
 
 from .enhanced_tooth_widget import EnhancedToothWidget
-from ...services.tooth_history_service import tooth_history_service
+from ...services.tooth_history_service import tooth_history_service, ToothChartSnapshot
+from ...utils.performance import measure_time
 
 logger = logging.getLogger(__name__)
 
@@ -66,6 +67,7 @@ class DentalChartPanel(QGroupBox):
         if hasattr(self, 'description_input'):
             self.description_input.textChanged.connect(self.on_description_changed)
     
+    @measure_time("dental_chart_construction")
     def create_dental_chart_area(self) -> QWidget:
         """Create the 32-tooth layout area."""
         chart_widget = QWidget()
@@ -450,10 +452,10 @@ class DentalChartPanel(QGroupBox):
         
         return right_widget
     
-    def set_patient(self, patient_id: int):
-        """Set the current patient and load data."""
+    def set_patient(self, patient_id: int, snapshot: Optional[ToothChartSnapshot] = None):
+        """Set the current patient and load data (optionally from a shared chart snapshot)."""
         self.patient_id = patient_id
-        self.load_patient_data()
+        self.load_patient_data(snapshot)
     
     def set_examination(self, examination_id: int):
         """Set the current examination context."""
@@ -504,21 +506,21 @@ class DentalChartPanel(QGroupBox):
                     elif hasattr(tooth_widget, 'set_status'):
                         tooth_widget.set_status(statuses)
             
-            logger.info(f"Loaded tooth data for {len(tooth_status_map)} teeth in {self.panel_type} panel")
+            logger.debug("Loaded tooth data for %d teeth in %s panel", len(tooth_status_map), self.panel_type)
             
         except Exception as e:
             logger.error(f"Error loading tooth data in {self.panel_type} panel: {str(e)}")
     
-    def load_patient_data(self):
+    def load_patient_data(self, snapshot: Optional[ToothChartSnapshot] = None):
         """Load patient's tooth data for this panel type using the new JSON-based system."""
         if not self.patient_id:
             return
         
         try:
-            # Get tooth summary for patient
-            tooth_summary = tooth_history_service.get_patient_tooth_summary(
-                self.patient_id
-            )
+            # Get tooth summary for patient (shared with the other panel via the snapshot)
+            if snapshot is None or snapshot.patient_id != self.patient_id:
+                snapshot = tooth_history_service.get_chart_snapshot(self.patient_id)
+            tooth_summary = snapshot.tooth_summary
             
             # Update tooth widgets based on panel type
             for tooth_number, tooth_widget in self.tooth_widgets.items():
@@ -569,7 +571,7 @@ class DentalChartPanel(QGroupBox):
                         elif hasattr(tooth_widget, 'set_status'):
                             tooth_widget.set_status(['normal'])
             
-            logger.info(f"Loaded patient data for {len(self.tooth_widgets)} teeth in {self.panel_type} panel")
+            logger.debug("Loaded patient data for %d teeth in %s panel", len(self.tooth_widgets), self.panel_type)
         
         except Exception as e:
             logger.error(f"Error loading patient data: {str(e)}")
@@ -617,12 +619,11 @@ class DentalChartPanel(QGroupBox):
         try:
             record_type = 'patient_problem' if self.panel_type == 'patient' else 'doctor_finding'
             
-            full_history = tooth_history_service.get_tooth_full_history(
-                self.patient_id, tooth_number, record_type
-            )
-            current_status = tooth_history_service.get_tooth_current_status(
-                self.patient_id, tooth_number
+            timelines = tooth_history_service.get_timelines(
+                self.patient_id, [tooth_number], record_type=record_type
             )
+            snapshot = tooth_history_service.get_chart_snapshot(self.patient_id)
+            current_status = snapshot.get_tooth_status(tooth_number) or {}
             
             # Update current status display
             latest_record = None
@@ -658,27 +659,14 @@ class DentalChartPanel(QGroupBox):
             # Format history text
             history_text = f"<h3>Tooth {tooth_number} History ({self.panel_type.title()})</h3>"
             
-            records = full_history.get('patient_problems' if self.panel_type == 'patient' else 'doctor_findings', [])
-            
-            if records:
+            if len(timelines):
                 history_text += "<b>Timeline:</b><ul>"
-                # Assuming the first record contains the full history
-                first_record = records[0]
-                status_history = first_record.get('status_history', [])
-                desc_history = first_record.get('description_history', [])
-                date_history = first_record.get('date_history', [])
-
-                if status_history:
-                    # Iterate in reverse for newest first
-                    for i in reversed(range(len(status_history))):
-                        date = date_history[i] if i < len(date_history) else "N/A"
-                        statuses = status_history[i] if i < len(status_history) else []
-                        desc = desc_history[i] if i < len(desc_history) and desc_history[i] else ""
-                        
-                        history_text += f"<li><b>{date}:</b> {', '.join(statuses)}"
-                        if desc:
-                            history_text += f" - <i>{desc}</i>"
-                        history_text += "</li>"
+                # Entries are already newest first
+                for date, statuses, desc in zip(timelines.dates, timelines.statuses, timelines.descriptions):
+                    history_text += f"<li><b>{date.isoformat()}:</b> {', '.join(statuses)}"
+                    if desc:
+                        history_text += f" - <i>{desc}</i>"
+                    history_text += "</li>"
                 history_text += "</ul>"
             else:
                 history_text += f"<p>No {self.panel_type.replace('_', ' ')} history recorded for this tooth.</p>"
@@ -702,7 +690,7 @@ class DentalChartPanel(QGroupBox):
         except ImportError:
             logger.warning("ToothDetailsDialog not available")
             # Fallback - just log the tooth selection
-            logger.info(f"Tooth {tooth_number} details requested")
+            logger.debug("Tooth %s details requested", tooth_number)
         
         # Refresh data after dialog closes
         self.load_patient_data()
@@ -2,7 +2,8 @@
 Enhanced Tooth Widget with comprehensive status tracking and (quadrant.position) display format.
 """
 import logging
-from typing import Dict, List, Optional, Any, Callable
+from functools import lru_cache
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from PySide6.QtWidgets import (
     QWidget, QPushButton, QVBoxLayout, QHBoxLayout, 
     QLabel, QDialog, QDialogButtonBox, QFormLayout, QLineEdit,
@@ -10,13 +11,145 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, Signal, QSize
 from PySide6.QtGui import QPainter, QPen, QBrush, QColor, QFont, QFontMetrics
+import shiboken6
 
-from ...services.custom_status_service import custom_status_service
+from ...services.custom_status_service import custom_status_registry
 from .multi_select_combobox import MultiSelectComboBox
 
 logger = logging.getLogger(__name__)
 
 
+class StatusOptionsModel:
+    """Status dropdown entries shared by every tooth widget, built lazily from the status registry."""
+    
+    # Used when the registry cannot be read
+    FALLBACK_OPTIONS = [
+        ("Normal", "normal"),
+        ("Caries (Incipient)", "caries_incipient"),
+        ("Caries (Deep)", "caries_deep"),
+        ("Filling", "filling"),
+        ("Crown", "crown"),
+        ("Root Canal", "root_canal"),
+        ("Extracted", "extracted"),
+        ("Missing", "missing"),
+    ]
+    
+    def __init__(self):
+        self._options: Optional[List[Tuple[str, Optional[str]]]] = None
+        self._version = None
+    
+    def get_options(self) -> List[Tuple[str, Optional[str]]]:
+        """Get (display text, status name) entries; category headers carry no status name."""
+        if self._options is not None and self._version == custom_status_registry.version:
+            return self._options
+        
+        try:
+            options = []
+            
+            # Add statuses grouped by category
+            for category, category_statuses in custom_status_registry.get_statuses_by_category().items():
+                # Add category separator
+                options.append((f"--- {category.title()} ---", None))
+                
+                for status in sorted(category_statuses, key=lambda x: x['display_name']):
+                    options.append((status['display_name'], status['status_name']))
+            
+            # Add custom status option (no addSeparator, use regular item)
+            options.append(("---", None))  # Separator item
+            options.append(("+ Add Custom Status", "add_custom"))
+            
+        except Exception as e:
+            logger.error(f"Error building status options: {str(e)}")
+            # Do not cache the fallback so the next dropdown retries the registry
+            return list(self.FALLBACK_OPTIONS)
+        
+        self._options = options
+        self._version = custom_status_registry.version
+        return self._options
+
+
+# Shared by all tooth widgets; each widget only keeps its own selected statuses
+status_options_model = StatusOptionsModel()
+
+
+class SharedStatusDropdown:
+    """
+    One status dropdown for every tooth widget, moved into whichever tooth opens it.
+    
+    Only one tooth edits its statuses at a time, so the dropdown and its items
+    are created once for the whole chart instead of once per tooth. Selections
+    are passed to the tooth currently holding it.
+    """
+    
+    def __init__(self):
+        self._dropdown: Optional[MultiSelectComboBox] = None
+        self._owner: Optional['EnhancedToothWidget'] = None
+        self._loaded_options = None
+    
+    def _ensure_dropdown(self) -> MultiSelectComboBox:
+        # The dropdown is a child of its current tooth and dies with it
+        if self._dropdown is None or not shiboken6.isValid(self._dropdown):
+            self._dropdown = MultiSelectComboBox()
+            self._dropdown.setMaximumHeight(25)
+            self._dropdown.hide()
+            self._dropdown.itemsSelected.connect(self._on_items_selected)
+            self._owner = None
+            self._loaded_options = None
+        
+        options = status_options_model.get_options()
+        if options is not self._loaded_options:
+            self._load_options(options)
+        return self._dropdown
+    
+    def _load_options(self, options: List[Tuple[str, Optional[str]]]):
+        """Fill the dropdown and size its popup to the longest entry."""
+        self._dropdown.blockSignals(True)
+        self._dropdown.clear()
+        self._dropdown.addItems(options)
+        self._dropdown.blockSignals(False)
+        self._loaded_options = options
+        
+        metrics = QFontMetrics(self._dropdown.font())
+        max_width = max((metrics.horizontalAdvance(text) for text, _ in options), default=0)
+        # Add some padding for the dropdown arrow and margins
+        self._dropdown.view().setMinimumWidth(max_width + 40)
+    
+    def attach(self, tooth: 'EnhancedToothWidget') -> MultiSelectComboBox:
+        """Move the dropdown into a tooth widget's layout (hidden) and route selections to it."""
+        dropdown = self._ensure_dropdown()
+        if self._owner is not tooth:
+            dropdown.hide()
+            if self._owner is not None and shiboken6.isValid(self._owner):
+                self._owner.layout().removeWidget(dropdown)
+            tooth.layout().addWidget(dropdown)
+            self._owner = tooth
+        return dropdown
+    
+    def dropdown_for(self, tooth: 'EnhancedToothWidget') -> Optional[MultiSelectComboBox]:
+        """Get the dropdown if it is attached to this tooth."""
+        if self._owner is tooth and self._dropdown is not None and shiboken6.isValid(self._dropdown):
+            return self._dropdown
+        return None
+    
+    def refresh_options(self):
+        """Reload the items after a status definition change, keeping the owner's selection."""
+        if self._dropdown is None or not shiboken6.isValid(self._dropdown):
+            return
+        options = status_options_model.get_options()
+        if options is not self._loaded_options:
+            self._load_options(options)
+            if self._owner is not None and shiboken6.isValid(self._owner):
+                self._owner.set_dropdown_status(self._owner.get_current_status())
+    
+    def _on_items_selected(self, statuses: List[str]):
+        if self._owner is not None and shiboken6.isValid(self._owner):
+            self._owner.on_statuses_selected(statuses)
+
+
+# The single status dropdown shared by every tooth widget in the process
+shared_status_dropdown = SharedStatusDropdown()
+
+
 class EnhancedToothWidget(QWidget):
     """Enhanced tooth widget with comprehensive status tracking"""
     
@@ -31,10 +164,13 @@ class EnhancedToothWidget(QWidget):
         self.current_mode = 'doctor'  # 'patient' or 'doctor'
         self.on_status_change_callback = None
         
+        self._style_key = None  # Color combination currently applied to the button
+        
         self.setup_ui()
-        self.load_status_options()
-        self.adjust_dropdown_width()
         self.update_tooltip()
+        
+        # Reload colors and options whenever status definitions change
+        custom_status_registry.statuses_changed.connect(self.on_status_definitions_changed)
     
     def setup_ui(self):
         """Setup the tooth widget UI with button and dropdown."""
@@ -52,13 +188,6 @@ class EnhancedToothWidget(QWidget):
         self.tooth_button.customContextMenuRequested.connect(self.on_right_click)
         layout.addWidget(self.tooth_button)
         
-        # Status dropdown (initially hidden)
-        self.status_dropdown = MultiSelectComboBox()
-        self.status_dropdown.setMaximumHeight(25)
-        self.status_dropdown.hide()
-        self.status_dropdown.itemsSelected.connect(self.on_statuses_selected)
-        layout.addWidget(self.status_dropdown)
-        
         # Update appearance
         self.update_tooth_appearance()
     
@@ -77,48 +206,20 @@ class EnhancedToothWidget(QWidget):
             status_text = f"Doctor: {', '.join(self.doctor_statuses)}"
         self.tooth_button.setToolTip(status_text)
     
-    def setup_status_dropdown(self):
-        """Setup comprehensive status dropdown with colors"""
-        self.status_dropdown.clear()
-        
-        try:
-            # Get all active custom statuses (includes predefined ones)
-            statuses = custom_status_service.get_all_custom_statuses(is_active=True)
-            
-            # Group by category for better organization
-            categories = custom_status_service.get_statuses_by_category()
-            
-            # Add statuses grouped by category
-            for category, category_statuses in categories.items():
-                # Add category separator
-                self.status_dropdown.addItem(f"--- {category.title()} ---", None)
-                
-                for status in sorted(category_statuses, key=lambda x: x['display_name']):
-                    self.status_dropdown.addItem(status['display_name'], status['status_name'])
-            
-            # Add custom status option (no addSeparator, use regular item)
-            self.status_dropdown.addItem("---", None)  # Separator item
-            self.status_dropdown.addItem("+ Add Custom Status", "add_custom")
-            
-        except Exception as e:
-            logger.error(f"Error setting up status dropdown: {str(e)}")
-            # Fallback to basic statuses
-            basic_statuses = [
-                ("Normal", "normal"),
-                ("Caries (Incipient)", "caries_incipient"),
-                ("Caries (Deep)", "caries_deep"),
-                ("Filling", "filling"),
-                ("Crown", "crown"),
-                ("Root Canal", "root_canal"),
-                ("Extracted", "extracted"),
-                ("Missing", "missing"),
-            ]
-            
-            self.status_dropdown.addItems(basic_statuses)
+    @property
+    def status_dropdown(self) -> Optional[MultiSelectComboBox]:
+        """The shared status dropdown while it is attached to this tooth, otherwise None."""
+        return shared_status_dropdown.dropdown_for(self)
     
-    def load_status_options(self):
-        """Load status options into dropdown"""
-        self.setup_status_dropdown()
+    def ensure_status_dropdown(self) -> MultiSelectComboBox:
+        """Move the shared status dropdown into this tooth (it is created on first use)."""
+        return shared_status_dropdown.attach(self)
+    
+    def on_status_definitions_changed(self):
+        """Refresh dropdown options and colors after a status definition change."""
+        if self.status_dropdown is not None:
+            shared_status_dropdown.refresh_options()
+        self.update_tooth_appearance()
     
     def set_patient_status(self, statuses: List[str]):
         """Set patient-reported status."""
@@ -150,10 +251,10 @@ class EnhancedToothWidget(QWidget):
             return '#FFFFFF'
 
         try:
-            # Get color from custom status service
-            custom_status = custom_status_service.get_custom_status_by_name(status)
-            if custom_status:
-                return custom_status['color']
+            # Get color from the in-memory status registry
+            color = custom_status_registry.get_color(status)
+            if color:
+                return color
         except:
             pass
         
@@ -182,22 +283,40 @@ class EnhancedToothWidget(QWidget):
             secondary_statuses = self.doctor_statuses
 
         primary_color = self.get_status_color(primary_statuses[0])
-        text_color = self.get_text_color_for_background(primary_color)
 
         if len(primary_statuses) > 1:
             # Gradient for multiple statuses
-            style = "QPushButton { background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 %s, stop:1 %s); " % (self.get_status_color(primary_statuses[0]), self.get_status_color(primary_statuses[1]))
+            style_key = ('multi', primary_color, self.get_status_color(primary_statuses[1]))
         elif primary_statuses != ['normal'] and secondary_statuses != ['normal'] and primary_statuses != secondary_statuses:
             # Split gradient for dual status (patient vs doctor)
-            secondary_color = self.get_status_color(secondary_statuses[0])
+            style_key = ('split', primary_color, self.get_status_color(secondary_statuses[0]))
+        else:
+            # Single color
+            style_key = ('single', primary_color, None)
+
+        # Re-applying an identical sheet still makes Qt re-parse and re-polish the button
+        if style_key == self._style_key:
+            return
+        self._style_key = style_key
+        
+        self.tooth_button.setStyleSheet(self.build_tooth_style(*style_key))
+    
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def build_tooth_style(kind: str, primary_color: str, second_color: Optional[str]) -> str:
+        """Build (and memoize) the tooth button stylesheet for a color combination."""
+        text_color = EnhancedToothWidget.get_text_color_for_background(primary_color)
+
+        if kind == 'multi':
+            style = "QPushButton { background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 %s, stop:1 %s); " % (primary_color, second_color)
+        elif kind == 'split':
             style = f"""
                 QPushButton {{
                     background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
                         stop:0 {primary_color}, stop:0.5 {primary_color},
-                        stop:0.5 {secondary_color}, stop:1 {secondary_color});
+                        stop:0.5 {second_color}, stop:1 {second_color});
             """
         else:
-            # Single color
             style = f"QPushButton {{ background-color: {primary_color}; "
 
         style += f"""
@@ -211,13 +330,14 @@ class EnhancedToothWidget(QWidget):
                 border: 2px solid #95A5A6;
             }}
             QPushButton:pressed {{
-                background-color: {self.adjust_color(primary_color, -30)};
+                background-color: {EnhancedToothWidget.adjust_color(primary_color, -30)};
             }}
         """
-        
-        self.tooth_button.setStyleSheet(style)
+        return style
     
-    def adjust_color(self, hex_color: str, adjustment: int) -> str:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def adjust_color(hex_color: str, adjustment: int) -> str:
         """Adjust color brightness."""
         try:
             color = QColor(hex_color)
@@ -228,7 +348,9 @@ class EnhancedToothWidget(QWidget):
         except:
             return hex_color
 
-    def get_text_color_for_background(self, hex_color: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def get_text_color_for_background(hex_color: str) -> str:
         """Determines if text should be black or white based on background color."""
         try:
             color = QColor(hex_color)
@@ -242,10 +364,11 @@ class EnhancedToothWidget(QWidget):
         """Handle tooth button click."""
         self.tooth_clicked.emit(self.tooth_number, 'left')
         # Toggle status dropdown visibility
-        if self.status_dropdown.isVisible():
+        if self.status_dropdown is not None and self.status_dropdown.isVisible():
             self.status_dropdown.hide()
         else:
-            self.status_dropdown.show()
+            status_dropdown = self.ensure_status_dropdown()
+            status_dropdown.show()
             # Set current status in dropdown
             current_statuses = self.doctor_statuses if self.current_mode == 'doctor' else self.patient_statuses
             self.set_dropdown_status(current_statuses)
@@ -256,6 +379,8 @@ class EnhancedToothWidget(QWidget):
     
     def set_dropdown_status(self, statuses: List[str]):
         """Set the dropdown to show the specified statuses."""
+        if self.status_dropdown is None:
+            return
         self.status_dropdown.blockSignals(True)
         for i in range(self.status_dropdown._list_widget.count()):
             item = self.status_dropdown._list_widget.item(i)
@@ -283,10 +408,8 @@ class EnhancedToothWidget(QWidget):
         from .custom_status_dialog import CustomStatusDialog
         
         dialog = CustomStatusDialog(self)
-        if dialog.exec() == QDialog.Accepted:
-            # Reload status options
-            self.load_status_options()
-            self.adjust_dropdown_width()
+        # Status options are reloaded through the registry's statuses_changed signal
+        dialog.exec()
     
     def set_status_change_callback(self, callback: Callable):
         """Set callback function for status changes."""
@@ -296,21 +419,7 @@ class EnhancedToothWidget(QWidget):
         """Get current status based on mode."""
         return self.doctor_statuses if self.current_mode == 'doctor' else self.patient_statuses
 
-    def adjust_dropdown_width(self):
-        """Adjust dropdown width to fit the longest item."""
-        font = self.status_dropdown.font()
-        metrics = QFontMetrics(font)
-        
-        max_width = 0
-        for i in range(self.status_dropdown._list_widget.count()):
-            item_text = self.status_dropdown._list_widget.item(i).text()
-            width = metrics.horizontalAdvance(item_text)
-            if width > max_width:
-                max_width = width
-                
-        # Add some padding for the dropdown arrow and margins
-        self.status_dropdown.view().setMinimumWidth(max_width + 40)
-    
     def force_hide_dropdown(self):
         """Force hide the status dropdown."""
-        self.status_dropdown.hide()
+        if self.status_dropdown is not None:
+            self.status_dropdown.hide()
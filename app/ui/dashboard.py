@@ -8,9 +8,11 @@ from PySide6.QtWidgets import (
     QPushButton, QFrame, QGridLayout, QScrollArea,
     QGroupBox, QMessageBox, QFileDialog
 )
-from PySide6.QtCore import Qt, Signal, QTimer
+from PySide6.QtCore import Qt, Signal, QTimer, QThread
 from PySide6.QtGui import QFont, QPalette
 from ..services.patient_service import patient_service
+from ..services.dashboard_stats_service import dashboard_stats_service
+from ..config import DASHBOARD_REFRESH_INTERVAL_MS
 from .dialogs import ExportDialog
 
 logger = logging.getLogger(__name__)
@@ -217,6 +219,16 @@ class RecentPatientsWidget(QGroupBox):
         self._load_recent_patients()
 
 
+class StatsRefreshWorker(QThread):
+    """Worker thread that loads the dashboard counters off the UI thread."""
+    
+    stats_ready = Signal(dict)
+    
+    def run(self):
+        """Load the counters (from the cache when fresh) and hand them to the UI thread."""
+        self.stats_ready.emit(dashboard_stats_service.get_dashboard_stats())
+
+
 class Dashboard(QWidget):
     """Dashboard widget with statistics and quick actions."""
     
@@ -226,6 +238,8 @@ class Dashboard(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.stat_cards = {}
+        self._stats_worker = None
+        self._stats_refresh_pending = False
         
         self._setup_ui()
         self._connect_signals()
@@ -341,19 +355,40 @@ class Dashboard(QWidget):
         # self.view_reports_btn.clicked.connect(self._handle_view_reports)
         self.backup_data_btn.clicked.connect(self._handle_backup_data)
         self.recent_patients.patient_selected.connect(self._handle_patient_selected)
+        # Emitted by whichever thread changed the data; delivered on the UI thread
+        dashboard_stats_service.stats_invalidated.connect(self._refresh_stats)
     
     def _setup_auto_refresh(self):
-        """Set up automatic refresh timer."""
+        """Set up the timer that reloads statistics once their cache expires."""
         self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self._refresh_stats)
-        self.refresh_timer.start(30000)  # Refresh every 30 seconds
+        self.refresh_timer.timeout.connect(self._refresh_if_stale)
+        self.refresh_timer.start(DASHBOARD_REFRESH_INTERVAL_MS)
+    
+    def _refresh_if_stale(self):
+        """Timer tick: only reload when the cached statistics expired."""
+        if not dashboard_stats_service.is_fresh():
+            self._refresh_stats()
     
     def _refresh_stats(self):
-        """Refresh dashboard statistics."""
+        """Load dashboard statistics on a worker thread; the cards update when it finishes."""
+        if self._stats_worker and self._stats_worker.isRunning():
+            self._stats_refresh_pending = True
+            return
+        
+        self._stats_refresh_pending = False
+        self._stats_worker = StatsRefreshWorker()
+        self._stats_worker.stats_ready.connect(self._apply_stats)
+        self._stats_worker.finished.connect(self._on_stats_worker_finished)
+        self._stats_worker.start()
+    
+    def _on_stats_worker_finished(self):
+        """Run a refresh requested while the previous one was still loading."""
+        if self._stats_refresh_pending:
+            self._refresh_stats()
+    
+    def _apply_stats(self, stats: dict):
+        """Update the stat cards and recent patients with freshly loaded statistics."""
         try:
-            # Get comprehensive statistics
-            stats = patient_service.get_patients_statistics()
-            
             # Update stat cards
             self.stat_cards['patients'].update_value(str(stats['total']))
             self.stat_cards['new_month'].update_value(str(stats['this_month']))
@@ -365,7 +400,8 @@ class Dashboard(QWidget):
             # Refresh recent patients
             self.recent_patients.refresh()
             
-            logger.info(f"Dashboard refreshed - Total: {stats['total']}, This month: {stats['this_month']}, Examinations: {stats['total_examinations']}")
+            logger.debug("Dashboard refreshed - Total: %s, This month: %s, Examinations: %s",
+                         stats['total'], stats['this_month'], stats['total_examinations'])
             
         except Exception as e:
             logger.error(f"Error refreshing dashboard stats: {str(e)}")
@@ -304,10 +304,12 @@ class AdvancedDentalChart(QWidget):
             # Update all components with new patient
             if self.examination_panel:
                 self.examination_panel.set_patient(self.current_patient_id)
+            # Both charts render from one snapshot so the summary is loaded once
+            chart_snapshot = tooth_history_service.get_chart_snapshot(self.current_patient_id)
             if self.patient_chart_panel:
-                self.patient_chart_panel.set_patient(self.current_patient_id)
+                self.patient_chart_panel.set_patient(self.current_patient_id, chart_snapshot)
             if self.doctor_chart_panel:
-                self.doctor_chart_panel.set_patient(self.current_patient_id)
+                self.doctor_chart_panel.set_patient(self.current_patient_id, chart_snapshot)
             # Re-enabled for displaying old visits
             if self.visit_records_panel:
                 self.visit_records_panel.set_patient(self.current_patient_id)
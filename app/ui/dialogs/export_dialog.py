@@ -2,6 +2,8 @@
 Export dialog for data export and backup operations.
 """
 import os
+import threading
+import time
 from datetime import datetime
 from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                                QPushButton, QGroupBox, QCheckBox, QFileDialog,
@@ -10,47 +12,133 @@ from PySide6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PySide6.QtCore import Qt, QThread, Signal
 from PySide6.QtGui import QFont
 from ...services.export_service import export_service
+from ...utils.constants import EXPORT_FORMATS
+from ...utils.progress import CancelToken, OperationCancelled, ProgressTracker
 
 
 class ExportWorker(QThread):
-    """Worker thread for export operations."""
+    """
+    Worker thread for export operations.
+    
+    The services report (done, total) through progress callbacks, which the
+    worker turns into a percentage and a status line with throughput and ETA.
+    cancel() stops the operation at its next batch boundary; the thread then
+    finishes normally and reports the cancellation.
+    """
     
     progress_updated = Signal(int)
     status_updated = Signal(str)
     export_completed = Signal(bool, str)
     
+    # Minimum seconds between status line updates
+    STATUS_INTERVAL = 0.2
+    
     def __init__(self, export_type: str, file_path: str, options: dict):
         super().__init__()
         self.export_type = export_type
         self.file_path = file_path
         self.options = options
+        self.cancel_token = CancelToken()
+        self._tracker = None
+        self._status_prefix = ""
+        self._last_status_at = 0.0
+        
+        # Per-table (rows_done, rows_total), updated from the export service's worker threads
+        self._table_progress = {}
+        self._table_progress_lock = threading.Lock()
+    
+    def cancel(self):
+        """Ask the running operation to stop at its next batch boundary."""
+        self.cancel_token.cancel()
+        self.status_updated.emit("Cancelling...")
+    
+    def _start_tracking(self, prefix: str, unit: str):
+        self._tracker = ProgressTracker(unit)
+        self._status_prefix = prefix
+        self._last_status_at = 0.0
+        self.status_updated.emit(f"{prefix}...")
+        self.progress_updated.emit(0)
+    
+    def _on_progress(self, done: int, total: int):
+        """Progress callback: update the bar and, at most every STATUS_INTERVAL, the status line."""
+        self._tracker.update(done, total)
+        self.progress_updated.emit(self._tracker.percent if total else 0)
+        now = time.monotonic()
+        if now - self._last_status_at >= self.STATUS_INTERVAL or done >= total:
+            self._last_status_at = now
+            self.status_updated.emit(f"{self._status_prefix}: {self._tracker.describe()}")
     
     def run(self):
         """Run the export operation."""
         try:
             self.status_updated.emit("Starting export...")
-            self.progress_updated.emit(10)
             
             success = False
             message = ""
             
             if self.export_type == "complete_csv":
-                self.status_updated.emit("Exporting complete data to CSV...")
-                self.progress_updated.emit(50)
-                success = export_service.export_complete_data_to_csv(self.file_path)
+                self._start_tracking("Exporting complete data to CSV", "rows")
+                success = export_service.export_complete_data_to_csv(
+                    self.file_path, progress_callback=self._on_progress, cancel_token=self.cancel_token
+                )
                 message = "Complete data exported successfully" if success else "Failed to export complete data"
                 
             elif self.export_type == "complete_backup":
-                self.status_updated.emit("Creating complete database backup...")
-                self.progress_updated.emit(50)
-                success = export_service.create_complete_backup(self.file_path)
+                self._start_tracking("Creating complete database backup", "pages")
+                success = export_service.create_complete_backup(
+                    self.file_path, progress_callback=self._on_progress, cancel_token=self.cancel_token
+                )
                 message = f"Complete backup created successfully" if success else "Failed to create complete backup"
             
-            self.progress_updated.emit(100)
+            elif self.export_type == "import_patients":
+                self._start_tracking("Importing patients", "bytes")
+                result = export_service.import_patients_from_csv(
+                    self.file_path, progress_callback=self._on_progress, cancel_token=self.cancel_token
+                )
+                success = result['success']
+                if result['cancelled']:
+                    message = (f"Import cancelled; {result['imported']} patients imported before stopping")
+                elif success:
+                    message = (f"Imported {result['imported']} patients\n"
+                               f"Skipped {result['duplicates']} duplicate phone numbers\n"
+                               f"Skipped {result['repeated']} repeated rows of the same patients\n"
+                               f"Rejected {result['rejected']} rows")
+                    if result['reject_file']:
+                        message += f" (see {result['reject_file']})"
+                else:
+                    message = "; ".join(result['errors']) or "Import failed"
+            
+            elif self.export_type == "tables":
+                format_name = self.options.get('format', 'csv')
+                self._start_tracking(f"Exporting tables ({format_name})", "rows")
+                row_counts = export_service.export_tables(
+                    self.file_path, format_name, progress_callback=self._on_table_progress,
+                    cancel_token=self.cancel_token
+                )
+                success = True
+                message = (f"Exported {sum(row_counts.values())} rows from {len(row_counts)} tables to {self.file_path}\n"
+                           + "\n".join(f"{table}: {rows} rows" for table, rows in row_counts.items()))
+            
+            if success:
+                self.progress_updated.emit(100)
             self.export_completed.emit(success, message)
             
+        except OperationCancelled:
+            self.export_completed.emit(False, "Operation cancelled")
         except Exception as e:
             self.export_completed.emit(False, f"Export error: {str(e)}")
+    
+    def _on_table_progress(self, table: str, done: int, total: int):
+        """Aggregate per-table progress into the overall bar and a per-table status line."""
+        with self._table_progress_lock:
+            self._table_progress[table] = (done, total)
+            rows_done = sum(progress[0] for progress in self._table_progress.values())
+            rows_total = sum(progress[1] for progress in self._table_progress.values())
+            self._status_prefix = ", ".join(
+                f"{name} {int(table_done * 100 / table_total) if table_total else 100}%"
+                for name, (table_done, table_total) in self._table_progress.items()
+            )
+            self._on_progress(rows_done, rows_total)
 
 
 class ExportDialog(QDialog):
@@ -156,6 +244,9 @@ class ExportDialog(QDialog):
             "Complete Data (CSV)",
             "Complete Backup (Database)"
         ])
+        # One file per table for each registered exporter
+        for format_name, description in EXPORT_FORMATS.items():
+            self.export_type_combo.addItem(f"All Tables - {description}", format_name)
         export_type_layout.addWidget(self.export_type_combo)
         export_layout.addLayout(export_type_layout)
         
@@ -181,6 +272,42 @@ class ExportDialog(QDialog):
         """)
         export_buttons_layout.addWidget(self.export_button)
         
+        self.import_button = QPushButton("Import Patients...")
+        self.import_button.setStyleSheet("""
+            QPushButton {
+                background-color: #27AE60;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                padding: 10px 20px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #229954;
+            }
+            QPushButton:pressed {
+                background-color: #1E8449;
+            }
+        """)
+        export_buttons_layout.addWidget(self.import_button)
+        
+        self.cancel_button = QPushButton("Cancel Operation")
+        self.cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #E74C3C;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                padding: 10px 20px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #C0392B;
+            }
+        """)
+        self.cancel_button.setVisible(False)
+        export_buttons_layout.addWidget(self.cancel_button)
+        
         export_layout.addLayout(export_buttons_layout)
         main_layout.addWidget(export_group)
     
@@ -272,6 +399,8 @@ class ExportDialog(QDialog):
     def _connect_signals(self):
         """Connect widget signals."""
         self.export_button.clicked.connect(self._export_data)
+        self.import_button.clicked.connect(self._import_patients)
+        self.cancel_button.clicked.connect(self._cancel_operation)
         self.refresh_button.clicked.connect(self._load_statistics)
         self.close_button.clicked.connect(self.close)
     
@@ -295,6 +424,19 @@ class ExportDialog(QDialog):
         try:
             export_type_text = self.export_type_combo.currentText()
             
+            table_format = self.export_type_combo.currentData()
+            if table_format:
+                folder = QFileDialog.getExistingDirectory(
+                    self,
+                    "Select Export Folder",
+                    os.path.expanduser("~/Documents")
+                )
+                if folder:
+                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                    output_dir = os.path.join(folder, f"dental_tables_{table_format}_{timestamp}")
+                    self._start_export("tables", output_dir, {'format': table_format})
+                return
+            
             # Determine file filter and extension based on simplified options
             if "Complete Data (CSV)" in export_type_text:
                 file_filter = "CSV Files (*.csv)"
@@ -333,6 +475,23 @@ class ExportDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
     
+    def _import_patients(self):
+        """Import patients from a CSV or tab-separated file."""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Patient File",
+            os.path.expanduser("~/Documents"),
+            "CSV Files (*.csv *.tsv *.txt);;All Files (*)"
+        )
+        if file_path:
+            self._start_export("import_patients", file_path, {})
+    
+    def _cancel_operation(self):
+        """Stop the running operation at its next batch boundary."""
+        if self.worker and self.worker.isRunning():
+            self.cancel_button.setEnabled(False)
+            self.worker.cancel()
+    
     def _start_export(self, export_type: str, file_path: str, options: dict):
         """Start export operation in background thread."""
         if self.worker and self.worker.isRunning():
@@ -344,6 +503,9 @@ class ExportDialog(QDialog):
         self.result_text.setVisible(False)
         
         self.export_button.setEnabled(False)
+        self.import_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.setVisible(True)
         
         self.worker = ExportWorker(export_type, file_path, options)
         self.worker.progress_updated.connect(self.progress_bar.setValue)
@@ -354,6 +516,8 @@ class ExportDialog(QDialog):
     def _on_export_completed(self, success: bool, message: str):
         """Handle export completion."""
         self.export_button.setEnabled(True)
+        self.import_button.setEnabled(True)
+        self.cancel_button.setVisible(False)
         
         self.progress_bar.setVisible(False)
         self.result_text.setVisible(True)
@@ -372,7 +536,8 @@ class ExportDialog(QDialog):
             """)
             self._load_statistics()  # Refresh statistics
         else:
-            self.status_label.setText("Export failed")
+            cancelled = self.worker is not None and self.worker.cancel_token.cancelled
+            self.status_label.setText("Operation cancelled" if cancelled else "Export failed")
             self.result_text.setPlainText(f"Error: {message}")
             self.result_text.setStyleSheet("""
                 QTextEdit {
@@ -390,7 +555,7 @@ class ExportDialog(QDialog):
             reply = QMessageBox.question(
                 self, 
                 "Operation in Progress", 
-                "An operation is still in progress. Are you sure you want to close?",
+                "An operation is still in progress. Cancel it and close?",
                 QMessageBox.Yes | QMessageBox.No,
                 QMessageBox.No
             )
@@ -398,7 +563,8 @@ class ExportDialog(QDialog):
                 event.ignore()
                 return
             
-            self.worker.terminate()
+            # Let the operation stop at a batch boundary so partial files are cleaned up
+            self.worker.cancel()
             self.worker.wait()
         
         event.accept()
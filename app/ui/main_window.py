@@ -276,6 +276,9 @@ class MainWindow(QMainWindow):
         
         # Connect patient management signals
         self.patients_page.examine_patient.connect(self._examine_patient)
+        
+        # Reload every page after a backup is restored in settings
+        self.settings_page.database_restored.connect(self._reload_pages)
     
     def _handle_page_change(self, page_name: str):
         """Handle navigation page changes."""
@@ -289,7 +292,15 @@ class MainWindow(QMainWindow):
         if page_name in page_map:
             self.content_stack.setCurrentIndex(page_map[page_name])
             self.status_bar.showMessage(f"Viewing {page_name.title()}")
-            logger.info(f"Navigated to {page_name}")
+            logger.debug("Navigated to %s", page_name)
+    
+    def _reload_pages(self):
+        """Reload page data after the database file was replaced."""
+        self.dashboard_page.refresh()
+        self.patients_page._perform_search()
+        self.examination_page.load_patients_list()  # Resets the selection and clears the panels
+        self.status_bar.showMessage("Database restored")
+        logger.info("Pages reloaded after database restore")
     
     def _navigate_to_patients(self):
         """Navigate to patients page from dashboard."""
@@ -603,7 +603,7 @@ class PatientManagement(QWidget):
             count = len(self.patients_data)
             self.count_label.setText(f"{count} patient{'s' if count != 1 else ''}")
             
-            logger.info(f"Loaded {count} patients")
+            logger.debug("Loaded %d patients", count)
             
         except Exception as e:
             logger.error(f"Error loading patients: {str(e)}")
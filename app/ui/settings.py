@@ -6,24 +6,165 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
                                QGroupBox, QLabel, QLineEdit, QPushButton,
                                QCheckBox, QComboBox, QSpinBox, QTextEdit,
                                QFormLayout, QScrollArea, QMessageBox,
-                               QFileDialog, QFrame, QGridLayout)
-from PySide6.QtCore import Qt, Signal
+                               QFileDialog, QFrame, QGridLayout,
+                               QProgressBar)
+from PySide6.QtCore import Qt, Signal, QThread
 from PySide6.QtGui import QFont, QPixmap
 from ..services.auth_service import auth_service
 from ..services.export_service import export_service
 from ..database.database import db_manager
+from ..database.backup import ARCHIVE_EXTENSION, read_archive_manifest
+from ..utils.performance import DatabaseOptimizer
+from ..utils.progress import CancelToken, OperationCancelled
 from ..config import APP_NAME, APP_VERSION, ORGANIZATION
 import os
-import shutil
 from pathlib import Path
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
 
+class CompactDatabaseWorker(QThread):
+    """Worker thread for database compaction."""
+    
+    progress_updated = Signal(int)
+    compact_completed = Signal(bool, object)
+    
+    def run(self):
+        """Run the compaction."""
+        try:
+            result = db_manager.compact_database(self._report_progress)
+            self.compact_completed.emit(True, result)
+        except Exception as e:
+            logger.error(f"Database compaction failed: {str(e)}")
+            self.compact_completed.emit(False, str(e))
+    
+    def _report_progress(self, done, total):
+        self.progress_updated.emit(int(done * 100 / total) if total else 100)
+
+
+class AnalyzeDatabaseWorker(QThread):
+    """Worker thread for the database statistics report (ANALYZE and page scan)."""
+    
+    analysis_completed = Signal(bool, object)
+    
+    def run(self):
+        """Collect the report."""
+        try:
+            report = DatabaseOptimizer.analyze_table_stats()
+            self.analysis_completed.emit(True, report)
+        except Exception as e:
+            logger.error(f"Failed to analyze database: {str(e)}")
+            self.analysis_completed.emit(False, str(e))
+
+
+class BackupWorker(QThread):
+    """Worker thread for online database backups.
+    
+    mode is 'archive' (compressed archive), 'incremental' (snapshot in an
+    incremental store) or 'copy' (plain database file).
+    """
+    
+    progress_updated = Signal(int)
+    backup_completed = Signal(bool, str)
+    
+    def __init__(self, backup_path: str, mode: str = 'archive'):
+        super().__init__()
+        self.backup_path = backup_path
+        self.mode = mode
+        self.cancel_token = CancelToken()
+    
+    def cancel(self):
+        """Stop the backup at its next step; no partial file is left behind."""
+        self.cancel_token.cancel()
+    
+    def run(self):
+        """Run the backup."""
+        try:
+            if self.mode == 'incremental':
+                snapshot = export_service.create_incremental_backup(
+                    self.backup_path, self._report_progress, cancel_token=self.cancel_token
+                )
+                success = snapshot is not None
+            elif self.mode == 'archive':
+                success = export_service.create_backup_archive(
+                    self.backup_path, self._report_progress, cancel_token=self.cancel_token
+                )
+            else:
+                success = export_service.create_complete_backup(
+                    self.backup_path, self._report_progress, cancel_token=self.cancel_token
+                )
+        except OperationCancelled:
+            success = False
+        self.backup_completed.emit(success, self.backup_path)
+    
+    def _report_progress(self, done, total):
+        self.progress_updated.emit(int(done * 100 / total) if total else 100)
+
+
+class RestoreWorker(QThread):
+    """Worker thread for restoring a backup over the live database.
+    
+    Archives are verified and extracted in one pass (checksum, integrity and
+    row counts against the manifest) and incremental snapshots are rebuilt
+    into a standalone file first; db_manager.restore_database then validates and swaps it in.
+    The event loop keeps running meanwhile, so connections held by the UI are
+    returned while the pool drains.
+    """
+    
+    progress_updated = Signal(int)
+    restore_completed = Signal(bool, object)
+    
+    def __init__(self, backup_file: str):
+        super().__init__()
+        self.backup_file = backup_file
+        self._stage = (0, 100)
+    
+    def run(self):
+        """Prepare the backup file and restore it."""
+        backup_file = Path(self.backup_file)
+        restore_file = None
+        try:
+            # Unpack archives and rebuild incremental snapshots into a verified standalone file first
+            candidate = backup_file
+            prepared = backup_file.name.lower().endswith((ARCHIVE_EXTENSION, '.json'))
+            if prepared:
+                self._stage = (0, 50)
+            if backup_file.name.lower().endswith(ARCHIVE_EXTENSION):
+                restore_file = db_manager.database_path.with_name(f"archive_restore_{backup_file.stem}.db")
+                extraction = export_service.verify_backup_archive(str(backup_file), str(restore_file),
+                                                                  self._report_progress)
+                if not extraction['valid']:
+                    raise RuntimeError(extraction['error'])
+                candidate = restore_file
+            elif backup_file.name.lower().endswith('.json'):
+                restore_file = db_manager.database_path.with_name(f"snapshot_restore_{backup_file.stem}.db")
+                if not export_service.restore_incremental_backup(str(backup_file), str(restore_file),
+                                                                 self._report_progress):
+                    raise RuntimeError("Snapshot could not be reconstructed (see log for details)")
+                candidate = restore_file
+            
+            # Validate, swap atomically and re-open the engine
+            self._stage = (50, 100) if prepared else (0, 100)
+            result = db_manager.restore_database(Path(candidate), progress_callback=self._report_progress)
+            self.restore_completed.emit(True, result)
+        except Exception as e:
+            logger.error(f"Failed to restore backup: {str(e)}")
+            self.restore_completed.emit(False, str(e))
+        finally:
+            if restore_file and restore_file.exists():
+                restore_file.unlink()
+    
+    def _report_progress(self, done, total):
+        start, end = self._stage
+        self.progress_updated.emit(start + int((end - start) * done / total) if total else end)
+
+
 class SettingsWidget(QWidget):
     """Main settings interface with tabbed organization."""
     
+    database_restored = Signal()  # Emitted after a backup replaced the live database
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self._setup_ui()
@@ -228,12 +369,41 @@ class SettingsWidget(QWidget):
         
         layout.addWidget(db_group)
         
+        # Database Statistics (planner statistics, page usage, fragmentation)
+        stats_group = QGroupBox("Database Statistics")
+        stats_layout = QVBoxLayout(stats_group)
+        
+        self.db_stats_text = QTextEdit()
+        self.db_stats_text.setReadOnly(True)
+        self.db_stats_text.setMinimumHeight(220)
+        self.db_stats_text.setPlaceholderText("Click 'Analyze Database' to collect statistics.")
+        stats_layout.addWidget(self.db_stats_text)
+        
+        self.analyze_btn = analyze_btn = QPushButton("Analyze Database")
+        analyze_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #007BFF;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 4px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #0069D9;
+            }
+        """)
+        analyze_btn.clicked.connect(self._analyze_database)
+        stats_layout.addWidget(analyze_btn)
+        
+        layout.addWidget(stats_group)
+        
         # Database Actions
-        # actions_group = QGroupBox("Database Actions")
-        # actions_layout = QVBoxLayout(actions_group)
+        actions_group = QGroupBox("Database Actions")
+        actions_layout = QVBoxLayout(actions_group)
         
         # Compact Database
-        compact_btn = QPushButton("Compact Database")
+        self.compact_btn = compact_btn = QPushButton("Compact Database")
         compact_btn.setStyleSheet("""
             QPushButton {
                 background-color: #17A2B8;
@@ -247,8 +417,12 @@ class SettingsWidget(QWidget):
                 background-color: #138496;
             }
         """)
-        # compact_btn.clicked.connect(self._compact_database)
-        # actions_layout.addWidget(compact_btn)
+        compact_btn.clicked.connect(self._compact_database)
+        actions_layout.addWidget(compact_btn)
+        
+        self.compact_progress = QProgressBar()
+        self.compact_progress.setVisible(False)
+        actions_layout.addWidget(self.compact_progress)
         
         # # Reset Database
         # reset_btn = QPushButton("Reset Database (DANGER)")
@@ -268,7 +442,7 @@ class SettingsWidget(QWidget):
         # reset_btn.clicked.connect(self._reset_database)
         # actions_layout.addWidget(reset_btn)
         
-        # layout.addWidget(actions_group)
+        layout.addWidget(actions_group)
         # layout.addStretch()
         
         self.tab_widget.addTab(tab, "Database")
@@ -304,7 +478,7 @@ class SettingsWidget(QWidget):
         manual_group = QGroupBox("Manual Backup & Restore")
         manual_layout = QVBoxLayout(manual_group)
         
-        backup_now_btn = QPushButton("Create Backup Now")
+        self.backup_now_btn = backup_now_btn = QPushButton("Create Backup Now")
         backup_now_btn.setStyleSheet("""
             QPushButton {
                 background-color: #28A745;
@@ -321,7 +495,11 @@ class SettingsWidget(QWidget):
         backup_now_btn.clicked.connect(self._create_backup)
         manual_layout.addWidget(backup_now_btn)
         
-        restore_btn = QPushButton("Restore from Backup")
+        self.backup_progress = QProgressBar()
+        self.backup_progress.setVisible(False)
+        manual_layout.addWidget(self.backup_progress)
+        
+        self.restore_btn = restore_btn = QPushButton("Restore from Backup")
         restore_btn.setStyleSheet("""
             QPushButton {
                 background-color: #FFC107;
@@ -338,6 +516,10 @@ class SettingsWidget(QWidget):
         restore_btn.clicked.connect(self._restore_backup)
         manual_layout.addWidget(restore_btn)
         
+        self.restore_progress = QProgressBar()
+        self.restore_progress.setVisible(False)
+        manual_layout.addWidget(self.restore_progress)
+        
         layout.addWidget(manual_group)
         layout.addStretch()
         
@@ -540,40 +722,28 @@ class SettingsWidget(QWidget):
             
             # Create backup if needed
             if should_backup:
-                timestamp = current_time.strftime("%Y%m%d_%H%M%S")
-                backup_filename = f"auto_backup_{frequency.lower()}_{timestamp}.db"
-                backup_path = backup_dir / backup_filename
+                # Snapshots share unchanged chunks; the store keeps the last 10
+                store_path = backup_dir / "incremental"
                 
-                success = export_service.create_complete_backup(str(backup_path))
+                # Run the backup in the background; the marker is only written once it succeeds
+                def on_backup_completed(success, path):
+                    if success:
+                        with open(marker_file, 'w') as f:
+                            f.write(current_time.isoformat())
+                        
+                        # auto_backup_*.db copies from before the incremental store are left
+                        # alone: they may be the only complete backups the user has
+                        logger.info(f"Automatic {frequency.lower()} backup created in {path}")
+                    else:
+                        logger.error(f"Automatic {frequency.lower()} backup failed: {path}")
                 
-                if success:
-                    # Update marker file
-                    with open(marker_file, 'w') as f:
-                        f.write(current_time.isoformat())
-                    
-                    logger.info(f"Automatic {frequency.lower()} backup created: {backup_path}")
-                    
-                    # Clean up old backups (keep last 10)
-                    self._cleanup_old_backups(backup_dir, f"auto_backup_{frequency.lower()}_*.db")
+                self.auto_backup_worker = BackupWorker(str(store_path), mode='incremental')
+                self.auto_backup_worker.backup_completed.connect(on_backup_completed)
+                self.auto_backup_worker.start()
                 
         except Exception as e:
             logger.error(f"Failed to setup periodic backup: {str(e)}")
     
-    def _cleanup_old_backups(self, backup_dir, pattern):
-        """Clean up old backup files, keeping only the most recent ones."""
-        try:
-            import glob
-            backup_files = list(Path(backup_dir).glob(pattern))
-            backup_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-            
-            # Keep only the 10 most recent backups
-            for old_backup in backup_files[10:]:
-                old_backup.unlink()
-                logger.info(f"Deleted old backup: {old_backup}")
-                
-        except Exception as e:
-            logger.warning(f"Failed to cleanup old backups: {str(e)}")
-    
     def _reset_settings(self):
         """Reset settings to defaults."""
         reply = QMessageBox.question(
@@ -591,19 +761,93 @@ class SettingsWidget(QWidget):
             # Reset other fields...
             QMessageBox.information(self, "Reset Complete", "Settings have been reset to defaults.")
     
+    def _analyze_database(self):
+        """Refresh planner statistics and show the database report (in a worker thread)."""
+        self.analyze_btn.setEnabled(False)
+        self.db_stats_text.setPlainText("Analyzing database...")
+        
+        self.analyze_worker = AnalyzeDatabaseWorker()
+        self.analyze_worker.analysis_completed.connect(self._on_analysis_completed)
+        self.analyze_worker.start()
+    
+    def _on_analysis_completed(self, success, result):
+        """Show the database report."""
+        self.analyze_btn.setEnabled(True)
+        
+        if success:
+            self.db_stats_text.setHtml(self._format_database_report(result))
+            logger.info("Database statistics refreshed")
+        else:
+            self.db_stats_text.clear()
+            QMessageBox.critical(self, "Error", f"Failed to analyze database: {result}")
+    
+    def _format_database_report(self, report):
+        """Format a DatabaseOptimizer report as HTML."""
+        html = f"<b>Analyzed:</b> {report['analyzed_at']}<br>"
+        html += (f"<b>Pages:</b> {report['page_count']} × {report['page_size']} bytes "
+                 f"({report['file_size_bytes'] / (1024 * 1024):.2f} MB)<br>")
+        html += (f"<b>Free pages:</b> {report['freelist_count']} "
+                 f"({report['fragmentation_percent']}% of the file can be reclaimed by compacting)<br>")
+        
+        if report['stale_tables']:
+            html += f"<b>Stale statistics (refreshed now):</b> {', '.join(report['stale_tables'])}<br>"
+        else:
+            html += "<b>Stale statistics:</b> none<br>"
+        
+        html += "<h4>Tables</h4><table cellspacing='4'><tr><th align='left'>Table</th><th>Rows</th><th>Pages</th></tr>"
+        for table, info in report['tables'].items():
+            pages = info['pages'] if info['pages'] is not None else "n/a"
+            html += f"<tr><td>{table}</td><td align='right'>{info['row_count']}</td><td align='right'>{pages}</td></tr>"
+        html += "</table>"
+        
+        html += "<h4>Indexes</h4><table cellspacing='4'><tr><th align='left'>Index</th><th align='left'>Table</th><th align='left'>sqlite_stat1</th></tr>"
+        for index_name, info in report['index_usage'].items():
+            html += f"<tr><td>{index_name}</td><td>{info['table']}</td><td>{info['stat'] or 'no statistics'}</td></tr>"
+        html += "</table>"
+        
+        if not report['dbstat_available']:
+            html += "<p><i>Page counts unavailable: SQLite was built without the dbstat table.</i></p>"
+        
+        return html
+    
     def _compact_database(self):
         """Compact the database."""
         reply = QMessageBox.question(
             self,
             "Compact Database",
-            "This will optimize the database. Continue?",
+            "This will return unused space in the database file to the disk. Continue?",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.Yes
         )
         
-        if reply == QMessageBox.Yes:
-            # Here you would implement database compaction
-            QMessageBox.information(self, "Success", "Database compacted successfully!")
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.compact_btn.setEnabled(False)
+        self.compact_progress.setValue(0)
+        self.compact_progress.setVisible(True)
+        
+        self.compact_worker = CompactDatabaseWorker()
+        self.compact_worker.progress_updated.connect(self.compact_progress.setValue)
+        self.compact_worker.compact_completed.connect(self._on_compact_completed)
+        self.compact_worker.start()
+    
+    def _on_compact_completed(self, success, result):
+        """Handle compaction completion."""
+        self.compact_btn.setEnabled(True)
+        self.compact_progress.setVisible(False)
+        
+        if success:
+            QMessageBox.information(
+                self,
+                "Success",
+                f"Database compacted successfully!\n\n"
+                f"Space reclaimed: {result['bytes_reclaimed'] / 1024:.1f} KB\n"
+                f"Size: {result['bytes_before'] / 1024:.1f} KB → {result['bytes_after'] / 1024:.1f} KB"
+            )
+            logger.info(f"Database compacted: {result}")
+        else:
+            QMessageBox.critical(self, "Error", f"Failed to compact database: {result}")
     
     def _reset_database(self):
         """Reset the database (danger operation)."""
@@ -656,32 +900,44 @@ class SettingsWidget(QWidget):
             
             # Generate backup filename with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"yashoda_dental_backup_{timestamp}.db"
+            backup_filename = f"yashoda_dental_backup_{timestamp}{ARCHIVE_EXTENSION}"
             backup_path = backup_dir / backup_filename
             
-            # Create the backup using export service
-            success = export_service.create_complete_backup(str(backup_path))
+            # Create the backup in the background using export service
+            self.backup_now_btn.setEnabled(False)
+            self.backup_progress.setValue(0)
+            self.backup_progress.setVisible(True)
+            
+            self.backup_worker = BackupWorker(str(backup_path))
+            self.backup_worker.progress_updated.connect(self.backup_progress.setValue)
+            self.backup_worker.backup_completed.connect(self._on_backup_completed)
+            self.backup_worker.start()
             
-            if success:
-                QMessageBox.information(
-                    self, 
-                    "Backup Created Successfully", 
-                    f"Database backup has been created successfully!\n\n"
-                    f"Location: {backup_path}\n"
-                    f"Size: {self._get_file_size(backup_path)}"
-                )
-                logger.info(f"Manual backup created: {backup_path}")
-            else:
-                QMessageBox.critical(
-                    self, 
-                    "Backup Failed", 
-                    "Failed to create database backup. Please check the logs for details."
-                )
-                
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to create backup: {str(e)}")
             logger.error(f"Failed to create backup: {str(e)}")
     
+    def _on_backup_completed(self, success, backup_path):
+        """Handle manual backup completion."""
+        self.backup_now_btn.setEnabled(True)
+        self.backup_progress.setVisible(False)
+        
+        if success:
+            QMessageBox.information(
+                self, 
+                "Backup Created Successfully", 
+                f"Database backup has been created successfully!\n\n"
+                f"Location: {backup_path}\n"
+                f"Size: {self._get_file_size(backup_path)}"
+            )
+            logger.info(f"Manual backup created: {backup_path}")
+        else:
+            QMessageBox.critical(
+                self, 
+                "Backup Failed", 
+                "Failed to create database backup. Please check the logs for details."
+            )
+    
     def _get_file_size(self, file_path):
         """Get human-readable file size."""
         try:
@@ -701,7 +957,8 @@ class SettingsWidget(QWidget):
             self,
             "Select Backup File",
             str(Path.home()),
-            "Database Files (*.db);;All Files (*.*)"
+            f"Backup Archives (*{ARCHIVE_EXTENSION});;Database Files (*.db);;"
+            f"Incremental Snapshots (*.json);;All Files (*.*)"
         )
         
         if backup_file:
@@ -710,13 +967,32 @@ class SettingsWidget(QWidget):
                 QMessageBox.critical(self, "Error", "Selected backup file does not exist.")
                 return
                 
-            if not backup_file.lower().endswith('.db'):
+            if not backup_file.lower().endswith(('.db', '.json', ARCHIVE_EXTENSION)):
                 QMessageBox.warning(
                     self, 
                     "Warning", 
                     "Selected file does not appear to be a database backup file (.db). Continue anyway?"
                 )
             
+            # Show what an archive holds; its contents are verified while it is extracted for the restore
+            archive_details = ""
+            if backup_file.lower().endswith(ARCHIVE_EXTENSION):
+                try:
+                    manifest = read_archive_manifest(backup_file)
+                except Exception as e:
+                    QMessageBox.critical(
+                        self,
+                        "Invalid Backup",
+                        f"The file is not a readable backup archive and cannot be restored:\n\n{str(e)}"
+                    )
+                    return
+                
+                archive_details = (
+                    f"Created: {manifest['created_at'][:19].replace('T', ' ')}\n"
+                    f"Schema version: {manifest['schema_version']}\n"
+                    f"Patients: {manifest['row_counts'].get('patients', 0)}\n"
+                )
+            
             # Show backup file info
             backup_size = self._get_file_size(backup_file)
             backup_date = datetime.fromtimestamp(Path(backup_file).stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S")
@@ -727,7 +1003,8 @@ class SettingsWidget(QWidget):
                 f"This will replace ALL current data with the backup data.\n\n"
                 f"Backup File: {Path(backup_file).name}\n"
                 f"Size: {backup_size}\n"
-                f"Date: {backup_date}\n\n"
+                f"Date: {backup_date}\n"
+                f"{archive_details}\n"
                 f"⚠️ WARNING: This action CANNOT be undone!\n"
                 f"All current patients, dental records, and settings will be lost.\n\n"
                 f"Are you sure you want to continue?",
@@ -748,43 +1025,38 @@ class SettingsWidget(QWidget):
                 )
                 
                 if final_confirm == QMessageBox.Yes:
-                    try:
-                        # Get current database path
-                        current_db_path = Path(__file__).parent.parent.parent / "data" / "dental_practice.db"
-                        
-                        # Create backup of current database before restore
-                        backup_current = current_db_path.parent / f"pre_restore_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-                        if current_db_path.exists():
-                            shutil.copy2(current_db_path, backup_current)
-                            logger.info(f"Created safety backup: {backup_current}")
-                        
-                        # Restore the backup
-                        shutil.copy2(backup_file, current_db_path)
-                        
-                        # Reinitialize database
-                        db_manager.initialize_database()
-                        
-                        QMessageBox.information(
-                            self, 
-                            "Restore Successful", 
-                            f"Database has been successfully restored from backup!\n\n"
-                            f"Restored from: {Path(backup_file).name}\n"
-                            f"Safety backup created: {backup_current.name}\n\n"
-                            f"Please restart the application to ensure all changes take effect."
-                        )
-                        logger.info(f"Database restored from: {backup_file}")
-                        
-                    except Exception as e:
-                        QMessageBox.critical(
-                            self, 
-                            "Restore Failed", 
-                            f"Failed to restore backup:\n{str(e)}\n\n"
-                            f"Your original data should be intact."
-                        )
-                        logger.error(f"Failed to restore backup: {str(e)}")
-                        
-                        # Try to reinitialize database in case of corruption
-                        try:
-                            db_manager.initialize_database()
-                        except:
-                            pass
+                    self.restore_btn.setEnabled(False)
+                    self.restore_progress.setValue(0)
+                    self.restore_progress.setVisible(True)
+                    
+                    self.restore_worker = RestoreWorker(backup_file)
+                    self.restore_worker.progress_updated.connect(self.restore_progress.setValue)
+                    self.restore_worker.restore_completed.connect(self._on_restore_completed)
+                    self.restore_worker.start()
+    
+    def _on_restore_completed(self, success, result):
+        """Handle restore completion."""
+        self.restore_btn.setEnabled(True)
+        self.restore_progress.setVisible(False)
+        backup_file = self.restore_worker.backup_file
+        
+        if success:
+            # Let every page reload from the restored data
+            self.database_restored.emit()
+            
+            safety_backup = Path(result['safety_backup']).name if result['safety_backup'] else "none"
+            QMessageBox.information(
+                self, 
+                "Restore Successful", 
+                f"Database has been successfully restored from backup!\n\n"
+                f"Restored from: {Path(backup_file).name}\n"
+                f"Safety backup created: {safety_backup}"
+            )
+            logger.info(f"Database restored from: {backup_file}")
+        else:
+            QMessageBox.critical(
+                self, 
+                "Restore Failed", 
+                f"Failed to restore backup:\n{result}\n\n"
+                f"Your original data is intact."
+            )
@@ -45,8 +45,8 @@ DISPLAY_DATETIME_FORMAT = "%B %d, %Y at %I:%M %p"
 # File extensions
 EXPORT_FORMATS = {
     'csv': 'Comma Separated Values (*.csv)',
-    'json': 'JSON Files (*.json)',
-    'xlsx': 'Excel Files (*.xlsx)'
+    'jsonl': 'JSON Lines (*.jsonl)',
+    'columnar': 'Columnar row groups (*.columnar.json.gz)'
 }
 
 # Validation constants
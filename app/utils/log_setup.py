@@ -0,0 +1,147 @@
+"""
+Logging configuration for the application.
+
+Records are put on an in-memory queue by a QueueHandler and written by a
+QueueListener thread, so the UI thread never waits for disk I/O. The log file
+is rotated by size. Each logger is rate limited below ERROR so a chatty code
+path cannot flood the file; suppressed records are counted and reported with
+the next record that gets through.
+
+Hot paths should log with %-style arguments or StructuredMessage, which are
+only formatted when a record is actually emitted.
+"""
+import atexit
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from ..config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT,
+    LOG_RATE_LIMIT_PER_SECOND, LOG_RATE_LIMIT_BURST
+)
+
+_listener: Optional[QueueListener] = None
+
+
+class StructuredMessage:
+    """
+    A log message with key=value fields, formatted only when the record is emitted.
+
+    Example:
+        logger.debug(StructuredMessage("chart loaded", patient=patient_id, records=len(rows)))
+    """
+
+    __slots__ = ('event', 'fields')
+
+    def __init__(self, event: str, **fields):
+        self.event = event
+        self.fields = fields
+
+    def __str__(self) -> str:
+        if not self.fields:
+            return self.event
+        return self.event + " " + " ".join(f"{key}={value!r}" for key, value in self.fields.items())
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-logger token bucket for records below ERROR.
+
+    Each logger may emit ``burst`` records at once and ``rate`` records per
+    second after that. Dropped records are counted, and the count is appended
+    to the next record from the same logger that passes.
+    """
+
+    def __init__(self, rate: float = LOG_RATE_LIMIT_PER_SECOND, burst: int = LOG_RATE_LIMIT_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, list] = {}  # logger name -> [tokens, last_refill, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or self.rate <= 0:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [float(self.burst), now, 0]
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.getMessage()} [{suppressed} earlier messages from this logger suppressed]"
+            record.args = None
+        return True
+
+
+def configure_logging(level: str = LOG_LEVEL, log_file: Union[str, Path] = LOG_FILE,
+                      max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT,
+                      console: bool = True) -> QueueListener:
+    """
+    Route all logging through a queue to a rotating log file (and stdout).
+
+    Calling it again replaces the previous configuration.
+
+    Args:
+        level: Root logger level name, e.g. 'INFO'
+        log_file: Log file path; rotated at max_bytes keeping backup_count old files
+        max_bytes: Maximum size of the log file before it is rotated
+        backup_count: Number of rotated files kept (dental_app.log.1, .2, ...)
+        console: Also write records to stdout
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener
+    shutdown_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                       encoding='utf-8', delay=True)
+    file_handler.setFormatter(formatter)
+    handlers = [file_handler]
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Stop the queue listener, flushing queued records to their handlers."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
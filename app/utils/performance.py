@@ -9,6 +9,8 @@ from functools import wraps
 from PySide6.QtCore import QTimer, QObject, Signal
 from contextlib import contextmanager
 
+from ..database.database import db_manager
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,10 +46,18 @@ class PerformanceMonitor(QObject):
             # CPU usage
             cpu_percent = process.cpu_percent()
             
+            # Database connection pool usage
+            pool_status = db_manager.get_pool_status()
+            leaked_connections = db_manager.check_for_leaks() if pool_status else []
+            previously_leaked = self.metrics.get('db_connections_leaked', 0)
+            
             # Update metrics
             self.metrics.update({
                 'memory_usage_mb': memory_mb,
                 'cpu_usage_percent': cpu_percent,
+                'db_connections_checked_out': pool_status.get('checked_out', 0),
+                'db_connections_peak': pool_status.get('peak_checked_out', 0),
+                'db_connections_leaked': len(leaked_connections),
                 'timestamp': time.time()
             })
             
@@ -61,6 +71,10 @@ class PerformanceMonitor(QObject):
                 message = f"High CPU usage: {cpu_percent:.1f}%"
                 logger.warning(message)
                 self.performance_warning.emit("CPU", message)
+            
+            if len(leaked_connections) > previously_leaked:
+                message = f"{len(leaked_connections)} database connection(s) held open too long"
+                self.performance_warning.emit("Database", message)
                 
         except Exception as e:
             logger.error(f"Error monitoring resources: {str(e)}")
@@ -105,7 +119,7 @@ def measure_time(operation_name: str):
             finally:
                 duration_ms = (time.time() - start_time) * 1000
                 performance_monitor.log_operation_time(operation_name, duration_ms)
-                logger.debug(f"{operation_name} completed in {duration_ms:.2f}ms")
+                logger.debug("%s completed in %.2fms", operation_name, duration_ms)
         return wrapper
     return decorator
 
@@ -122,7 +136,7 @@ def measure_database_query(query_description: str):
             finally:
                 duration_ms = (time.time() - start_time) * 1000
                 performance_monitor.log_database_query_time(query_description, duration_ms)
-                logger.debug(f"Database query '{query_description}' completed in {duration_ms:.2f}ms")
+                logger.debug("Database query '%s' completed in %.2fms", query_description, duration_ms)
         return wrapper
     return decorator
 
@@ -136,7 +150,7 @@ def performance_timer(operation_name: str):
     finally:
         duration_ms = (time.time() - start_time) * 1000
         performance_monitor.log_operation_time(operation_name, duration_ms)
-        logger.debug(f"{operation_name} completed in {duration_ms:.2f}ms")
+        logger.debug("%s completed in %.2fms", operation_name, duration_ms)
 
 
 class DatabaseOptimizer:
@@ -144,28 +158,142 @@ class DatabaseOptimizer:
     
     @staticmethod
     def optimize_patient_queries():
-        """Optimize patient-related database queries."""
-        # These would be implemented based on actual query patterns
-        optimizations = [
-            "CREATE INDEX IF NOT EXISTS idx_patients_phone ON patients(phone_number);",
-            "CREATE INDEX IF NOT EXISTS idx_patients_name ON patients(full_name);",
-            "CREATE INDEX IF NOT EXISTS idx_patients_created ON patients(created_at);",
-            "CREATE INDEX IF NOT EXISTS idx_dental_records_patient ON dental_chart_records(patient_id);",
-            "CREATE INDEX IF NOT EXISTS idx_dental_records_quadrant ON dental_chart_records(quadrant, tooth_number);",
-        ]
+        """
+        Get the CREATE INDEX statements for the query indexes declared on the models.
+        They are applied by the schema migrations run from DatabaseManager.initialize_database().
+        """
+        from sqlalchemy.dialects import sqlite
+        from sqlalchemy.schema import CreateIndex
+        from ..database.models import Base
+        
+        optimizations = []
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                optimizations.append(f"{CreateIndex(index, if_not_exists=True).compile(dialect=sqlite.dialect())};")
         
         return optimizations
     
+    # A table's planner statistics are stale when its row count drifted this much since ANALYZE
+    STALE_STATS_RATIO = 0.1
+    
     @staticmethod
-    def analyze_table_stats():
-        """Analyze database table statistics for optimization."""
-        # Would be implemented to analyze actual database
-        return {
+    def _read_sqlite_stat1(connection) -> Dict[tuple, str]:
+        """Read sqlite_stat1 as {(table, index): stat}; empty if ANALYZE has never run."""
+        try:
+            rows = connection.exec_driver_sql("SELECT tbl, idx, stat FROM sqlite_stat1").fetchall()
+        except Exception:
+            return {}
+        return {(tbl, idx): stat for tbl, idx, stat in rows}
+    
+    @staticmethod
+    def analyze_table_stats(run_analyze: bool = True, include_pages: bool = True) -> Dict[str, Any]:
+        """
+        Analyze database table statistics for optimization.
+        
+        Runs ANALYZE (unless disabled), then reports per-table row and page counts,
+        per-index planner statistics from sqlite_stat1, free pages and which tables
+        had stale planner statistics before the run.
+        
+        ANALYZE and the dbstat page scan read the whole file; call this from a
+        worker thread, not the UI thread.
+        
+        Args:
+            run_analyze: Refresh sqlite_stat1 with ANALYZE before reading it
+            include_pages: Collect per-table/index page counts from dbstat
+            
+        Returns:
+            Dictionary containing the database report
+        """
+        report = {
+            'analyzed_at': None,
+            'file_size_bytes': 0,
+            'page_size': 0,
+            'page_count': 0,
+            'freelist_count': 0,
+            'fragmentation_percent': 0.0,
+            'dbstat_available': False,
+            'tables': {},
+            'index_usage': {},
+            'stale_tables': [],
             'patients_count': 0,
             'dental_records_count': 0,
-            'index_usage': {},
             'slow_queries': []
         }
+        
+        if not db_manager.engine:
+            return report
+        
+        with db_manager.engine.connect() as connection:
+            # Virtual tables (the FTS5 search indexes) have no planner statistics of their own;
+            # their shadow tables are listed like any other table
+            tables = [row[0] for row in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' "
+                "AND sql NOT LIKE 'CREATE VIRTUAL TABLE%' ORDER BY name"
+            )]
+            indexes = connection.exec_driver_sql(
+                "SELECT name, tbl_name FROM sqlite_master WHERE type='index' ORDER BY tbl_name, name"
+            ).fetchall()
+            
+            stats_before = DatabaseOptimizer._read_sqlite_stat1(connection)
+            if run_analyze:
+                connection.exec_driver_sql("ANALYZE")
+                connection.commit()
+            stats = DatabaseOptimizer._read_sqlite_stat1(connection)
+            
+            # Page usage per table/index, if SQLite was built with the dbstat virtual table
+            pages = {}
+            if include_pages:
+                try:
+                    for name, page_count, size_bytes in connection.exec_driver_sql(
+                        "SELECT name, COUNT(*), SUM(pgsize) FROM dbstat GROUP BY name"
+                    ):
+                        pages[name] = (page_count, size_bytes)
+                    report['dbstat_available'] = True
+                except Exception:
+                    logger.debug("dbstat virtual table not available")
+            
+            for table in tables:
+                row_count = connection.exec_driver_sql(f'SELECT COUNT(*) FROM "{table}"').scalar() or 0
+                table_pages = pages.get(table)
+                report['tables'][table] = {
+                    'row_count': row_count,
+                    'pages': table_pages[0] if table_pages else None,
+                    'size_bytes': table_pages[1] if table_pages else None
+                }
+                
+                # The first number of any sqlite_stat1 row is the table's row count at ANALYZE time
+                previous = next((stat for (tbl, _), stat in stats_before.items() if tbl == table), None)
+                if previous is None:
+                    if row_count:
+                        report['stale_tables'].append(table)
+                else:
+                    analyzed_rows = int(previous.split()[0])
+                    if abs(row_count - analyzed_rows) > max(1, analyzed_rows) * DatabaseOptimizer.STALE_STATS_RATIO:
+                        report['stale_tables'].append(table)
+            
+            for index_name, table in indexes:
+                stat = stats.get((table, index_name))
+                index_pages = pages.get(index_name)
+                report['index_usage'][index_name] = {
+                    'table': table,
+                    'stat': stat,
+                    # Average rows matched per key prefix; lower means more selective
+                    'rows_per_key': [int(value) for value in stat.split()[1:] if value.isdigit()] if stat else [],
+                    'pages': index_pages[0] if index_pages else None
+                }
+            
+            report['page_size'] = connection.exec_driver_sql("PRAGMA page_size").scalar() or 0
+            report['page_count'] = connection.exec_driver_sql("PRAGMA page_count").scalar() or 0
+            report['freelist_count'] = connection.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+        
+        report['file_size_bytes'] = report['page_size'] * report['page_count']
+        if report['page_count']:
+            report['fragmentation_percent'] = round(100.0 * report['freelist_count'] / report['page_count'], 1)
+        report['patients_count'] = report['tables'].get('patients', {}).get('row_count', 0)
+        report['dental_records_count'] = report['tables'].get('dental_chart_records', {}).get('row_count', 0)
+        report['analyzed_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        
+        return report
 
 
 class UIOptimizer:
@@ -234,10 +362,14 @@ def optimize_application_performance():
     logger.info("Starting application performance optimization...")
     
     try:
-        # Database optimizations
-        db_optimizer = DatabaseOptimizer()
-        db_stats = db_optimizer.analyze_table_stats()
-        logger.info(f"Database statistics: {db_stats}")
+        # Cheap database summary; the full report (ANALYZE, page scan) is in Settings > Database
+        if db_manager.engine:
+            db_stats = DatabaseOptimizer.analyze_table_stats(run_analyze=False, include_pages=False)
+            logger.info(
+                f"Database statistics: {db_stats['patients_count']} patients, "
+                f"{db_stats['page_count']} pages, {db_stats['fragmentation_percent']}% free, "
+                f"stale planner stats: {db_stats['stale_tables'] or 'none'}"
+            )
         
         # Memory optimizations
         MemoryOptimizer.cleanup_ui_cache()
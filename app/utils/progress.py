@@ -0,0 +1,87 @@
+"""
+Progress and cancellation contract for long-running operations.
+
+Backup, export and import functions accept an optional
+``progress_callback(done, total)`` and an optional ``cancel_token``. They call
+the callback after every batch and check the token between batches, raising
+OperationCancelled so the caller can clean up without killing its thread.
+"""
+import threading
+import time
+from typing import Optional
+
+
+class OperationCancelled(Exception):
+    """Raised when a long-running operation is stopped through its CancelToken."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared between a UI and a worker."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request cancellation; the operation stops at its next batch boundary."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Raise OperationCancelled if cancellation was requested."""
+        if self._event.is_set():
+            raise OperationCancelled()
+
+
+def check_cancelled(cancel_token: Optional[CancelToken]):
+    """Raise OperationCancelled if an optional token was cancelled."""
+    if cancel_token is not None:
+        cancel_token.raise_if_cancelled()
+
+
+class ProgressTracker:
+    """Turn (done, total) updates into a percentage, throughput and ETA."""
+
+    def __init__(self, unit: str = "rows"):
+        self.unit = unit  # 'rows' or 'bytes'
+        self.started_at = time.monotonic()
+        self.done = 0
+        self.total = 0
+
+    def update(self, done: int, total: int):
+        self.done = done
+        self.total = total
+
+    @property
+    def percent(self) -> int:
+        return int(self.done * 100 / self.total) if self.total else 0
+
+    @property
+    def rate(self) -> float:
+        """Units per second since the operation started."""
+        elapsed = time.monotonic() - self.started_at
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        rate = self.rate
+        if not rate or not self.total:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+    def _format_amount(self, amount: float) -> str:
+        if self.unit == "bytes":
+            return f"{amount / (1024 * 1024):.1f} MB"
+        return f"{int(amount):,} {self.unit}"
+
+    def describe(self) -> str:
+        """Human-readable status, e.g. '1,200 / 5,000 rows · 850 rows/s · ETA 0:05'."""
+        text = f"{self._format_amount(self.done)} / {self._format_amount(self.total)}"
+        text += f" · {self._format_amount(self.rate)}/s"
+        eta = self.eta_seconds
+        if eta is not None:
+            minutes, seconds = divmod(int(eta), 60)
+            text += f" · ETA {minutes}:{seconds:02d}"
+        return text
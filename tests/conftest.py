@@ -0,0 +1,17 @@
+"""
+Shared fixtures: point the global database manager at a throwaway database.
+"""
+import pytest
+
+from app.database.database import db_manager
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Initialize db_manager on an empty database file; restore the previous path afterwards."""
+    previous_path = db_manager.database_path
+    db_manager.database_path = tmp_path / "test.db"
+    assert db_manager.initialize_database()
+    yield db_manager
+    db_manager.close()
+    db_manager.database_path = previous_path
@@ -0,0 +1,217 @@
+"""
+Backup round trips: online copies, incremental snapshots, compressed archives and restore.
+"""
+import json
+import sqlite3
+import threading
+import zipfile
+
+import pytest
+
+from app.database.backup import (
+    ARCHIVE_DATABASE_MEMBER, ARCHIVE_MANIFEST_MEMBER, IncrementalBackupStore, backup_database_file,
+    create_backup_archive, verify_backup_archive
+)
+from app.services.patient_service import patient_service
+
+CHUNK_SIZE = 16384
+
+
+def patient_rows(path):
+    connection = sqlite3.connect(str(path))
+    try:
+        return connection.execute("SELECT patient_id, full_name, phone_number FROM patients ORDER BY id").fetchall()
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def populated(database):
+    """A live WAL database with enough patients to span many chunks."""
+    with database.engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO patients (patient_id, full_name, phone_number, address) VALUES (?, ?, ?, ?)",
+            [(f"P{number:05d}", f"Patient {number}", f"90000{number:05d}", "Street " * 20)
+             for number in range(1, 2001)]
+        )
+    return database
+
+
+def test_backup_database_file_copies_the_live_database(populated, tmp_path):
+    backup_path = tmp_path / "copy" / "backup.db"
+    result = backup_database_file(populated.database_path, backup_path)
+
+    assert result['backup_path'] == str(backup_path)
+    assert not backup_path.with_name("backup.db.partial").exists()
+    assert patient_rows(backup_path) == patient_rows(populated.database_path)
+    connection = sqlite3.connect(str(backup_path))
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+    connection.close()
+
+
+def test_incremental_snapshots_store_only_changed_chunks(populated, tmp_path):
+    store = IncrementalBackupStore(tmp_path / "store", chunk_size=CHUNK_SIZE)
+    first = store.create_snapshot(populated.database_path)
+    before = patient_rows(populated.database_path)
+
+    assert not first['staged']  # WAL database read in place
+    assert first['new_bytes'] == first['size_bytes']
+
+    with populated.engine.begin() as connection:
+        connection.exec_driver_sql("UPDATE patients SET full_name = 'Renamed' WHERE patient_id = 'P01000'")
+    second = store.create_snapshot(populated.database_path)
+    after = patient_rows(populated.database_path)
+
+    # One changed row touches its table page, the header, the search index segments and
+    # pointer-map pages: a small fraction of the file, not a full copy
+    assert 0 < second['new_chunks'] < len(second['chunks']) // 4
+    assert second['new_bytes'] < second['size_bytes'] // 4
+    assert [snapshot['snapshot_id'] for snapshot in store.list_snapshots()] == [first['snapshot_id'], second['snapshot_id']]
+
+    store.restore_snapshot(first['snapshot_id'], tmp_path / "first.db")
+    store.restore_snapshot(second['snapshot_id'], tmp_path / "second.db")
+    assert patient_rows(tmp_path / "first.db") == before
+    assert patient_rows(tmp_path / "second.db") == after
+    # The restored file is a standalone rollback-journal database
+    connection = sqlite3.connect(str(tmp_path / "second.db"))
+    assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+    connection.close()
+
+    # Pruning drops the old manifest and the chunks only it referenced
+    assert store.prune(keep=1) == 1
+    assert len(list(store.chunks_dir.glob("*/*"))) == len(set(second['chunks']))
+    with pytest.raises(FileNotFoundError):
+        store.restore_snapshot(first['snapshot_id'], tmp_path / "gone.db")
+    store.restore_snapshot(second['snapshot_id'], tmp_path / "again.db")
+    assert patient_rows(tmp_path / "again.db") == after
+
+
+def test_prune_waits_for_a_snapshot_in_progress(populated, tmp_path):
+    store = IncrementalBackupStore(tmp_path / "store", chunk_size=CHUNK_SIZE)
+    for name in ("First", "Second", "Third"):
+        with populated.engine.begin() as connection:
+            connection.exec_driver_sql(f"UPDATE patients SET full_name = '{name}' WHERE patient_id = 'P01000'")
+        if name != "Third":
+            store.create_snapshot(populated.database_path)
+
+    # Prune from another store object while the third snapshot has written chunks but no manifest yet
+    pruner = threading.Thread(target=IncrementalBackupStore(store.root, chunk_size=CHUNK_SIZE).prune, args=(1,))
+
+    def start_pruning(done, total):
+        if not pruner.is_alive() and done >= total // 2:
+            pruner.start()
+            pruner.join(0.2)
+            assert pruner.is_alive()  # blocked on the store lock
+
+    third = store.create_snapshot(populated.database_path, start_pruning)
+    pruner.join()
+
+    assert [snapshot['snapshot_id'] for snapshot in store.list_snapshots()] == [third['snapshot_id']]
+    store.restore_snapshot(third['snapshot_id'], tmp_path / "third.db")
+    assert patient_rows(tmp_path / "third.db") == patient_rows(populated.database_path)
+
+
+def test_incremental_snapshot_of_a_rollback_journal_database_is_staged(populated, tmp_path):
+    source = tmp_path / "journal.db"
+    backup_database_file(populated.database_path, source)
+    store = IncrementalBackupStore(tmp_path / "store", chunk_size=CHUNK_SIZE)
+
+    snapshot = store.create_snapshot(source)
+
+    assert snapshot['staged']
+    assert not list(store.root.glob("*.staging.db"))
+    store.restore_snapshot(snapshot['snapshot_id'], tmp_path / "restored.db")
+    assert patient_rows(tmp_path / "restored.db") == patient_rows(source)
+
+
+def test_backup_archive_round_trip_and_corruption(populated, tmp_path):
+    archive_path = tmp_path / "backup.dpbak"
+    manifest = create_backup_archive(populated.database_path, archive_path)
+
+    assert manifest['row_counts']['patients'] == 2000
+    assert archive_path.stat().st_size < manifest['size_bytes']
+    assert verify_backup_archive(archive_path, tmp_path / "extracted.db") == manifest
+    assert patient_rows(tmp_path / "extracted.db") == patient_rows(populated.database_path)
+
+    # Same manifest, one flipped byte in the database member
+    with zipfile.ZipFile(archive_path) as archive:
+        data = bytearray(archive.read(ARCHIVE_DATABASE_MEMBER))
+        manifest_text = archive.read(ARCHIVE_MANIFEST_MEMBER)
+    data[len(data) // 2] ^= 0xFF
+    corrupted = tmp_path / "corrupted.dpbak"
+    with zipfile.ZipFile(corrupted, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(ARCHIVE_DATABASE_MEMBER, bytes(data))
+        archive.writestr(ARCHIVE_MANIFEST_MEMBER, manifest_text)
+
+    with pytest.raises(sqlite3.DatabaseError):
+        verify_backup_archive(corrupted, tmp_path / "bad.db")
+    assert not (tmp_path / "bad.db").exists()
+    assert not (tmp_path / "bad.db.partial").exists()
+
+    # Intact database, but the manifest claims rows the file does not hold
+    manifest['row_counts']['patients'] += 1
+    miscounted = tmp_path / "miscounted.dpbak"
+    with zipfile.ZipFile(archive_path) as source, zipfile.ZipFile(miscounted, 'w') as archive:
+        archive.writestr(ARCHIVE_DATABASE_MEMBER, source.read(ARCHIVE_DATABASE_MEMBER))
+        archive.writestr(ARCHIVE_MANIFEST_MEMBER, json.dumps(manifest))
+
+    with pytest.raises(sqlite3.DatabaseError, match="row counts: patients"):
+        verify_backup_archive(miscounted, tmp_path / "miscounted.db")
+    assert not (tmp_path / "miscounted.db").exists()
+
+    not_an_archive = tmp_path / "plain.dpbak"
+    not_an_archive.write_bytes(b"not a zip file")
+    with pytest.raises(zipfile.BadZipFile):
+        verify_backup_archive(not_an_archive)
+
+
+def test_restore_database_swaps_in_a_backup(database, tmp_path, monkeypatch):
+    reloads = []
+    monkeypatch.setattr(database, '_reload_listeners', [lambda: reloads.append(True)])
+    patient_service.create_patient({'full_name': "Ravi Kumar", 'phone_number': "9876543210"})
+    backup_path = tmp_path / "backup.db"
+    backup_database_file(database.database_path, backup_path)
+    patient_service.create_patient({'full_name': "Meena Iyer", 'phone_number': "9123456780"})
+
+    steps = []
+    result = database.restore_database(backup_path, progress_callback=lambda done, total: steps.append(done))
+
+    assert steps == [0, 1, 2, 3, 4, 5]
+    assert reloads == [True]
+    assert [patient['full_name'] for patient in patient_service.get_all_patients()] == ["Ravi Kumar"]
+    # The indexes restored with the file are in step with it
+    assert patient_service.search_patients("meena") == []
+    assert [name for _, name, _ in patient_rows(result['safety_backup'])] == ["Ravi Kumar", "Meena Iyer"]
+    assert backup_path.exists()
+
+
+def test_restore_database_rejects_a_damaged_file(database, tmp_path):
+    patient_service.create_patient({'full_name': "Ravi Kumar", 'phone_number': "9876543210"})
+    damaged = tmp_path / "damaged.db"
+    damaged.write_bytes(b"SQLite format 3\x00" + b"\x00" * 4080)
+
+    with pytest.raises(sqlite3.DatabaseError):
+        database.restore_database(damaged)
+
+    assert [patient['full_name'] for patient in patient_service.get_all_patients()] == ["Ravi Kumar"]
+    assert not list(tmp_path.glob("*.restore"))
+
+
+def test_restore_worker_restores_an_archive(database, tmp_path):
+    from app.ui.settings import RestoreWorker
+
+    patient_service.create_patient({'full_name': "Ravi Kumar", 'phone_number': "9876543210"})
+    archive_path = tmp_path / "backup.dpbak"
+    create_backup_archive(database.database_path, archive_path)
+    patient_service.create_patient({'full_name': "Meena Iyer", 'phone_number': "9123456780"})
+
+    worker = RestoreWorker(str(archive_path))
+    progress, results = [], []
+    worker.progress_updated.connect(progress.append)
+    worker.restore_completed.connect(lambda success, result: results.append((success, result)))
+    worker.run()
+
+    assert [success for success, _ in results] == [True]
+    assert progress == sorted(progress) and progress[-1] == 100
+    assert [patient['full_name'] for patient in patient_service.get_all_patients()] == ["Ravi Kumar"]
+    assert not list(database.database_path.parent.glob("archive_restore_*"))
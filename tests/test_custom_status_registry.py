@@ -0,0 +1,24 @@
+from app.services.custom_status_service import CustomStatusRegistry
+
+
+class FlakyService:
+    """Returns [] (what the service returns after a logged error) on the first call."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_all_custom_statuses(self):
+        self.calls += 1
+        if self.calls == 1:
+            return []
+        return [{'status_name': 'caries', 'category': 'Pathology', 'is_active': True, 'color': '#ff0000'}]
+
+
+def test_failed_load_is_retried_on_next_access():
+    service = FlakyService()
+    registry = CustomStatusRegistry(service)
+
+    assert registry.get_color('caries') is None
+    assert registry.get_color('caries') == '#ff0000'
+    assert registry.get_statuses_by_category()['Pathology'][0]['status_name'] == 'caries'
+    assert service.calls == 2  # cached once a load succeeds
@@ -0,0 +1,66 @@
+"""
+Every registered exporter must write Decimal and date columns and read back the same values.
+"""
+import csv
+import gzip
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.services.export_service import export_service
+from app.services.exporters import EXPORTERS
+from app.services.patient_service import patient_service
+from app.services.visit_records_service import visit_records_service
+
+COLUMNS = ['visit_date', 'cost']
+ROWS = [(date(2024, 5, 1), Decimal('1500.00')), (date(2024, 6, 3), Decimal('250.50')), (date(2024, 6, 4), None)]
+
+
+def read_back(format_name, file_path):
+    """Read an exported file as a list of {column: text value} rows."""
+    if format_name == 'csv':
+        with open(file_path, newline='', encoding='utf-8') as file:
+            return [{name: value or None for name, value in row.items()} for row in csv.DictReader(file)]
+    if format_name == 'jsonl':
+        with open(file_path, encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+    with gzip.open(file_path, 'rt', encoding='utf-8') as file:
+        header = json.loads(file.readline())
+        rows = []
+        for line in file:
+            group = json.loads(line)
+            rows.extend(dict(zip(header['columns'], values))
+                        for values in zip(*(group['columns'][name] for name in header['columns'])))
+        return rows
+
+
+def as_values(row):
+    return (date.fromisoformat(row['visit_date']), None if row['cost'] is None else Decimal(row['cost']))
+
+
+@pytest.mark.parametrize("format_name", sorted(EXPORTERS))
+def test_exporter_round_trips_decimal_and_date(tmp_path, format_name):
+    exporter_class = EXPORTERS[format_name]
+    file_path = tmp_path / f"visits{exporter_class.extension}"
+    with exporter_class(str(file_path), 'visits', COLUMNS) as exporter:
+        exporter.write_rows(ROWS[:2])
+        exporter.write_rows(ROWS[2:])
+
+    assert [as_values(row) for row in read_back(format_name, file_path)] == ROWS
+
+
+@pytest.mark.parametrize("format_name", sorted(EXPORTERS))
+def test_export_tables_writes_visits_with_costs(database, tmp_path, format_name):
+    patient = patient_service.create_patient({'full_name': "Ravi Kumar", 'phone_number': "9876543210"})
+    assert visit_records_service.create_visit(patient['id'], {'visit_date': date(2024, 5, 1), 'cost': Decimal('1500.50')})
+
+    counts = export_service.export_tables(str(tmp_path), format_name, tables=['visit_records', 'visit_daily_stats'])
+
+    assert counts == {'visit_records': 1, 'visit_daily_stats': 1}
+    visits = read_back(format_name, tmp_path / f"visit_records{EXPORTERS[format_name].extension}")
+    assert Decimal(visits[0]['cost']) == Decimal('1500.50')
+    assert visits[0]['visit_date'] == '2024-05-01'
+    daily = read_back(format_name, tmp_path / f"visit_daily_stats{EXPORTERS[format_name].extension}")
+    assert Decimal(daily[0]['total_cost']) == Decimal('1500.50')
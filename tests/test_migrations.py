@@ -0,0 +1,148 @@
+"""
+Schema migrations applied to a database seeded in an older layout.
+"""
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+
+from app.database.database import db_manager
+from app.database import migrations
+from app.database.migrations import SCHEMA_VERSION
+from app.database.models import Base
+
+
+def seed_database(path, version, statements):
+    """Create the model tables, run raw INSERTs and stamp the file with an old schema version."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for statement, parameters in statements:
+            connection.exec_driver_sql(statement, parameters)
+        connection.exec_driver_sql(f"PRAGMA user_version={version}")
+    engine.dispose()
+
+
+@pytest.fixture
+def migrate(tmp_path):
+    """Seed a version-2 database, then open it with db_manager (which runs the migrations)."""
+    previous_path = db_manager.database_path
+
+    def run(statements):
+        path = tmp_path / "legacy.db"
+        seed_database(path, 2, [
+            ("INSERT INTO patients (id, patient_id, full_name, phone_number) VALUES (1, 'P00001', 'Ravi Kumar', '+91 98765 43210')", ()),
+            *statements
+        ])
+        db_manager.database_path = path
+        assert db_manager.initialize_database()
+        assert db_manager.get_schema_version() == SCHEMA_VERSION
+        return db_manager.engine
+
+    yield run
+    db_manager.close()
+    db_manager.database_path = previous_path
+
+
+def test_tooth_history_json_lists_become_events(migrate):
+    history_insert = (
+        "INSERT INTO tooth_history (id, patient_id, tooth_number, record_type, status_history, "
+        "description_history, date_history, status, description, date_recorded) VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    engine = migrate([
+        (history_insert, (1, 11, 'doctor_finding', json.dumps([['caries'], ['filled', 'crown']]),
+                          json.dumps(['first', 'second']), json.dumps(['2024-01-05', '2024-03-01']),
+                          'filled,crown', 'second', '2024-03-01')),
+        # A record written without lists keeps its latest state as a single entry
+        (history_insert, (2, 12, 'patient_problem', None, None, None, 'pain', 'aches', '2024-02-10')),
+    ])
+
+    with engine.connect() as connection:
+        events = connection.exec_driver_sql(
+            "SELECT history_id, tooth_number, status, description, date_recorded "
+            "FROM tooth_history_events ORDER BY id"
+        ).fetchall()
+        legacy = connection.exec_driver_sql("SELECT status_history FROM tooth_history WHERE id = 1").scalar()
+
+    assert [tuple(event) for event in events] == [
+        (1, 11, 'caries', 'first', '2024-01-05'),
+        (1, 11, 'filled,crown', 'second', '2024-03-01'),
+        (2, 12, 'pain', 'aches', '2024-02-10'),
+    ]
+    # The original lists are kept until the conversion has been checked
+    assert json.loads(legacy) == [['caries'], ['filled', 'crown']]
+
+    from app.services.tooth_history_service import tooth_history_service
+    history = tooth_history_service.get_tooth_full_history(1, 11)['doctor_findings'][0]
+    assert history['status_history'] == [['caries'], ['filled', 'crown']]
+    assert history['date_history'] == [date(2024, 1, 5).isoformat(), date(2024, 3, 1).isoformat()]
+
+
+def test_search_indexes_are_built_from_existing_patients(migrate):
+    engine = migrate([
+        ("INSERT INTO patients (id, patient_id, full_name, phone_number) VALUES (2, 'P00002', 'Meena Iyer', '080-2345 6789')", ()),
+    ])
+
+    with engine.connect() as connection:
+        for table in ("patients_fts", "patients_trigram"):
+            assert connection.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar() == 2
+
+    from app.services.patient_service import patient_service
+    assert [patient['patient_id'] for patient in patient_service.search_patients("ravi")] == ['P00001']
+    assert [patient['patient_id'] for patient in patient_service.search_patients("9876543210")] == ['P00001']
+    assert [patient['patient_id'] for patient in patient_service.search_patients("eena")] == ['P00002']
+
+
+def test_missing_fts5_support_falls_back_to_a_substring_scan(migrate, monkeypatch):
+    # Simulate a SQLite build without FTS5 and one without the trigram tokenizer
+    monkeypatch.setattr(migrations, 'PATIENT_SEARCH_DDL', [
+        "CREATE VIRTUAL TABLE patients_fts USING no_such_module(full_name)", *migrations.PATIENT_SEARCH_DDL[1:]
+    ])
+    monkeypatch.setattr(migrations, 'PATIENT_SUBSTRING_DDL', [
+        "CREATE VIRTUAL TABLE patients_trigram USING fts5(full_name, tokenize = 'no_such_tokenizer')",
+        *migrations.PATIENT_SUBSTRING_DDL[1:]
+    ])
+    engine = migrate([])
+
+    with engine.connect() as connection:
+        search_objects = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE name LIKE 'patients_fts%' OR name LIKE 'patients_trigram%'"
+        ).scalars().all()
+    assert search_objects == []
+
+    # Without the index tables no trigger writes to them
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO patients (patient_id, full_name, phone_number) VALUES ('P00002', 'Meena Iyer', '9123456780')"
+        )
+
+    from app.services.patient_service import patient_service
+    assert [patient['full_name'] for patient in patient_service.search_patients("eena")] == ["Meena Iyer"]
+    assert [patient['patient_id'] for patient in patient_service.search_patients("98765")] == ['P00001']
+
+
+def test_visit_daily_stats_is_filled_from_existing_visits(migrate):
+    visit_insert = "INSERT INTO visit_records (patient_id, visit_date, status, visit_type, cost) VALUES (1, ?, ?, ?, ?)"
+    engine = migrate([
+        (visit_insert, ('2024-05-01', 'completed', 'treatment', 1200)),
+        (visit_insert, ('2024-05-01', 'completed', 'treatment', 300.5)),
+        (visit_insert, ('2024-05-01', None, None, None)),
+        (visit_insert, ('2024-05-02', 'no_show', 'consultation', None)),
+    ])
+
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT visit_date, status, visit_type, visit_count, total_cost FROM visit_daily_stats "
+            "ORDER BY visit_date, status, visit_type"
+        ).fetchall()
+        triggers = connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'visit_records' ORDER BY name"
+        ).scalars().all()
+
+    assert [tuple(row) for row in rows] == [
+        ('2024-05-01', '', '', 1, 0),
+        ('2024-05-01', 'completed', 'treatment', 2, 1500.5),
+        ('2024-05-02', 'no_show', 'consultation', 1, 0),
+    ]
+    assert triggers == ['visit_daily_stats_delete', 'visit_daily_stats_insert', 'visit_daily_stats_update']
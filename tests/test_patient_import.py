@@ -0,0 +1,90 @@
+"""
+Bulk patient import from CSV/TSV: duplicate phones, repeated rows, rejected rows and patient ID allocation.
+"""
+import csv
+from datetime import date
+
+from app.database.models import Patient
+from app.services.export_service import export_service
+from app.services.patient_service import patient_service
+
+HEADER = ["Patient ID", "Full Name", "Phone Number", "Date of Birth", "Email", "Tooth Number"]
+
+
+def write_rows(path, rows, delimiter=','):
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle, delimiter=delimiter)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+
+def imported_patients(database):
+    with database.session_scope() as session:
+        return {patient.full_name: (patient.patient_id, patient.phone_number, patient.date_of_birth)
+                for patient in session.query(Patient)}
+
+
+def test_import_skips_duplicates_rejects_invalid_rows_and_allocates_ids(database, tmp_path):
+    existing = patient_service.create_patient({'full_name': "Ravi Kumar", 'phone_number': "9876543210"})
+    assert existing['patient_id'] == 'P00001'
+
+    path = write_rows(tmp_path / "patients.csv", [
+        ["P00001", "Ravi Again", "98765-43210", "", "", "11"],       # duplicate phone of an existing patient
+        ["P00001", "Asha Rao", "9000000001", "05-03-1990", "", "11"],  # ID taken: a new one is allocated
+        ["P00001", "Asha Rao", "9000000001", "05-03-1990", "", "12"],  # second tooth row of the same patient
+        ["P00007", "Kiran Das", "9000000002", "1985-12-01", "kiran@example.com", ""],  # free ID kept
+        ["", "Deepa Nair", "9000000003", "", "", ""],
+        ["P00007", "Lata Menon", "9000000004", "", "", ""],          # ID kept by an earlier row
+        ["P00020", "", "9000000005", "", "", ""],                    # no name
+        ["P00021", "Bad Date", "9000000006", "31-02-2020", "", ""],
+        ["P00022", "Bad Email", "9000000007", "", "not-an-email", ""],
+    ])
+
+    result = export_service.import_patients_from_csv(path, batch_size=2)
+
+    assert result['success'] and not result['errors']
+    assert (result['imported'], result['duplicates'], result['repeated'], result['rejected']) == (4, 1, 1, 3)
+    # Each batch moves the sequence past the IDs it keeps before allocating
+    assert imported_patients(database) == {
+        "Ravi Kumar": ('P00001', "9876543210", None),
+        "Asha Rao": ('P00008', "9000000001", date(1990, 3, 5)),
+        "Kiran Das": ('P00007', "9000000002", date(1985, 12, 1)),
+        "Deepa Nair": ('P00009', "9000000003", None),
+        "Lata Menon": ('P00010', "9000000004", None),
+    }
+
+    # The sequence moved past every imported ID, so later creates do not collide
+    assert patient_service.create_patient({'full_name': "Next", 'phone_number': "9000000008"})['patient_id'] == 'P00011'
+
+    with open(result['reject_file'], newline='', encoding='utf-8') as handle:
+        rejects = list(csv.reader(handle))
+    assert rejects[0] == HEADER + ['Errors']
+    assert [row[0] for row in rejects[1:]] == ['P00020', 'P00021', 'P00022']
+    assert rejects[1][-1] == "Full name is required"
+    assert rejects[2][-1] == "Unrecognized date (use DD-MM-YYYY)"
+
+
+def test_import_reads_tab_separated_files(database, tmp_path):
+    stale_rejects = tmp_path / "patients.rejects.csv"
+    stale_rejects.write_text("Patient ID,Errors\nP00099,left by an earlier run\n", encoding='utf-8')
+    path = write_rows(tmp_path / "patients.tsv", [
+        ["P00003", "Ravi Kumar", "+91 98765 43210", "01/02/1970", "", ""],
+        ["", "Meena Iyer", "9123456780", "", "meena@example.com", ""],
+    ], delimiter='\t')
+
+    result = export_service.import_patients_from_csv(path)
+
+    assert result['success'] and result['imported'] == 2
+    assert result['reject_file'] is None
+    assert not stale_rejects.exists()
+    assert imported_patients(database) == {
+        "Ravi Kumar": ('P00003', "+91 98765 43210", date(1970, 2, 1)),
+        "Meena Iyer": ('P00004', "9123456780", None),
+    }
+    # Imported rows are searchable through the index triggers
+    assert [patient['full_name'] for patient in patient_service.search_patients("9876543210")] == ["Ravi Kumar"]
+
+    # Importing the same file again only finds duplicates
+    again = export_service.import_patients_from_csv(path)
+    assert (again['imported'], again['duplicates']) == (0, 2)
@@ -0,0 +1,83 @@
+"""
+Indexed patient search: word prefixes, phone digits, substrings and no-match.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.services.patient_service import patient_service
+
+
+@pytest.fixture
+def patients(database):
+    created = {}
+    for name, phone, email in [
+        ("Rama Sharma", "+91 98765 43210", "rama@example.com"),
+        ("Sita Reddy", "(080) 2345-6789", None),
+        ("Arjun Ramesh", "9988776655", "arjun.r@example.org"),
+    ]:
+        patient = patient_service.create_patient({'full_name': name, 'phone_number': phone, 'email': email})
+        created[name] = patient
+    return created
+
+
+@pytest.fixture
+def statements(database):
+    """SQL statements executed while the test runs."""
+    executed = []
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(database.engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(database.engine, "before_cursor_execute", record)
+
+
+def names(results):
+    return [patient['full_name'] for patient in results]
+
+
+def test_word_prefix_matches_ranked_by_name(patients):
+    assert names(patient_service.search_patients("ram")) == ["Rama Sharma", "Arjun Ramesh"]
+    assert names(patient_service.search_patients("sita re")) == ["Sita Reddy"]
+    assert names(patient_service.search_patients("RED")) == ["Sita Reddy"]
+
+
+def test_phone_digits_match_however_the_number_is_written(patients):
+    assert names(patient_service.search_patients("98765")) == ["Rama Sharma"]
+    assert names(patient_service.search_patients("98765-43210")) == ["Rama Sharma"]
+    # National number of a number stored with a country code
+    assert names(patient_service.search_patients("987654")) == ["Rama Sharma"]
+    assert names(patient_service.search_patients("0802345")) == ["Sita Reddy"]
+
+
+def test_substring_matches_of_the_former_ilike_search(patients):
+    # Middle of a name, a patient ID and a phone number
+    assert names(patient_service.search_patients("arma")) == ["Rama Sharma"]
+    patient_id = patients["Arjun Ramesh"]['patient_id']
+    assert names(patient_service.search_patients(patient_id[2:])) == ["Arjun Ramesh"]
+    assert names(patient_service.search_patients("76655")) == ["Arjun Ramesh"]
+    assert names(patient_service.search_patients("5-67")) == ["Sita Reddy"]
+    # Prefix matches come before substring matches
+    assert names(patient_service.search_patients("sha")) == ["Rama Sharma"]
+    assert names(patient_service.search_patients("ame")) == ["Arjun Ramesh"]
+
+
+def test_short_terms_match_prefixes_only(patients):
+    assert names(patient_service.search_patients("ar")) == ["Arjun Ramesh"]
+
+
+def test_no_match_returns_empty_without_scanning(patients, statements):
+    assert patient_service.search_patients("zzzz") == []
+    assert not [statement for statement in statements if "LIKE" in statement.upper()]
+
+
+def test_index_follows_updates_and_deletes(patients):
+    patient_id = patients["Sita Reddy"]['patient_id']
+    assert patient_service.update_patient(patient_id, {'full_name': "Sita Iyer", 'phone_number': "555 000 1111"})
+    assert patient_service.search_patients("reddy") == []
+    assert names(patient_service.search_patients("iyer")) == ["Sita Iyer"]
+    assert names(patient_service.search_patients("5550001111")) == ["Sita Iyer"]
+
+    assert patient_service.delete_patient(patient_id)
+    assert patient_service.search_patients("iyer") == []
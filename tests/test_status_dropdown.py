@@ -0,0 +1,43 @@
+"""
+Every tooth widget shares one status dropdown that moves to the tooth that opens it.
+"""
+from PySide6.QtCore import Qt
+
+from app.services.custom_status_service import custom_status_service
+from app.ui.components.enhanced_tooth_widget import EnhancedToothWidget, status_options_model
+
+
+def test_teeth_share_one_dropdown(qtbot, database):
+    assert custom_status_service.create_custom_status({'status_name': 'filling', 'category': 'restorative'})
+    upper, lower = EnhancedToothWidget(11), EnhancedToothWidget(41)
+    for tooth in (upper, lower):
+        qtbot.addWidget(tooth)
+        tooth.show()
+    lower.set_doctor_status(['filling'])
+
+    upper.on_tooth_button_clicked()
+    dropdown = upper.status_dropdown
+    assert dropdown.parent() is upper and dropdown.isVisible()
+    assert dropdown.count() == len(status_options_model.get_options())
+
+    lower.on_tooth_button_clicked()
+    assert lower.status_dropdown is dropdown
+    assert upper.status_dropdown is None
+    assert dropdown.parent() is lower and dropdown.isVisible()
+    assert dropdown.selected_items() == ['filling']
+
+    # A new status definition reloads the open dropdown and keeps the tooth's selection
+    assert custom_status_service.create_custom_status({'status_name': 'crown', 'category': 'restorative'})
+    assert dropdown.count() == len(status_options_model.get_options()) == 5
+    assert dropdown.selected_items() == ['filling']
+
+    # Selections go to the tooth holding the dropdown
+    selected = []
+    lower.statuses_selected.connect(lambda tooth_number, statuses, mode: selected.append((tooth_number, statuses)))
+    items = [dropdown._list_widget.item(row) for row in range(dropdown._list_widget.count())]
+    next(item for item in items if item.data(Qt.UserRole) == 'filling').setCheckState(Qt.Unchecked)
+    assert selected == [(41, [])]
+    assert upper.doctor_statuses == ['normal']
+
+    lower.on_tooth_button_clicked()
+    assert not dropdown.isVisible()
@@ -0,0 +1,108 @@
+"""
+The visit_daily_stats rollup kept by triggers must always equal a GROUP BY over visit_records.
+"""
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.services.patient_service import patient_service
+from app.services.visit_records_service import visit_records_service
+
+
+def rollup(connection):
+    return connection.exec_driver_sql(
+        "SELECT visit_date, status, visit_type, visit_count, total_cost FROM visit_daily_stats "
+        "ORDER BY visit_date, status, visit_type"
+    ).fetchall()
+
+
+def grouped(connection):
+    return connection.exec_driver_sql(
+        "SELECT visit_date, COALESCE(status, ''), COALESCE(visit_type, ''), COUNT(*), "
+        "ROUND(COALESCE(SUM(cost), 0), 2) FROM visit_records GROUP BY 1, 2, 3 ORDER BY 1, 2, 3"
+    ).fetchall()
+
+
+def assert_rollup_matches(database):
+    with database.engine.connect() as connection:
+        expected = [(day, status, kind, count, Decimal(str(cost))) for day, status, kind, count, cost in grouped(connection)]
+        actual = [(day, status, kind, count, Decimal(str(cost))) for day, status, kind, count, cost in rollup(connection)]
+    assert actual == expected
+    assert visit_records_service.get_visit_statistics(use_rollup=True) == visit_records_service.get_visit_statistics(
+        use_rollup=False)
+
+
+@pytest.fixture
+def patients(database):
+    return [
+        patient_service.create_patient({'full_name': name, 'phone_number': phone})
+        for name, phone in [("Ravi Kumar", "9876543210"), ("Meena Iyer", "9123456780")]
+    ]
+
+
+def test_rollup_follows_inserts_updates_and_deletes(database, patients):
+    first, second = (patient['id'] for patient in patients)
+    visits = [
+        visit_records_service.create_visit(first, {'visit_date': date(2024, 5, 1), 'status': 'completed',
+                                                    'visit_type': 'treatment', 'cost': 1500}),
+        visit_records_service.create_visit(first, {'visit_date': date(2024, 5, 1), 'status': 'completed',
+                                                    'visit_type': 'treatment', 'cost': 250.50}),
+        visit_records_service.create_visit(second, {'visit_date': date(2024, 5, 1), 'visit_type': 'consultation'}),
+        visit_records_service.create_visit(second, {'visit_date': date(2024, 6, 3), 'status': 'no_show',
+                                                     'visit_type': 'follow_up', 'cost': 300}),
+    ]
+    assert all(visits)
+    assert_rollup_matches(database)
+
+    # Move a visit to another day and status, and change a cost in place
+    assert visit_records_service.update_visit_record(visits[1]['id'], {'visit_date': date(2024, 6, 3), 'status': 'cancelled'})
+    assert visit_records_service.update_visit_record(visits[0]['id'], {'cost': Decimal('1750.00')})
+    assert visit_records_service.update_visit_record(visits[2]['id'], {'status': None, 'visit_type': None})
+    assert_rollup_matches(database)
+
+    assert visit_records_service.delete_visit(visits[3]['id'])
+    assert_rollup_matches(database)
+
+    # Cascading delete through the patient removes that patient's visits from the rollup
+    assert patient_service.delete_patient(patients[0]['patient_id'])
+    assert_rollup_matches(database)
+    with database.engine.connect() as connection:
+        assert [tuple(row[:4]) for row in rollup(connection)] == [(date(2024, 5, 1).isoformat(), '', '', 1)]
+
+
+def test_statistics_from_rollup(database, patients):
+    patient_id = patients[0]['id']
+    for status, cost in [('completed', 100), ('completed', 200), ('no_show', None), ('scheduled', 50)]:
+        assert visit_records_service.create_visit(patient_id, {'visit_date': date(2024, 7, 1), 'status': status,
+                                                               'visit_type': 'treatment', 'cost': cost})
+
+    statistics = visit_records_service.get_visit_statistics(start_date=date(2024, 7, 1), end_date=date(2024, 7, 1))
+    assert statistics['total_visits'] == 4
+    assert statistics['status_breakdown']['completed'] == 2
+    assert statistics['visit_type_breakdown']['treatment'] == 4
+    assert statistics['total_revenue'] == 300.0
+    assert statistics['completion_rate'] == 50.0
+    assert statistics['no_show_rate'] == 25.0
+    assert visit_records_service.get_visit_statistics(start_date=date(2024, 7, 2))['total_visits'] == 0
+
+
+def test_rollup_totals_do_not_drift(database, patients):
+    patient_id = patients[0]['id']
+    visits = [visit_records_service.create_visit(patient_id, {'visit_date': date(2024, 8, 1), 'status': 'completed',
+                                                              'visit_type': 'treatment', 'cost': cost})
+              for cost in (0.1, 0.2, 0.7)]
+    other_day = visit_records_service.create_visit(patient_id, {'visit_date': date(2024, 8, 2), 'cost': 5})
+    assert visit_records_service.update_visit_record(visits[2]['id'], {'cost': Decimal('0.40')})
+    assert visit_records_service.delete_visit(visits[0]['id'])
+
+    with database.engine.connect() as connection:
+        totals = connection.exec_driver_sql(
+            "SELECT visit_date, total_cost FROM visit_daily_stats ORDER BY visit_date"
+        ).fetchall()
+    # Stored exactly at cents, not 0.6000000000000001
+    assert [tuple(row) for row in totals] == [('2024-08-01', 0.6), ('2024-08-02', 5)]
+
+    # Deleting the last visit of a group removes only that group's row
+    assert visit_records_service.delete_visit(other_day['id'])
+    assert_rollup_matches(database)